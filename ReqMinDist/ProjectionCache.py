@@ -0,0 +1,155 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# ProjectionCache.py
+
+import numpy as np
+import sys
+import os
+import glob
+import hashlib
+import io
+import inspect
+import copy
+
+# On-disk cache of projection results (e.g. from ProjFinalBalance / ProjFinalBalanceTraditional, or ProjWithRMDs), so
+# re-running a driver script with the same inputs (e.g. while only changing plots) skips the projections entirely. Off
+# unless the caller asks for it (UseCache = True), since it writes files.
+
+# This is the one implementation: StressTestingAnalysis/WithdrawalOptimization and ReqMinDist have exact copies, made by
+# SyncVendoredCopies.py. Edit this file, then run that script, rather than editing the copies.
+
+# Each result is stored as a compressed .npz file in CacheDir, named by a hash of the projection function's name and
+# all of its inputs. Each file also records the engine version it was computed with: a hash of the source of every
+# calculation module in the projection function's directory, so any change to the engine code invalidates the old
+# results. Once the files in CacheDir exceed MaxCacheSize bytes, the least recently used are deleted.
+
+# Entries of the input dicts that are derived from the other entries (and so aren't hashed), e.g. the tax schedules
+# GetTaxSchedule stores in TaxRateInfo
+DerivedInputKeys = ['TaxSchedules']
+
+# Engine version of each directory, computed once per process
+EngineVersions = {}
+
+# Run ProjFunction(*Args), or load its result from the cache if it was already run with the same inputs and engine
+# version. The result must be a dict of numbers / arrays (e.g. ProjArrays). With UseCache = False (the default), always
+# runs ProjFunction, without reading or writing the cache.
+# ProjFunction is run on a deep copy of Args, since the projections can modify their inputs (e.g. the Roth conversion
+# amounts in IVdict), which a cache hit couldn't reproduce. So a later projection with the same inputs (e.g. the
+# Traditional projection after the TPM projection) always starts from the same values, cached or not.
+# DerivedKwargs: keyword arguments of ProjFunction that are derived from Args (and so aren't hashed, or copied), e.g.
+# the ProjectionSetup shared by the projections of ProjectBothStrategies.
+def CachedProjection(ProjFunction,Args,CacheDir='./ProjectionCache/',MaxCacheSize=500.e6,UseCache=False,
+                     DerivedKwargs=None):
+
+    if DerivedKwargs is None:
+        DerivedKwargs = {}
+
+    if not UseCache:
+        return ProjFunction(*copy.deepcopy(Args),**DerivedKwargs)
+
+    EngineVersion = GetEngineVersion(ProjFunction)
+
+    Hash = hashlib.sha256()
+    Hash.update(ProjFunction.__module__.encode()+b'.'+ProjFunction.__name__.encode())
+    for Arg in Args:
+        CanonicalInput(Arg,Hash)
+    CacheFile = os.path.join(CacheDir,Hash.hexdigest()+'.npz')
+
+    if os.path.exists(CacheFile):
+        with np.load(CacheFile) as CacheData:
+            Result = {Key: CacheData[Key] for Key in CacheData.files}
+        if str(Result.pop('EngineVersion')) == EngineVersion:
+            # numbers were stored as 0-d arrays
+            for Key in Result:
+                if Result[Key].ndim == 0:
+                    Result[Key] = Result[Key].item()
+            # mark as recently used
+            os.utime(CacheFile)
+            return Result
+        # computed with a different engine version, so out of date
+        os.remove(CacheFile)
+
+    Result = ProjFunction(*copy.deepcopy(Args),**DerivedKwargs)
+
+    for Key in Result:
+        if isinstance(Result[Key],dict):
+            print('CachedProjection can only cache dicts of numbers / arrays (not '+Key+'). Exiting.')
+            sys.exit()
+
+    # write to a temporary file then rename, so an interrupted write (or a parallel sweep writing the same entry)
+    # never leaves a partial cache file behind
+    if not os.path.exists(CacheDir):
+        os.makedirs(CacheDir)
+    Buffer = io.BytesIO()
+    np.savez_compressed(Buffer,EngineVersion=EngineVersion,**Result)
+    TempFile = CacheFile+'.'+str(os.getpid())+'.tmp'
+    with open(TempFile,'wb') as File:
+        File.write(Buffer.getvalue())
+    os.replace(TempFile,CacheFile)
+
+    EvictLeastRecentlyUsed(CacheDir,MaxCacheSize)
+
+    return Result
+
+# Delete every cached result in CacheDir
+def ClearProjectionCache(CacheDir='./ProjectionCache/'):
+
+    for CacheFile in glob.glob(os.path.join(CacheDir,'*.npz')):
+        os.remove(CacheFile)
+
+# Delete the least recently used cached results until the cache is no larger than MaxCacheSize bytes
+def EvictLeastRecentlyUsed(CacheDir,MaxCacheSize):
+
+    CacheFiles = glob.glob(os.path.join(CacheDir,'*.npz'))
+    FileStats = [os.stat(CacheFile) for CacheFile in CacheFiles]
+    CacheSize = sum(Stat.st_size for Stat in FileStats)
+
+    for ct in np.argsort([Stat.st_mtime for Stat in FileStats]):
+        if CacheSize <= MaxCacheSize:
+            break
+        os.remove(CacheFiles[ct])
+        CacheSize -= FileStats[ct].st_size
+
+# Hash of the source of every calculation module (not driver templates) in the projection function's directory
+def GetEngineVersion(ProjFunction):
+
+    EngineDir = os.path.dirname(os.path.abspath(inspect.getsourcefile(ProjFunction)))
+    if EngineDir not in EngineVersions:
+        Hash = hashlib.sha256()
+        for SourceFile in sorted(glob.glob(os.path.join(EngineDir,'*.py'))):
+            if SourceFile.endswith('Template.py'):
+                continue
+            Hash.update(os.path.basename(SourceFile).encode())
+            with open(SourceFile,'rb') as File:
+                Hash.update(File.read())
+        EngineVersions[EngineDir] = Hash.hexdigest()
+
+    return EngineVersions[EngineDir]
+
+# Add an input (number, string, bool, None, array, or list/tuple/dict of those) to Hash, in a canonical form: dicts in
+# sorted key order, and every value tagged with its type (and arrays with dtype and shape), so different inputs can't
+# produce the same bytes
+def CanonicalInput(Input,Hash):
+
+    if isinstance(Input,dict):
+        Keys = sorted(Key for Key in Input if Key not in DerivedInputKeys)
+        Hash.update(b'dict'+str(len(Keys)).encode())
+        for Key in Keys:
+            CanonicalInput(Key,Hash)
+            CanonicalInput(Input[Key],Hash)
+    elif isinstance(Input,(list,tuple)):
+        Hash.update(b'list'+str(len(Input)).encode())
+        for Value in Input:
+            CanonicalInput(Value,Hash)
+    elif isinstance(Input,(np.ndarray,np.generic)):
+        Input = np.ascontiguousarray(Input)
+        Hash.update(b'array'+Input.dtype.str.encode()+str(Input.shape).encode())
+        Hash.update(Input.tobytes())
+    elif Input is None or isinstance(Input,(bool,int,float,str)):
+        Hash.update(type(Input).__name__.encode()+repr(Input).encode())
+    else:
+        print('Cannot cache projection with input of type '+type(Input).__name__+'. Exiting.')
+        sys.exit()
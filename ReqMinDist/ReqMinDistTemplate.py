@@ -11,6 +11,7 @@ import os
 from TaxRateInfoInput import TaxRateInfoInput
 from MultiPlot import MultiPlot
 from ProjWithRMDs import ProjWithRMDs
+from ProjectionCache import CachedProjection, ClearProjectionCache as ClearProjectionCacheDir
 
 # Driver for employing method to compute required minimum distribution for a given age and pretax asset value
 
@@ -46,6 +47,15 @@ OutputFile = 'Output.txt'
 ProjectWithRMDsingleRun = True
 FinalBalanceVsFractionPretax = True
 
+# Projection result cache: reuse the results of a previous run with identical inputs (e.g. when only changing plots),
+# stored in ProjectionCacheDir. Results are recomputed whenever any input or the engine code changes. Least recently
+# used results are deleted once the cache exceeds MaxProjectionCacheSize. Off by default, since it writes files under
+# ProjectionCacheDir: set UseProjectionCache = True to use it.
+UseProjectionCache = False
+ClearProjectionCache = False # delete all cached results before running
+ProjectionCacheDir = OutDir+'ProjectionCache/'
+MaxProjectionCacheSize = 500.e6 # bytes
+
 # Plot flags
 PrintSingleRun = True # Only if ProjectWithRMDsingleRun = True
 AssetBalancesVsAge = True # Only if ProjectWithRMDsingleRun = True
@@ -86,11 +96,16 @@ DefaultPlotDict = \
 if not os.path.exists(OutDir):
     os.makedirs(OutDir)
 
+if ClearProjectionCache:
+    ClearProjectionCacheDir(ProjectionCacheDir)
+
 #############################################################################################################
 
 # Project forward by NumYearsToProject with RMDs
 if ProjectWithRMDsingleRun:
-    ProjArrays = ProjWithRMDs(NumYearsToProject,IVdict,SocialSecurityPayments,TaxRateInfo,FilingStatus,Exp,R)
+    ProjArrays = CachedProjection(ProjWithRMDs,(NumYearsToProject,IVdict,SocialSecurityPayments,TaxRateInfo,
+                                                FilingStatus,Exp,R),
+                                  ProjectionCacheDir,MaxProjectionCacheSize,UseProjectionCache)
 
 #############################################################################################################
 
@@ -242,7 +257,9 @@ if FinalBalanceVsFractionPretax:
         IVdict['PostTaxIV'] = PostTaxIVarray[ct]
         PreTaxIVpercentage[ct] = np.round(PreTaxIVarray[ct]/PreTaxIVarray[-1]*100,2)
 
-        ProjArrays = ProjWithRMDs(NumYearsToProject,IVdict,SocialSecurityPayments,TaxRateInfo,FilingStatus,Exp,R)
+        ProjArrays = CachedProjection(ProjWithRMDs,(NumYearsToProject,IVdict,SocialSecurityPayments,TaxRateInfo,
+                                                    FilingStatus,Exp,R),
+                                      ProjectionCacheDir,MaxProjectionCacheSize,UseProjectionCache)
 
         TotalAssetsArray[ct] = ProjArrays['TotalAssets'][-1]
         TotalTaxesArray[ct] = np.sum(ProjArrays['Taxes'])
@@ -14,6 +14,8 @@ from WithdrawalOptimization.TaxRateInfoInput import TaxRateInfoInput
 from WithdrawalOptimization.SupportMethods import MultiPlot
 from WithdrawalOptimization.ProjFinalBalance import ProjFinalBalance
 from WithdrawalOptimization.ProjFinalBalanceTraditional import ProjFinalBalanceTraditional
+from WithdrawalOptimization.RunSweep import RunSweep
+from WithdrawalOptimization.ProjectionCache import ClearProjectionCache as ClearProjectionCacheDir
 
 # Vary expenses and ROI to assess how the Traditional and TPM withdrawal methods fare
 
@@ -110,6 +112,7 @@ SpecifiedIncome = 50000.
 
 # Retirement Expenses - in current year dollars, as is everything else in this simulation
 Exp = 40000.
+ExpRate = 0. # How much expenses (in current day dollars) change each year
 
 # Future expense adjustments (e.g. a mortgage is paid off)
 FutureExpenseAdjustments = np.array([-800.*12], dtype=float)
@@ -136,9 +139,24 @@ OutputFile = 'Output.txt'
 # Tax and Penalty Minimization (TPM) Withdrawal Method or Traditional Withdrawal Method
 TPMorTraditionalWithdrawal = 'Both' #'TPM' #'Traditional' #
 
+# Flag dictating whether to run TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc method or not
+TryIncreasingPostTaxWithdrawalAndMaybeReducingStdIncFlag = False
+
 # TPM Method - Withdraw from 457b or Pretax first
 TPMwithdraw457bFirst = True
 
+# Number of parallel processes to run the sweep projections on (default: number of cores)
+NumWorkers = os.cpu_count()
+
+# Projection result cache: reuse the results of previous sweeps with identical inputs (e.g. when only changing plots),
+# stored in ProjectionCacheDir. Results are recomputed whenever any input or the engine code changes. Least recently
+# used results are deleted once the cache exceeds MaxProjectionCacheSize. Off by default, since it writes files under
+# ProjectionCacheDir: set UseProjectionCache = True to use it.
+UseProjectionCache = False
+ClearProjectionCache = False # delete all cached results before running
+ProjectionCacheDir = OutDir+'ProjectionCache/'
+MaxProjectionCacheSize = 500.e6 # bytes
+
 # Analysis Flags
 VaryExpensesAnalysis = True
 VaryExpensesAnalysisFinalAssets = False
@@ -184,9 +202,12 @@ IncDict = {'QualifiedDividendYield': QualifiedDividendYield,
            'MaxStandardIncomeChange': MaxStandardIncomeChange,
            'AgeMaxStandardIncomeChangeWillStart': AgeMaxStandardIncomeChangeWillStart,
            'SpecifiedIncome': SpecifiedIncome,
-           'SpecifiedIncomeAfterACA': SpecifiedIncomeAfterACA}
+           'SpecifiedIncomeAfterACA': SpecifiedIncomeAfterACA,
+           'TryIncreasingPostTaxWithdrawalAndMaybeReducingStdIncFlag':
+               TryIncreasingPostTaxWithdrawalAndMaybeReducingStdIncFlag}
 
 ExpDict = {'Exp': Exp,
+           'ExpRate': ExpRate,
            'FutureExpenseAdjustments': FutureExpenseAdjustments,
            'FutureExpenseAdjustmentsAge': FutureExpenseAdjustmentsAge}
 
@@ -211,6 +232,9 @@ DefaultPlotDict = \
 if not os.path.exists(OutDir):
     os.makedirs(OutDir)
 
+if ClearProjectionCache:
+    ClearProjectionCacheDir(ProjectionCacheDir)
+
 #############################################################################################################
 # Run simulation for variety of expense levels
 if VaryExpensesAnalysis:
@@ -222,38 +246,20 @@ if VaryExpensesAnalysis:
         MaxExpense = 120000.
     ExpenseDelta = 1000.
     ExpenseRange = np.arange(MinExpense,MaxExpense,ExpenseDelta)
-    FinalBalance = np.zeros(len(ExpenseRange))
-    FinalBalanceTPM = np.zeros(len(ExpenseRange))
-    FinalBalanceTraditional = np.zeros(len(ExpenseRange))
-    OutOfMoneyAge = np.zeros(len(ExpenseRange))
-    OutOfMoneyAgeTPM = np.zeros(len(ExpenseRange))
-    OutOfMoneyAgeTraditional = np.zeros(len(ExpenseRange))
 
     t0 = time.time()
 
-    for ct in range(len(ExpenseRange)):
-        ExpDict['Exp'] = ExpenseRange[ct]
-        print('Expenses = $',ExpenseRange[ct])
-
-        if TPMorTraditionalWithdrawal == 'TPM':
-            ProjArrays = ProjFinalBalance(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,NumYearsToProject, R,
-                                          FilingStatus,TPMwithdraw457bFirst)
-            FinalBalance[ct] = ProjArrays['TotalAssets'][-1]
-            OutOfMoneyAge[ct] = ProjArrays['OutOfMoneyAge']
-        elif TPMorTraditionalWithdrawal == 'Traditional':
-            ProjArrays = ProjFinalBalanceTraditional(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,NumYearsToProject, R,
-                                                     FilingStatus)
-            FinalBalance[ct] = ProjArrays['TotalAssets'][-1]
-            OutOfMoneyAge[ct] = ProjArrays['OutOfMoneyAge']
-        elif TPMorTraditionalWithdrawal == 'Both':
-            ProjArrays = ProjFinalBalance(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,NumYearsToProject, R,
-                                          FilingStatus,TPMwithdraw457bFirst)
-            ProjArraysTraditional = ProjFinalBalanceTraditional(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,
-                                                                NumYearsToProject, R,FilingStatus)
-            FinalBalanceTPM[ct] = ProjArrays['TotalAssets'][-1]
-            FinalBalanceTraditional[ct] = ProjArraysTraditional['TotalAssets'][-1]
-            OutOfMoneyAgeTPM[ct] = ProjArrays['OutOfMoneyAge']
-            OutOfMoneyAgeTraditional[ct] = ProjArraysTraditional['OutOfMoneyAge']
+    SweepDict = RunSweep('Exp',ExpenseRange,TPMorTraditionalWithdrawal,TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,
+                         NumYearsToProject,R,FilingStatus,TPMwithdraw457bFirst,NumWorkers,UseProjectionCache,
+                         ProjectionCacheDir,MaxProjectionCacheSize)
+    if TPMorTraditionalWithdrawal == 'Both':
+        FinalBalanceTPM = SweepDict['FinalBalanceTPM']
+        FinalBalanceTraditional = SweepDict['FinalBalanceTraditional']
+        OutOfMoneyAgeTPM = SweepDict['OutOfMoneyAgeTPM']
+        OutOfMoneyAgeTraditional = SweepDict['OutOfMoneyAgeTraditional']
+    else:
+        FinalBalance = SweepDict['FinalBalance']
+        OutOfMoneyAge = SweepDict['OutOfMoneyAge']
 
     t1 = time.time()
     SimTime = t1-t0
@@ -266,38 +272,20 @@ if VaryROIanalysis:
     MaxROI = 0.14 # 14%/year gain (after inflation) - likely wildly optimistic
     ROIdelta = 0.01
     ROIrange = np.arange(MinROI,MaxROI,ROIdelta)
-    FinalBalance = np.zeros(len(ROIrange))
-    FinalBalanceTPM = np.zeros(len(ROIrange))
-    FinalBalanceTraditional = np.zeros(len(ROIrange))
-    OutOfMoneyAge = np.zeros(len(ROIrange))
-    OutOfMoneyAgeTPM = np.zeros(len(ROIrange))
-    OutOfMoneyAgeTraditional = np.zeros(len(ROIrange))
 
     t0 = time.time()
 
-    for ct in range(len(ROIrange)):
-        R = ROIrange[ct]
-        print('ROI = ',ROIrange[ct])
-
-        if TPMorTraditionalWithdrawal == 'TPM':
-            ProjArrays = ProjFinalBalance(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,NumYearsToProject, R,
-                                          FilingStatus,TPMwithdraw457bFirst)
-            FinalBalance[ct] = ProjArrays['TotalAssets'][-1]
-            OutOfMoneyAge[ct] = ProjArrays['OutOfMoneyAge']
-        elif TPMorTraditionalWithdrawal == 'Traditional':
-            ProjArrays = ProjFinalBalanceTraditional(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,NumYearsToProject, R,
-                                                     FilingStatus)
-            FinalBalance[ct] = ProjArrays['TotalAssets'][-1]
-            OutOfMoneyAge[ct] = ProjArrays['OutOfMoneyAge']
-        elif TPMorTraditionalWithdrawal == 'Both':
-            ProjArrays = ProjFinalBalance(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,NumYearsToProject, R,
-                                          FilingStatus,TPMwithdraw457bFirst)
-            ProjArraysTraditional = ProjFinalBalanceTraditional(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,
-                                                                NumYearsToProject, R,FilingStatus)
-            FinalBalanceTPM[ct] = ProjArrays['TotalAssets'][-1]
-            FinalBalanceTraditional[ct] = ProjArraysTraditional['TotalAssets'][-1]
-            OutOfMoneyAgeTPM[ct] = ProjArrays['OutOfMoneyAge']
-            OutOfMoneyAgeTraditional[ct] = ProjArraysTraditional['OutOfMoneyAge']
+    SweepDict = RunSweep('R',ROIrange,TPMorTraditionalWithdrawal,TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,
+                         NumYearsToProject,R,FilingStatus,TPMwithdraw457bFirst,NumWorkers,UseProjectionCache,
+                         ProjectionCacheDir,MaxProjectionCacheSize)
+    if TPMorTraditionalWithdrawal == 'Both':
+        FinalBalanceTPM = SweepDict['FinalBalanceTPM']
+        FinalBalanceTraditional = SweepDict['FinalBalanceTraditional']
+        OutOfMoneyAgeTPM = SweepDict['OutOfMoneyAgeTPM']
+        OutOfMoneyAgeTraditional = SweepDict['OutOfMoneyAgeTraditional']
+    else:
+        FinalBalance = SweepDict['FinalBalance']
+        OutOfMoneyAge = SweepDict['OutOfMoneyAge']
 
     t1 = time.time()
     SimTime = t1-t0
@@ -18,6 +18,7 @@ from WithdrawalOptimization.WithdrawFromPostTax import WithdrawFromPostTax
 from WithdrawalOptimization.GetRemainingNeededCashNoTaxesOrPenalties import GetRemainingNeededCashNoTaxesOrPenalties
 from WithdrawalOptimization.GetRemainingNeededCashWithTaxesAndOrPenalties import GetRemainingNeededCashWithTaxesAndOrPenalties
 from WithdrawalOptimization.TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc import *
+from WithdrawalOptimization.EventLog import LogEvent
 
 # Expand width of output in console
 import pandas as pd
@@ -248,8 +249,7 @@ def ProjFinalBalance(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,NumYearsToPro
 
         # if TotalCash still less than TotalCashNeeded, you've run out of money!
         if TotalCashNeeded - TotalCash[ct1] >= 0.01:
-            print('Ran out of money!')
-            print('Age = '+str(Age[ct1,0]))
+            LogEvent('Warning','OutOfMoney',YearCt=ct1,Age=Age[ct1,0])
             OutOfMoneyAge = Age[ct1,0]
             break
 
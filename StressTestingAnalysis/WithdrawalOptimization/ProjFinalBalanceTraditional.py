@@ -15,6 +15,7 @@ from WithdrawalOptimization.WithdrawFromPreTaxTraditionalWithPenalty import With
 from WithdrawalOptimization.WithdrawFromRothTraditional import WithdrawFromRothTraditional
 from WithdrawalOptimization.WithdrawFromRothTraditionalWithPenalty import WithdrawFromRothTraditionalWithPenalty
 from WithdrawalOptimization.ComputeRMD import ComputeRMD
+from WithdrawalOptimization.EventLog import LogEvent
 
 # Expand width of output in console
 import pandas as pd
@@ -321,8 +322,7 @@ def ProjFinalBalanceTraditional(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,Nu
 
         # if CashMinusTaxes still less than TotalCashNeeded, you've run out of money!
         if TotalCashNeeded - TotalCash[ct1] >= 0.01:
-            print('Ran out of money!')
-            print('Age = '+str(Age[ct1,0]))
+            LogEvent('Warning','OutOfMoney',YearCt=ct1,Age=Age[ct1,0])
             OutOfMoneyAge = Age[ct1,0]
             break
 
@@ -0,0 +1,97 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# RunSweep.py
+
+import numpy as np
+import sys
+import os
+import copy
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from WithdrawalOptimization.ProjFinalBalance import ProjFinalBalance
+from WithdrawalOptimization.ProjFinalBalanceTraditional import ProjFinalBalanceTraditional
+from WithdrawalOptimization.ProjectionCache import CachedProjection
+from WithdrawalOptimization.EventLog import LogEvent
+
+# Run a sweep of independent projections, one per value in SweepRange of SweepParam ('Exp' = expenses, 'R' = annual
+# ROI), split across NumWorkers processes (default: number of cores). Returns the final total asset balance and age
+# money ran out for each sweep value, in SweepRange order, identical to running the sweep serially:
+# FinalBalance, OutOfMoneyAge for TPM or Traditional, and FinalBalanceTPM, FinalBalanceTraditional, OutOfMoneyAgeTPM,
+# OutOfMoneyAgeTraditional for Both.
+# With UseCache = True, each projection's results are kept in the on-disk cache in CacheDir (see ProjectionCache.py), so
+# re-running the same sweep skips the projections.
+# Sweeps are silent: each point (and any point running out of money) is only reported to the event log (see
+# EventLog.py), which prints nothing unless a listener is attached, e.g. with EventLogListener('Info').
+def RunSweep(SweepParam,SweepRange,TPMorTraditionalWithdrawal,TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,
+             NumYearsToProject,R,FilingStatus,TPMwithdraw457bFirst,NumWorkers=None,UseCache=False,
+             CacheDir='./ProjectionCache/',MaxCacheSize=500.e6):
+
+    if SweepParam not in ['Exp','R']:
+        print('Sweep parameter not recognized. Exiting.')
+        sys.exit()
+
+    if NumWorkers is None:
+        NumWorkers = os.cpu_count()
+
+    ArgsList = [(SweepParam,SweepValue,TPMorTraditionalWithdrawal,TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,
+                 NumYearsToProject,R,FilingStatus,TPMwithdraw457bFirst,UseCache,CacheDir,MaxCacheSize)
+                for SweepValue in SweepRange]
+
+    # Worker processes are forked, since spawned workers would re-run the driver script (the templates have no
+    # if __name__ == '__main__' guard). Where fork isn't available (e.g. Windows), the sweep runs serially.
+    if NumWorkers > 1 and len(SweepRange) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        with ProcessPoolExecutor(max_workers=NumWorkers,mp_context=multiprocessing.get_context('fork')) as executor:
+            # map returns results in SweepRange order, regardless of which process finishes first
+            ResultsList = list(executor.map(RunSweepPoint,*zip(*ArgsList)))
+    else:
+        ResultsList = [RunSweepPoint(*Args) for Args in ArgsList]
+
+    SweepDict = {}
+    for Key in ResultsList[0]:
+        SweepDict[Key] = np.array([Results[Key] for Results in ResultsList],dtype=float)
+
+    return SweepDict
+
+# Run a single point of a sweep
+def RunSweepPoint(SweepParam,SweepValue,TPMorTraditionalWithdrawal,TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,
+                  NumYearsToProject,R,FilingStatus,TPMwithdraw457bFirst,UseCache,CacheDir,MaxCacheSize):
+
+    # Deep copy inputs, so no sweep point can see another's modifications to them
+    IVdict = copy.deepcopy(IVdict)
+    IncDict = copy.deepcopy(IncDict)
+    ExpDict = copy.deepcopy(ExpDict)
+
+    if SweepParam == 'Exp':
+        ExpDict['Exp'] = SweepValue
+    elif SweepParam == 'R':
+        R = SweepValue
+    LogEvent('Info','SweepPoint',SweepParam=SweepParam,SweepValue=SweepValue)
+
+    Results = {}
+    if TPMorTraditionalWithdrawal in ['TPM','Both']:
+        ProjArrays = CachedProjection(ProjFinalBalance,(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,NumYearsToProject,
+                                                        R,FilingStatus,TPMwithdraw457bFirst),
+                                      CacheDir,MaxCacheSize,UseCache)
+    if TPMorTraditionalWithdrawal in ['Traditional','Both']:
+        ProjArraysTraditional = CachedProjection(ProjFinalBalanceTraditional,(TaxRateInfo,IVdict,IncDict,ExpDict,
+                                                                              CurrentAge,NumYearsToProject,R,
+                                                                              FilingStatus),
+                                                 CacheDir,MaxCacheSize,UseCache)
+
+    if TPMorTraditionalWithdrawal == 'TPM':
+        Results['FinalBalance'] = ProjArrays['TotalAssets'][-1]
+        Results['OutOfMoneyAge'] = ProjArrays['OutOfMoneyAge']
+    elif TPMorTraditionalWithdrawal == 'Traditional':
+        Results['FinalBalance'] = ProjArraysTraditional['TotalAssets'][-1]
+        Results['OutOfMoneyAge'] = ProjArraysTraditional['OutOfMoneyAge']
+    elif TPMorTraditionalWithdrawal == 'Both':
+        Results['FinalBalanceTPM'] = ProjArrays['TotalAssets'][-1]
+        Results['FinalBalanceTraditional'] = ProjArraysTraditional['TotalAssets'][-1]
+        Results['OutOfMoneyAgeTPM'] = ProjArrays['OutOfMoneyAge']
+        Results['OutOfMoneyAgeTraditional'] = ProjArraysTraditional['OutOfMoneyAge']
+
+    return Results
@@ -7,6 +7,7 @@
 
 import numpy as np
 from WithdrawalOptimization.ComputeTaxes import *
+from WithdrawalOptimization.EventLog import LogEvent
 
 # Try reducing standard income and increasing LT cap gains to get more cash, if possible
 
@@ -65,6 +66,9 @@ def TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc(TotalCash,PreTax,PreTax
 
         # print('Test')
 
+        TotalCashStart = TotalCash[YearCt]
+        IncTotLTcapGainsStart = IncTotLTcapGains
+
         # Withdraw from PostTax until LTCG matches Step (if possible)
 
         # Initialize as Step - for PostTax withdrawal
@@ -126,12 +130,13 @@ def TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc(TotalCash,PreTax,PreTax
         # If Taxes not increased, no reason to reduce PreTax/PreTax457b withdrawals
         # TODO: might still need to do so for future version that accounts for ACA subsidies
         if (TaxesTemp - Taxes[YearCt]) < 0.01:
+            LogEvent('Debug','StdIncomeSwappedForLTcapGains',YearCt=YearCt,NumSteps=1,
+                     LTcapGainsSold=IncTotLTcapGains-IncTotLTcapGainsStart,StdIncomeRemoved=0.,
+                     CashGenerated=TotalCash[YearCt]-TotalCashStart)
             continue # skip rest of this while loop iteration
 
         # If Taxes ARE increased, reduce PreTax/PreTax457b withdrawals
 
-        print('Reducing PreTax/PreTax457b withdrawals')
-
         # Initialize as Step - for PreTax/PreTax457b withdrawal reversals
         RemainingStep = Step
 
@@ -215,6 +220,10 @@ def TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc(TotalCash,PreTax,PreTax
         TaxesDict = ComputeTaxes(TaxRateInfo,FilingStatus,IncomeTotStd,IncTotLTcapGains)
         Taxes[YearCt] = TaxesDict['Total']
 
+        LogEvent('Debug','StdIncomeSwappedForLTcapGains',YearCt=YearCt,NumSteps=1,
+                 LTcapGainsSold=IncTotLTcapGains-IncTotLTcapGainsStart,StdIncomeRemoved=Step-RemainingStep,
+                 CashGenerated=TotalCash[YearCt]-TotalCashStart)
+
         # Recompute for each step through the loop
         RemainingCashNeeded = TotalCashNeeded - TotalCash[YearCt]
 
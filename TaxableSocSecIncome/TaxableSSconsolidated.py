@@ -5,53 +5,48 @@
 
 # TaxableSSconsolidated.py
 
+import numpy as np
+
 # Compute how much of SS income is taxable, using more consolidated form of algorithm (vs using the IRS worksheet language)
+# Scalar version of TaxableSSconsolidatedArray
 
 def TaxableSSconsolidated(NonSSincome,TotalSSincome,MarriedOrNot):
 
-    # Bracket info based on filing status
-    if MarriedOrNot=='Not': #'Single':
-        MinOtherIncomeForSStoBeTaxed = 25000.   #MI
-        DeltaToTopOf50percentTaxableBracket = 9000.  #\Delta
-    else: # married
-        MinOtherIncomeForSStoBeTaxed = 32000.   #MI
-        DeltaToTopOf50percentTaxableBracket = 12000.  #\Delta
+    return float(TaxableSSconsolidatedArray(NonSSincome,TotalSSincome,MarriedOrNot))
 
-    # If total non-SS income plus half the SS income do not reach minimum income, then none of the SSI is taxable
-    if (TotalSSincome*0.5 + NonSSincome) < MinOtherIncomeForSStoBeTaxed:
-        TaxableSSincome = 0.
-        return TaxableSSincome
-
-    # If total non-SS income plus half the SS income MINUS minimum income (so the amount over that min income value)
-    # exceeds DeltaToTopOf50percentTaxableBracket (range between the bottom and top of the 50% bracket):
-    if (TotalSSincome*0.5 + NonSSincome - MinOtherIncomeForSStoBeTaxed) > DeltaToTopOf50percentTaxableBracket:
-        # Then compute amount over the top of the 50% bracket
-        DeltaOver50percentTaxableBracket = TotalSSincome*0.5 + NonSSincome - MinOtherIncomeForSStoBeTaxed - \
-                                           DeltaToTopOf50percentTaxableBracket
-
-        # And set the taxable amount in the 50% bracket as the smaller of the bracket length * 0.5 or half the TotalSSincome
-        if TotalSSincome*0.5 > DeltaToTopOf50percentTaxableBracket/2.:
-            TaxableSSin50percentBracket = DeltaToTopOf50percentTaxableBracket/2.
-        else:
-            TaxableSSin50percentBracket = TotalSSincome*0.5
-
-    else: # Then nothing over the top of the 50% bracket
-        DeltaOver50percentTaxableBracket = 0.
-
-        # And set the taxable amount in the 50% bracket as the smaller of (TotalSSincome*0.5 + NonSSincome -
-        # MinOtherIncomeForSStoBeTaxed)/2 or half the TotalSSincome
-        if TotalSSincome*0.5 > (TotalSSincome*0.5 + NonSSincome - MinOtherIncomeForSStoBeTaxed)/2.:
-            TaxableSSin50percentBracket = (TotalSSincome*0.5 + NonSSincome - MinOtherIncomeForSStoBeTaxed)/2.
-        else:
-            TaxableSSin50percentBracket = TotalSSincome*0.5
+# Compute how much of SS income is taxable, for numpy arrays of NonSSincome, TotalSSincome and MarriedOrNot (any of
+# which can also be a scalar, and which are broadcast against each other - e.g. a column of NonSSincome and a row of
+# TotalSSincome give the whole grid in one call)
+
+def TaxableSSconsolidatedArray(NonSSincome,TotalSSincome,MarriedOrNot):
+
+    NonSSincome = np.asarray(NonSSincome,dtype=float)
+    TotalSSincome = np.asarray(TotalSSincome,dtype=float)
+
+    # Bracket info based on filing status
+    NotMarried = np.asarray(MarriedOrNot)=='Not' #'Single':
+    MinOtherIncomeForSStoBeTaxed = np.where(NotMarried, 25000., 32000.)   #MI
+    DeltaToTopOf50percentTaxableBracket = np.where(NotMarried, 9000., 12000.)  #\Delta
+
+    # Total non-SS income plus half the SS income MINUS minimum income (so the amount over that min income value)
+    IncomeOverMin = TotalSSincome*0.5 + NonSSincome - MinOtherIncomeForSStoBeTaxed
+
+    # If that exceeds DeltaToTopOf50percentTaxableBracket (range between the bottom and top of the 50% bracket):
+    # compute the amount over the top of the 50% bracket, and set the taxable amount in the 50% bracket as the smaller
+    # of the bracket length * 0.5 or half the TotalSSincome
+    # Otherwise nothing is over the top of the 50% bracket, and the taxable amount in the 50% bracket is the smaller of
+    # IncomeOverMin/2 or half the TotalSSincome
+    Over50percentBracket = IncomeOverMin > DeltaToTopOf50percentTaxableBracket
+    DeltaOver50percentTaxableBracket = np.where(Over50percentBracket,
+                                                IncomeOverMin - DeltaToTopOf50percentTaxableBracket, 0.)
+    TaxableSSin50percentBracket = np.minimum(np.where(Over50percentBracket, DeltaToTopOf50percentTaxableBracket/2.,
+                                                      IncomeOverMin/2.), TotalSSincome*0.5)
 
     # The taxable amount of SSI is equal to TaxableSSin50percentBracket + 85% of amount over 50% bracket, until it
     # reaches 85% of the SSI, at which it's set to 85% of SSI for all higher values
-    # Thus set TaxableSSincome to the smaller of TaxableSSin50percentBracket+0.85*DeltaOver50percentTaxableBracket vs
-    # 0.85*TotalSSincome
-    if 0.85*TotalSSincome > TaxableSSin50percentBracket+0.85*DeltaOver50percentTaxableBracket:
-        TaxableSSincome = TaxableSSin50percentBracket+0.85*DeltaOver50percentTaxableBracket
-    else:
-        TaxableSSincome = 0.85*TotalSSincome
+    TaxableSSincome = np.minimum(TaxableSSin50percentBracket+0.85*DeltaOver50percentTaxableBracket, 0.85*TotalSSincome)
+
+    # If total non-SS income plus half the SS income do not reach minimum income, then none of the SSI is taxable
+    TaxableSSincome = np.where(TotalSSincome*0.5 + NonSSincome < MinOtherIncomeForSStoBeTaxed, 0., TaxableSSincome)
 
     return TaxableSSincome
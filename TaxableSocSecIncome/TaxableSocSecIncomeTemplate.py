@@ -12,7 +12,7 @@ import os
 from SupportMethods import MultiPlot, ComputeTaxes
 
 from TaxableSS import TaxableSS
-from TaxableSSconsolidated import TaxableSSconsolidated
+from TaxableSSconsolidated import TaxableSSconsolidated, TaxableSSconsolidatedArray
 
 # Evaluate methods to compute taxable social security income
 
@@ -108,10 +108,9 @@ if TaxableSSconsolidatedVerification:
     # test for a variety of NonSSincome - $100 increments from $0 to $100K
     NonSSincomeArray = np.arange(0.,100000.,100.)
     TaxableSSincome1array = np.zeros(len(NonSSincomeArray))
-    TaxableSSincome2array = np.zeros(len(NonSSincomeArray))
     for ct in range(0,len(NonSSincomeArray)):
         TaxableSSincome1array[ct] = TaxableSS(NonSSincomeArray[ct],TotalSSincome,MarriedOrNot)
-        TaxableSSincome2array[ct] = TaxableSSconsolidated(NonSSincomeArray[ct],TotalSSincome,MarriedOrNot)
+    TaxableSSincome2array = TaxableSSconsolidatedArray(NonSSincomeArray,TotalSSincome,MarriedOrNot)
 
     # compute the difference of the two arrays, look at any non-zero deltas between the two methods (if any)
     TaxableSSincome2minus1diffArray = TaxableSSincome2array - TaxableSSincome1array
@@ -121,11 +120,12 @@ if TaxableSSconsolidatedVerification:
     NonSSincomeArray = np.arange(0.,100000.,100.)
     TotalSSincomeArray = np.arange(0.,50000.,1000.)
     TaxableSSincome1array2D = np.zeros((len(NonSSincomeArray),len(TotalSSincomeArray)))
-    TaxableSSincome2array2D = np.zeros((len(NonSSincomeArray),len(TotalSSincomeArray)))
     for ct1 in range(0,len(TotalSSincomeArray)): # looping over TotalSSincome levels
         for ct2 in range(0,len(NonSSincomeArray)): # looping over NonSSincome levels
             TaxableSSincome1array2D[ct2,ct1] = TaxableSS(NonSSincomeArray[ct2],TotalSSincomeArray[ct1],MarriedOrNot)
-            TaxableSSincome2array2D[ct2,ct1] = TaxableSSconsolidated(NonSSincomeArray[ct2],TotalSSincomeArray[ct1],MarriedOrNot)
+    # whole grid at once: NonSSincome down the rows, TotalSSincome across the columns
+    TaxableSSincome2array2D = TaxableSSconsolidatedArray(NonSSincomeArray[:,np.newaxis],
+                                                         TotalSSincomeArray[np.newaxis,:],MarriedOrNot)
 
     # compute the difference of the two arrays, look at any non-zero deltas between the two methods (if any)
     TaxableSSincome2minus1diffArray2D = TaxableSSincome2array2D - TaxableSSincome1array2D
@@ -169,9 +169,7 @@ if SpecificSituations:
 # increments from $0 to $100K
 if TaxSSIvsNSSI_SingleSSI:
     NonSSincomeArray = np.arange(0.,100000.,100.)
-    TaxableSSincomeArray = np.zeros(len(NonSSincomeArray))
-    for ct in range(0,len(NonSSincomeArray)):
-        TaxableSSincomeArray[ct] = TaxableSSconsolidated(NonSSincomeArray[ct],TotalSSincome,MarriedOrNot)
+    TaxableSSincomeArray = TaxableSSconsolidatedArray(NonSSincomeArray,TotalSSincome,MarriedOrNot)
 
     NumPlots = 1
     TaxableSSincomeArray2D = np.zeros((NumPlots,len(TaxableSSincomeArray)))
@@ -214,9 +212,7 @@ if TaxSSIvsSSI_SingleNSSI:
     NonSSincome = 36000. #18000 #
 
     TotalSSincomeArray = np.arange(0.,100000.,100.) #50000.
-    TaxableSSincomeArray = np.zeros(len(TotalSSincomeArray))
-    for ct in range(0,len(TaxableSSincomeArray)):
-        TaxableSSincomeArray[ct] = TaxableSSconsolidated(NonSSincome,TotalSSincomeArray[ct],MarriedOrNot)
+    TaxableSSincomeArray = TaxableSSconsolidatedArray(NonSSincome,TotalSSincomeArray,MarriedOrNot)
 
     NumPlots = 1
     TaxableSSincomeArray2D = np.zeros((NumPlots,len(TaxableSSincomeArray)))
@@ -264,12 +260,8 @@ if TaxSSIvsNSSI_MultiSSI:
         TotalSSincomeArray = np.array([10000,20000,30000,40000,50000], dtype=float) # Other status scenario
 
     NumPlots = len(TotalSSincomeArray)
-    TaxableSSincomeArray2D = np.zeros((NumPlots,len(NonSSincomeArray)))
-
-    for ct1 in range(0,NumPlots):
-        for ct2 in range(0,len(NonSSincomeArray)):
-            TaxableSSincomeArray2D[ct1,ct2] = TaxableSSconsolidated(NonSSincomeArray[ct2],TotalSSincomeArray[ct1],
-                                                                    MarriedOrNot)
+    TaxableSSincomeArray2D = TaxableSSconsolidatedArray(NonSSincomeArray[np.newaxis,:],
+                                                        TotalSSincomeArray[:,np.newaxis],MarriedOrNot)
 
     if MarriedOrNot == 'Married':
         PlotLabelArray = ['SSI $20K','SSI $40K','SSI $60K','SSI $80K','SSI $100K'] # Married scenario
@@ -319,12 +311,8 @@ if TaxSSIvsSSI_MultiNSSI:
     NonSSincomeArray = np.array([20000,40000,60000,80000,100000], dtype=float)
 
     NumPlots = len(NonSSincomeArray)
-    TaxableSSincomeArray2D = np.zeros((NumPlots,len(TotalSSincomeArray)))
-
-    for ct1 in range(0,NumPlots):
-        for ct2 in range(0,len(TotalSSincomeArray)):
-            TaxableSSincomeArray2D[ct1,ct2] = TaxableSSconsolidated(NonSSincomeArray[ct1],TotalSSincomeArray[ct2],
-                                                                    MarriedOrNot)
+    TaxableSSincomeArray2D = TaxableSSconsolidatedArray(NonSSincomeArray[:,np.newaxis],
+                                                        TotalSSincomeArray[np.newaxis,:],MarriedOrNot)
 
     PlotLabelArray = ['Non-SSI $20K','Non-SSI $40K','Non-SSI $60K','Non-SSI $80K','Non-SSI $100K']
     PlotColorArray = ['k','r','b','g','m']
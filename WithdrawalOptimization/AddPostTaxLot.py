@@ -0,0 +1,26 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# AddPostTaxLot.py
+
+# PostTax['Bal'] and PostTax['CG'] are preallocated with room for every lot that can be purchased during the projection,
+# and PostTax['NumLots'] tracks how many of those columns are actually in use. This avoids np.append-ing a new column
+# (and thus copying the entire years x lots arrays) every time a new lot is purchased.
+
+# At most three new lots can be purchased each year (tax refund, penalty refund, excess cash), so this capacity is never
+# exceeded
+def PostTaxLotCapacity(NumInitialLots,NumYearsToProject):
+
+    return NumInitialLots + 3*NumYearsToProject
+
+# Purchase a new PostTax lot (e.g. with excess cash or a tax/penalty refund), with cap gain = 0 (since newly purchased)
+
+def AddPostTaxLot(PostTax,Amount,YearCt):
+
+    # Use the next unused column
+    LotInd = PostTax['NumLots']
+    PostTax['Bal'][YearCt,LotInd] = Amount
+    PostTax['CG'][YearCt,LotInd] = 0.
+    PostTax['NumLots'] += 1
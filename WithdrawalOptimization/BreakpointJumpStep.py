@@ -0,0 +1,169 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# BreakpointJumpStep.py
+
+import numpy as np
+from TaxSchedule import GetTaxSchedule
+from TaxableSSconsolidated import SSthresholds
+from LotBook import GetLotBook, LotSaleOrder
+from Instrumentation import Instrumented
+
+# Default WithdrawalSolverTolerance of the 'Check' WithdrawalSolver, in dollars: 'Breakpoint' is meant to match
+# 'Stepping' to the cent (WithdrawalSolverCheck.py checks whole projections)
+DefaultWithdrawalSolverTolerance = 0.01
+
+# Compute how far GetRemainingNeededCashWithTaxesAndOrPenalties can go withdrawing from the account just selected
+# (AcctType, PersonCt), TargetingIncrement at a time, without recomputing the delta percentages of every account.
+
+# Marginal tax and penalty rates are piecewise-constant between known breakpoints: tax brackets (standard income and
+# stacked LT cap gains, both offset by the standard deduction), the social security taxation thresholds, and account
+# boundaries (balance, Roth conversion vs earnings, PostTax lot). As long as no breakpoint is reached - including the
+# TargetingIncrement trial withdrawals ComputeDeltaPercent makes from every account - every step of the greedy loop sees
+# the same delta percentages (up to round-off) and so withdraws from the same account, as long as it doesn't win by
+# a tie (see ClearDeltaPercentLead). So the loop can take all those steps without recomputing the delta percentages.
+
+# Returns a multiple of TargetingIncrement to withdraw (still in steps of TargetingIncrement, so each step is rounded
+# exactly as in the stepping loop), or 0 if a breakpoint is too close to jump.
+
+@Instrumented
+def BreakpointJumpStep(AcctType,PersonCt,PostTax,Roth,PreTax457b,PreTax,IVdict,YearCt,TotalSS,TaxableSS,IncTotStd,
+                       IncTotLTcapGains,FilingStatus,TaxRateInfo,RemainingCashNeeded,TargetingIncrement):
+
+    # Capacity of the selected account before its own treatment changes (how much can be withdrawn at the same
+    # tax/penalty treatment), and how much standard income and LT cap gains each dollar withdrawn generates (before any
+    # change in taxable social security)
+    if AcctType == '457b':
+        Capacity = PreTax457b['Bal'][YearCt,PersonCt]
+        StdIncPerDollar = 1.
+        LTCGperDollar = 0.
+    elif AcctType == 'PreTax':
+        Capacity = PreTax['Bal'][YearCt,PersonCt]
+        StdIncPerDollar = 1.
+        LTCGperDollar = 0.
+    elif AcctType == 'PostTax':
+        # The lot WithdrawFromPostTaxDelta will sell first (lowest cap gain percentage)
+        LotInd = FirstPostTaxLotToSell(PostTax,IVdict,YearCt)
+        if LotInd is None:
+            return 0.
+        Capacity = PostTax['Bal'][YearCt,LotInd]
+        StdIncPerDollar = 0.
+        LTCGperDollar = PostTax['CG'][YearCt,LotInd] / PostTax['Bal'][YearCt,LotInd]
+    elif AcctType == 'Roth':
+        # Conversions are withdrawn first (penalty only), then earnings (penalty and standard income) - see
+        # WithdrawFromRothDelta
+        RothBal = Roth['Bal'][YearCt,PersonCt]
+        Capacity = RothBal
+        StdIncPerDollar = 1.
+        for ct in range(len(Roth['ConversionAmount'])):
+            if (Roth['ConversionAmount'][ct] > 0.) and (Roth['ConversionPerson'][ct] == PersonCt):
+                Capacity = min(Roth['ConversionAmount'][ct],RothBal)
+                StdIncPerDollar = 0.
+                break
+        LTCGperDollar = 0.
+
+    # Number of full steps available: keep at least one TargetingIncrement of the account segment (so the last trial
+    # withdrawal doesn't cross into the next segment) and of the remaining cash needed (so the final partial step is
+    # still taken by the stepping loop)
+    MaxJump = min(Capacity - 2.*TargetingIncrement, RemainingCashNeeded - TargetingIncrement)
+
+    # Income breakpoints
+    if StdIncPerDollar > 0. or LTCGperDollar > 0.:
+
+        StandardDeduction, IncomeBracketMins, IncomeBracketLTcapGainsMins = GetTaxBrackets(TaxRateInfo,FilingStatus)
+
+        # Upper bound on how fast each income quantity grows per dollar withdrawn. With social security, each dollar of
+        # other income can also make up to $0.85 of social security income taxable. (WithdrawFromRothDelta does not
+        # recompute taxable social security, but the other accounts' trial withdrawals do, so keep the bound.)
+        if TotalSS > 0.:
+            SSfactor = 1.85
+        else:
+            SSfactor = 1.
+        # provisional income (as used to compute taxable social security) grows with all non-SS income
+        ProvisionalIncomePerDollar = StdIncPerDollar + LTCGperDollar
+        StdIncGrowth = SSfactor*StdIncPerDollar + 0.85*LTCGperDollar*(TotalSS > 0.)
+        TotalIncGrowth = StdIncGrowth + LTCGperDollar
+
+        # Standard income: standard deduction, tax brackets, and LT cap gain brackets (standard income fills those
+        # first)
+        StdIncBreakpoints = StandardDeduction + np.concatenate(([0.],IncomeBracketMins[1:],
+                                                               IncomeBracketLTcapGainsMins[1:]))
+        # Total income: standard deduction (when standard income alone doesn't cover it), LT cap gain brackets
+        TotalIncBreakpoints = StandardDeduction + np.concatenate(([0.],IncomeBracketLTcapGainsMins[1:]))
+
+        MaxJump = min(MaxJump, DistanceToBreakpoint(IncTotStd,StdIncBreakpoints,StdIncGrowth,TargetingIncrement))
+        MaxJump = min(MaxJump, DistanceToBreakpoint(IncTotStd+IncTotLTcapGains,TotalIncBreakpoints,TotalIncGrowth,
+                                                    TargetingIncrement))
+
+        # Social security taxation thresholds, in terms of provisional income (see TaxableSSconsolidated)
+        if TotalSS > 0.:
+            MinOtherIncomeForSStoBeTaxed, DeltaToTopOf50percentTaxableBracket = SSthresholds(FilingStatus)
+            TaxableSSin50percentBracket = min(DeltaToTopOf50percentTaxableBracket/2.,TotalSS*0.5)
+            SSbreakpoints = np.array([MinOtherIncomeForSStoBeTaxed,
+                                      MinOtherIncomeForSStoBeTaxed + DeltaToTopOf50percentTaxableBracket,
+                                      MinOtherIncomeForSStoBeTaxed + TotalSS, # all of half of SS taxable in 50% bracket
+                                      MinOtherIncomeForSStoBeTaxed + DeltaToTopOf50percentTaxableBracket +
+                                      (0.85*TotalSS - TaxableSSin50percentBracket)/0.85]) # 85% of SS taxable
+            ProvisionalIncome = IncTotStd - TaxableSS + IncTotLTcapGains + TotalSS*0.5
+            MaxJump = min(MaxJump, DistanceToBreakpoint(ProvisionalIncome,SSbreakpoints,ProvisionalIncomePerDollar,
+                                                        TargetingIncrement))
+
+    # The loop takes NumSteps steps of TargetingIncrement from the same account. Every trial along the way (up to
+    # TargetingIncrement beyond the last step) stays clear of breakpoints, per the margins above.
+    if MaxJump < TargetingIncrement:
+        return 0.
+    NumSteps = np.floor(MaxJump/TargetingIncrement) + 1.
+
+    return NumSteps*TargetingIncrement
+
+# Withdrawal at which Value (growing at Growth per dollar withdrawn) comes within 2*TargetingIncrement of the next
+# breakpoint above it, i.e. before any trial withdrawal (which increases Value by at most 1.85*TargetingIncrement)
+# could reach it
+def DistanceToBreakpoint(Value,Breakpoints,Growth,TargetingIncrement):
+
+    if Growth <= 0.:
+        return np.inf
+
+    BreakpointsAbove = Breakpoints[Breakpoints > Value]
+    if np.size(BreakpointsAbove) == 0:
+        return np.inf
+
+    return (np.min(BreakpointsAbove) - Value - 2.*TargetingIncrement)/Growth
+
+# Whether the lowest delta percentage (the account SelectDeltaWithdrawalAccount picks) is lower than every other
+# account's by more than two cents per TargetingIncrement, or exactly equal for the same withdrawal. Between
+# breakpoints, each account's delta percentage only drifts by float round-off and the cent rounding of its trial
+# withdrawal (e.g. a PostTax lot's cap gains), so with that lead every step of a jump picks the same account. An exact
+# tie between trials of the same withdrawal (e.g. both people's PreTax, or PreTax and Roth earnings, both penalized)
+# comes from the same computation, so it stays a tie and the tie order keeps picking the same account. Near ties, and
+# ties with a smaller trial (a nearly empty account at the same marginal rate), are left to the stepping loop, since
+# round-off can decide them differently from step to step.
+def ClearDeltaPercentLead(WithdrawalDeltaArray,DeltaPercentArray,TargetingIncrement):
+
+    NonEmpty = ~np.isnan(DeltaPercentArray)
+    Lowest = np.min(DeltaPercentArray[NonEmpty])
+    Tied = NonEmpty & (DeltaPercentArray == Lowest)
+    Others = NonEmpty & ~Tied
+
+    return np.all(WithdrawalDeltaArray[Tied] == TargetingIncrement) and \
+        np.all(DeltaPercentArray[Others] - Lowest > 0.02/TargetingIncrement)
+
+# The lot WithdrawFromPostTaxDelta sells first (from the same lot book): lowest cap gain percentage, skipping empty lots
+# and (first year only) lots purchased that year
+def FirstPostTaxLotToSell(PostTax,IVdict,YearCt):
+
+    CGpercentOrder = LotSaleOrder(GetLotBook(PostTax,IVdict,YearCt))
+
+    if np.size(CGpercentOrder) == 0:
+        return None
+
+    return CGpercentOrder[0]
+
+# Standard deduction and tax bracket mins for the filing status
+def GetTaxBrackets(TaxRateInfo,FilingStatus):
+
+    Schedule = GetTaxSchedule(TaxRateInfo,FilingStatus)
+
+    return Schedule['StandardDeduction'], Schedule['IncomeBracketMins'], Schedule['IncomeBracketLTcapGainsMins']
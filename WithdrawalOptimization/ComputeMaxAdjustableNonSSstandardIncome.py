@@ -6,41 +6,49 @@
 # ComputeMaxAdjustableNonSSstandardIncome.py
 
 import numpy as np
-import copy
-import os
-import matplotlib
-import matplotlib.pyplot as plt
-from scipy import optimize
-from TaxableSSconsolidated import TaxableSSconsolidated
+from TaxableSSconsolidated import TaxableSSconsolidated, SSthresholds
 
 # Compute MaxAdjustableNonSSstandardIncome such that NonadjustableStandardIncome +
 # TaxableSS(NonadjustableStandardIncome+NonadjustableLTcapGainsIncome+MaxAdjustableNonSSstandardIncome,TotalSS,
 # FilingStatus) + MaxAdjustableNonSSstandardIncome = MaxStandardIncome
 
 # Approach:
-# MaxStandardIncome = NonadjustableStandardIncome + TaxableSS(NonadjustableStandardIncome+NonadjustableLTcapGainsIncome+
-# MaxAdjustableNonSSstandardIncome,TotalSS,FilingStatus) + MaxAdjustableNonSSstandardIncome
-# solve for MaxAdjustableNonSSstandardIncome
-# setting equal to 0 to use numerical solver (Newton-Rhapson method):
-# 0 = NonadjustableStandardIncome + TaxableSS(NonadjustableStandardIncome+NonadjustableLTcapGainsIncome+
-# MaxAdjustableNonSSstandardIncome,TotalSS,FilingStatus) + MaxAdjustableNonSSstandardIncome - MaxStandardIncome
-
-def ZeroFn(MaxAdjustableNonSSstandardIncome,NonadjustableStandardIncome,TotalSS,LTcapGains,MaxStandardIncome,
-           FilingStatus):
-
-    TaxableSSincome = TaxableSSconsolidated(NonadjustableStandardIncome+MaxAdjustableNonSSstandardIncome+LTcapGains,
-                                            TotalSS,FilingStatus)
-
-    return NonadjustableStandardIncome + MaxAdjustableNonSSstandardIncome + TaxableSSincome - MaxStandardIncome
+# Standard income, NonadjustableStandardIncome + MaxAdjustableNonSSstandardIncome + TaxableSS(...), is piecewise linear
+# in MaxAdjustableNonSSstandardIncome, with slope 1 plus the slope of TaxableSS (0, 0.5 or 0.85, depending on
+# provisional income - see TaxableSSconsolidated). So it's strictly increasing, and exactly linear between the kinks of
+# TaxableSS. Evaluate it at each kink, find the segment that contains MaxStandardIncome, and interpolate within it -
+# which is exact, with no iteration.
 
 def ComputeMaxAdjustableNonSSstandardIncome(NonadjustableStandardIncome,LTcapGains,TotalSS,MaxStandardIncome,
                                             FilingStatus):
 
-    # initialize
-    MaxAdjustableNonSSstandardIncomeIV = MaxStandardIncome - NonadjustableStandardIncome
-
-    MaxAdjustableNonSSstandardIncome = optimize.newton(ZeroFn, x0=MaxAdjustableNonSSstandardIncomeIV,
-                                                       args=(NonadjustableStandardIncome,TotalSS,LTcapGains,
-                                                             MaxStandardIncome,FilingStatus))
+    MinOtherIncomeForSStoBeTaxed, DeltaToTopOf50percentTaxableBracket = SSthresholds(FilingStatus)
+
+    # Kinks of TaxableSS, in terms of provisional income over the min income for SS to be taxed (TotalSS*0.5 +
+    # NonSSincome - MinOtherIncomeForSStoBeTaxed): SS starts being taxed (0), 50% bracket taxable amount reaches half
+    # of SS (TotalSS, if before the top of the 50% bracket), top of 50% bracket, and taxable SS reaches 85% of SS
+    TaxableSSin50percentBracket = min(DeltaToTopOf50percentTaxableBracket/2.,TotalSS*0.5)
+    IncomeOverMinKinks = np.array([0.,
+                                   min(TotalSS,DeltaToTopOf50percentTaxableBracket),
+                                   DeltaToTopOf50percentTaxableBracket,
+                                   DeltaToTopOf50percentTaxableBracket +
+                                   max(0.85*TotalSS - TaxableSSin50percentBracket,0.)/0.85])
+
+    # Corresponding MaxAdjustableNonSSstandardIncome values, and standard income at each
+    NonSSincomeWithoutAdjustable = NonadjustableStandardIncome + LTcapGains
+    AdjustableKinks = np.unique(IncomeOverMinKinks + MinOtherIncomeForSStoBeTaxed - TotalSS*0.5 -
+                                NonSSincomeWithoutAdjustable)
+    StandardIncomeKinks = np.array([NonadjustableStandardIncome + Adjustable +
+                                    TaxableSSconsolidated(NonSSincomeWithoutAdjustable+Adjustable,TotalSS,FilingStatus)
+                                    for Adjustable in AdjustableKinks])
+
+    # Below the first kink no SS is taxable, and above the last 85% of SS is taxable (slope 1 in both cases)
+    if MaxStandardIncome <= StandardIncomeKinks[0]:
+        MaxAdjustableNonSSstandardIncome = AdjustableKinks[0] - (StandardIncomeKinks[0] - MaxStandardIncome)
+    elif MaxStandardIncome >= StandardIncomeKinks[-1]:
+        MaxAdjustableNonSSstandardIncome = AdjustableKinks[-1] + (MaxStandardIncome - StandardIncomeKinks[-1])
+    else:
+        # Linear between kinks
+        MaxAdjustableNonSSstandardIncome = np.interp(MaxStandardIncome,StandardIncomeKinks,AdjustableKinks)
 
     return MaxAdjustableNonSSstandardIncome
@@ -7,9 +7,11 @@
 
 from ComputeFPLpercent import *
 from ComputeExpectedContribution import *
+from Instrumentation import Instrumented
 
 # Compute ACA subsidy given income, family size, residence, benchmark price
 
+@Instrumented
 def ComputeSubsidy(Income,NumPeople,Residence,BenchmarkPrice):
     
     # Compute Federal Poverty Level (FPL) percentage
@@ -0,0 +1,76 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# DeltaPercentTaxes.py
+
+import numpy as np
+from TaxableSSconsolidated import TaxableSSconsolidated
+from ComputeTaxes import ComputeTaxes
+
+# The tax+penalty delta percentage of each of ComputeDeltaPercent's trial withdrawals (nan for accounts with nothing
+# left to withdraw), given:
+# WithdrawalDeltaArray: the trial withdrawal from each account (PostTax, then Roth, 457b and PreTax of each person)
+# LTCGdelta: LT cap gains of the PostTax withdrawal
+# RothPenalty, RothStdIncDelta: penalty and standard income (from earnings) of each person's Roth withdrawal
+# PreTaxPenalty: penalty of each person's PreTax withdrawal
+# PrevTaxes: taxes before the trial withdrawals (Taxes[YearCt])
+def DeltaPercentTaxes(WithdrawalDeltaArray,LTCGdelta,RothPenalty,RothStdIncDelta,PreTaxPenalty,NumPeople,TotalSS,
+                      TaxableSS,IncTotStd,IncTotLTcapGains,FilingStatus,TaxRateInfo,PrevTaxes):
+
+    DeltaPercentArray = np.zeros(len(WithdrawalDeltaArray))
+
+    # PostTax
+    if WithdrawalDeltaArray[0] > 0.: # if PostTax still has non-zero balance
+        # if SSincome, recompute taxable SSincome for higher income, then update total standard income
+        if TotalSS > 0.:
+            NonSSstandardIncome = IncTotStd - TaxableSS
+            TaxableSSdelta = TaxableSSconsolidated(NonSSstandardIncome + IncTotLTcapGains + LTCGdelta, TotalSS,
+                                                   FilingStatus)
+            IncTotStdDelta = NonSSstandardIncome + TaxableSSdelta
+        else: IncTotStdDelta = IncTotStd
+        # Determine Delta % in taxes
+        NewTaxes = ComputeTaxes(TaxRateInfo,FilingStatus,IncTotStdDelta,IncTotLTcapGains + LTCGdelta)
+        Delta = NewTaxes['Total'] - PrevTaxes
+        DeltaPercentArray[0] = Delta / WithdrawalDeltaArray[0]
+    else:
+        DeltaPercentArray[0] = np.nan
+
+    # Roth - earnings withdrawn increase your standard income (there's no SSincome before Roth withdrawals stop being
+    # penalized, so no recomputing taxable SSincome)
+    for ct in range(NumPeople):
+        if WithdrawalDeltaArray[1+ct] > 0.: # if Roth still has non-zero balance
+            if RothStdIncDelta[ct] > 0.:
+                NewTaxes = ComputeTaxes(TaxRateInfo,FilingStatus,IncTotStd + RothStdIncDelta[ct],IncTotLTcapGains)
+                DeltaTaxes = NewTaxes['Total'] - PrevTaxes
+            else:
+                DeltaTaxes = 0.
+            DeltaPercentArray[1+ct] = (DeltaTaxes+RothPenalty[ct]) / WithdrawalDeltaArray[1+ct]
+        else:
+            DeltaPercentArray[1+ct] = np.nan
+
+    # 457b (no penalty), then PreTax - for each person
+    for StartInd, Penalties in [(1+NumPeople,None),(1+2*NumPeople,PreTaxPenalty)]:
+        for ct in range(NumPeople):
+            if WithdrawalDeltaArray[StartInd+ct] > 0.: # if the account still has non-zero balance
+                # if SSincome, recompute taxable SSincome for higher income, then update total standard income
+                if TotalSS > 0.:
+                    NonSSstandardIncome = IncTotStd - TaxableSS
+                    TaxableSSdelta = TaxableSSconsolidated(NonSSstandardIncome + IncTotLTcapGains +
+                                                           WithdrawalDeltaArray[StartInd+ct], TotalSS, FilingStatus)
+                    IncTotStdDelta = NonSSstandardIncome + TaxableSSdelta
+                else:
+                    IncTotStdDelta = IncTotStd
+                # Determine Delta % in taxes
+                NewTaxes = ComputeTaxes(TaxRateInfo,FilingStatus,IncTotStdDelta+WithdrawalDeltaArray[StartInd+ct],
+                                        IncTotLTcapGains)
+                Delta = NewTaxes['Total'] - PrevTaxes
+                if Penalties is None:
+                    DeltaPercentArray[StartInd+ct] = Delta / WithdrawalDeltaArray[StartInd+ct]
+                else:
+                    DeltaPercentArray[StartInd+ct] = (Delta+Penalties[ct]) / WithdrawalDeltaArray[StartInd+ct]
+            else:
+                DeltaPercentArray[StartInd+ct] = np.nan
+
+    return DeltaPercentArray
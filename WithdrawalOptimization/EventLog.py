@@ -0,0 +1,126 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# EventLog.py
+
+import sys
+import contextlib
+
+# Leveled event log of the projection engine, in place of printing progress / diagnostics to the console. The engine
+# reports events (see EventFormats) with LogEvent, and they go to whichever listeners are attached - none by default,
+# so projections, sweeps and batches are silent unless the caller attaches one:
+#     with EventLogListener('Info'): # print events of level 'Info' and above
+#         ProjArrays = ProjFinalBalance(...)
+#     with CaptureEvents('Debug') as Events: # keep every event in a list, for inspection
+#         ProjArrays = ProjFinalBalance(...)
+# An event is a dict: 'Event' (name), 'Level', plus the event's own fields (e.g. 'YearCt', 'Age'). Events are only
+# formatted into text by the printing listener, so an event no listener takes costs a single comparison.
+
+# Event levels, from most to least verbose:
+# 'Debug': details of each year's withdrawals (WithdrawalsExecuted, RothConversion, StdIncomeSwappedForLTcapGains)
+# 'Info': progress (YearStart)
+# 'Warning': something the user should know about (OutOfMoney, ProvablyOutOfMoney, WithdrawalSolverCheck,
+# MinTotalIncomeAboveMax)
+EventLevels = {'Debug': 10, 'Info': 20, 'Warning': 30}
+
+# Text of each event for the printing listener (events not listed print as their name and fields)
+EventFormats = {'YearStart': 'Year Count = {YearCt}',
+                'OutOfMoney': 'Ran out of money!\nAge = {Age}',
+                'ProvablyOutOfMoney': 'Will run out of money by age {Age} (year count {YearCt})',
+                'WithdrawalsExecuted': 'Year count {YearCt}: cash ${TotalCash:.2f} of ${TotalCashNeeded:.2f} needed, '
+                                       'total income ${TotalIncome:.2f} (standard ${TotalStandardIncome:.2f}, LT cap '
+                                       'gains ${TotalLTcapGainsIncome:.2f}), taxes ${Taxes:.2f}, penalties '
+                                       '${Penalties:.2f}',
+                'RothConversion': 'Year count {YearCt}: Roth conversion of ${Amount:.2f} (person {PersonCt}, age '
+                                  '{Age})',
+                'StdIncomeSwappedForLTcapGains': 'TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc, year count '
+                                                 '{YearCt}: {NumSteps} pass(es), LT cap gains sold '
+                                                 '${LTcapGainsSold:.2f}, standard income removed '
+                                                 '${StdIncomeRemoved:.2f}, cash generated ${CashGenerated:.2f}',
+                'WithdrawalSolverCheck': 'WithdrawalSolver check ({Routine}): {Name} differs by ${Difference:.2f} '
+                                         '(Stepping ${SteppingValue:.2f}, Breakpoint ${BreakpointValue:.2f}) at year '
+                                         'count {YearCt}',
+                'MinTotalIncomeAboveMax': 'MinTotalIncome > MaxTotalIncome: Figure out what to do in this situation '
+                                          '(if ever encountered).'}
+
+# Attached listeners, each {'Level': minimum level number, 'Handler': function called with each event}, and the lowest
+# level any of them takes (inf with no listeners), so LogEvent can return right away
+EventLogState = {'Listeners': [],
+                 'MinLevel': float('inf')}
+
+# Report an event to the listeners that take its level
+def LogEvent(Level,Event,**Fields):
+
+    LevelNumber = EventLevels[Level]
+    if LevelNumber < EventLogState['MinLevel']:
+        return
+
+    Record = {'Event': Event, 'Level': Level}
+    Record.update(Fields)
+    for Listener in EventLogState['Listeners']:
+        if LevelNumber >= Listener['Level']:
+            Listener['Handler'](Record)
+
+# Whether any listener takes events of Level, to skip gathering the fields of many events at once (e.g. one per
+# scenario of a batch) when none of them would be logged
+def EventLevelLogged(Level):
+
+    return EventLevels[Level] >= EventLogState['MinLevel']
+
+# Attach a listener for events of Level and above while in the context: Handler(Event) (default: print each event)
+@contextlib.contextmanager
+def EventLogListener(Level='Info',Handler=None):
+
+    if Level not in EventLevels:
+        print('Event level '+str(Level)+' not recognized (options: '+', '.join(EventLevels)+'). Exiting.')
+        sys.exit()
+
+    Listener = {'Level': EventLevels[Level], 'Handler': PrintEvent if Handler is None else Handler}
+    EventLogState['Listeners'].append(Listener)
+    UpdateMinLevel()
+    try:
+        yield Listener
+    finally:
+        EventLogState['Listeners'].remove(Listener)
+        UpdateMinLevel()
+
+# Keep events of Level and above in a list while in the context. Yields the list.
+@contextlib.contextmanager
+def CaptureEvents(Level='Debug'):
+
+    Events = []
+    with EventLogListener(Level,Events.append):
+        yield Events
+
+# Drop every event while in the context (e.g. from the shadow 'Stepping' run of a WithdrawalSolver 'Check', whose
+# events would duplicate those of the run that's kept)
+@contextlib.contextmanager
+def SilencedEvents():
+
+    Listeners = EventLogState['Listeners']
+    EventLogState['Listeners'] = []
+    UpdateMinLevel()
+    try:
+        yield
+    finally:
+        EventLogState['Listeners'] = Listeners
+        UpdateMinLevel()
+
+def UpdateMinLevel():
+
+    EventLogState['MinLevel'] = min([Listener['Level'] for Listener in EventLogState['Listeners']]+[float('inf')])
+
+# Text of an event
+def FormatEvent(Record):
+
+    Fields = {Key: Record[Key] for Key in Record if Key not in ['Event','Level']}
+    if Record['Event'] in EventFormats:
+        return EventFormats[Record['Event']].format(**Fields)
+
+    return Record['Event']+': '+', '.join(Key+' = '+str(Fields[Key]) for Key in Fields)
+
+def PrintEvent(Record):
+
+    print(FormatEvent(Record))
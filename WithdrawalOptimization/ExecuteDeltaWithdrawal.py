@@ -12,34 +12,32 @@ from ComputeTaxes import *
 from WithdrawFromRothDelta import *
 from WithdrawFrom457bDelta import *
 from WithdrawFromPreTaxDelta import *
+from SelectDeltaWithdrawalAccount import SelectDeltaWithdrawalAccount
+from Instrumentation import Instrumented
 
 # Withdraw from the lowest tax+penalty delta percentage account, even if it doesn't provide full Step
 
+# Account: (AcctType, person) to withdraw from if already selected (by SelectDeltaWithdrawalAccount), e.g. for every
+# step of a breakpoint jump. UpdateTaxes: False to leave Taxes as they are (for all but the last step of a jump, since
+# each step's taxes are recomputed from the year's total income and so only the last step's remain).
+@Instrumented
 def ExecuteDeltaWithdrawal(PostTax,Roth,PreTax457b,PreTax,Taxes,Income,TotalCash,Penalties, NumPeople,Step,
                            IVdict,YearCt,TotalSS,TaxableSS,IncTotStd,IncTotLTcapGains,FilingStatus,TaxRateInfo,
-                           Age,DeltaPercentArray,PreTax457bIndices,PreTaxIndices,PostTaxIndex,RothIndices):
+                           Age,DeltaPercentArray,PreTax457bIndices,PreTaxIndices,PostTaxIndex,RothIndices,Account=None,
+                           UpdateTaxes=True):
 
     # Determine which delta is smallest, go with that account (even if it doesn't provide full Step)
-    # For some reason, np.nanargmin only returns the first
-    DeltaPercentMinIndices = np.where(DeltaPercentArray==np.nanmin(DeltaPercentArray))[0]
-
-    # If multiple accounts have the same tax+penalty percentage, select the account to withdraw from in this order:
-    # 1. PreTax457b (good for reducing RMDs)
-    # 2. PreTax (good for reducing RMDs)
-    # 3. PostTax
-    # 4. Roth (best for estate, and if it can push past 59.5 you won't owe taxes either, so try to tap last)
+    if Account is None:
+        AcctType, AcctToDrawFrom = SelectDeltaWithdrawalAccount(DeltaPercentArray,NumPeople,PreTax457bIndices,
+                                                                PreTaxIndices,PostTaxIndex,RothIndices)
+    else:
+        AcctType, AcctToDrawFrom = Account
 
     ##################################################################################################################
     # 457b
     ##################################################################################################################
 
-    if any(np.isin(DeltaPercentMinIndices,PreTax457bIndices)):
-        # Withdraw from whichever PreTax457b index is lower (corresponding to the first/older person)
-        # Loop over all PreTax457bIndices, starting with lowest
-        for ct in range(NumPeople):
-            if PreTax457bIndices[ct] in DeltaPercentMinIndices:
-                AcctToDrawFrom = ct
-                break
+    if AcctType == '457b':
 
         Withdrawal = WithdrawFrom457bDelta(PreTax457b,Income,TotalCash,Step,YearCt,AcctToDrawFrom,True)
         IncTotStd = Income['TotalStandard'][YearCt] # updating, for use here & next iteration of while loop
@@ -52,20 +50,15 @@ def ExecuteDeltaWithdrawal(PostTax,Roth,PreTax457b,PreTax,Taxes,Income,TotalCash
             Income['TotalStandard'][YearCt] = IncTotStd # updating
             Income['Total'][YearCt] = IncTotStd + IncTotLTcapGains # updating
         # Update Taxes
-        NewTaxes = ComputeTaxes(TaxRateInfo,FilingStatus,IncTotStd,IncTotLTcapGains)
-        Taxes[YearCt] = NewTaxes['Total']
+        if UpdateTaxes:
+            NewTaxes = ComputeTaxes(TaxRateInfo,FilingStatus,IncTotStd,IncTotLTcapGains)
+            Taxes[YearCt] = NewTaxes['Total']
 
     ##################################################################################################################
     # PreTax
     ##################################################################################################################
 
-    elif any(np.isin(DeltaPercentMinIndices,PreTaxIndices)):
-        # Withdraw from whichever PreTax index is lower (corresponding to the first/older person)
-        # Loop over all PreTaxIndices, starting with lowest
-        for ct in range(NumPeople):
-            if PreTaxIndices[ct] in DeltaPercentMinIndices:
-                AcctToDrawFrom = ct
-                break
+    elif AcctType == 'PreTax':
 
         Withdrawal, Penalty = WithdrawFromPreTaxDelta(PreTax,Income,TotalCash,Step,Age,YearCt,AcctToDrawFrom,True)
         Penalties[YearCt] += Penalty
@@ -79,15 +72,15 @@ def ExecuteDeltaWithdrawal(PostTax,Roth,PreTax457b,PreTax,Taxes,Income,TotalCash
             Income['TotalStandard'][YearCt] = IncTotStd # updating
             Income['Total'][YearCt] = IncTotStd + IncTotLTcapGains # updating
         # Update Taxes
-        NewTaxes = ComputeTaxes(TaxRateInfo,FilingStatus,IncTotStd,IncTotLTcapGains)
-        Taxes[YearCt] = NewTaxes['Total']
+        if UpdateTaxes:
+            NewTaxes = ComputeTaxes(TaxRateInfo,FilingStatus,IncTotStd,IncTotLTcapGains)
+            Taxes[YearCt] = NewTaxes['Total']
 
     ##################################################################################################################
     # PostTax
     ##################################################################################################################
 
-    elif PostTaxIndex in DeltaPercentMinIndices:
-        # Then withdraw from PostTax
+    elif AcctType == 'PostTax':
         Withdrawal, LTCGdelta = WithdrawFromPostTaxDelta(PostTax,Step,TotalCash,Income,IVdict,YearCt,True)
         IncTotLTcapGains = Income['TotalLTcapGains'][YearCt] # updating, for use here & next iteration of while loop
         # If SSincome, recompute taxable SSincome for higher income, then update total standard income
@@ -99,20 +92,15 @@ def ExecuteDeltaWithdrawal(PostTax,Roth,PreTax457b,PreTax,Taxes,Income,TotalCash
             Income['TotalStandard'][YearCt] = IncTotStd # updating
             Income['Total'][YearCt] = IncTotStd + IncTotLTcapGains # updating
         # Update Taxes
-        NewTaxes = ComputeTaxes(TaxRateInfo,FilingStatus,IncTotStd,IncTotLTcapGains)
-        Taxes[YearCt] = NewTaxes['Total']
+        if UpdateTaxes:
+            NewTaxes = ComputeTaxes(TaxRateInfo,FilingStatus,IncTotStd,IncTotLTcapGains)
+            Taxes[YearCt] = NewTaxes['Total']
 
     ##################################################################################################################
     # Roth
     ##################################################################################################################
 
-    elif any(np.isin(DeltaPercentMinIndices,RothIndices)): # if any Roth index is in DeltaPercentMinIndices
-        # Withdraw from whichever Roth index is lower (corresponding to the first/older person)
-        # Loop over all RothIndices, starting with lowest
-        for ct in range(NumPeople): #len(RothIndices)
-            if RothIndices[ct] in DeltaPercentMinIndices:
-                AcctToDrawFrom = ct
-                break
+    elif AcctType == 'Roth':
 
         Withdrawal, Penalty, StdIncDeltaFromEarnings = WithdrawFromRothDelta(Roth,Step,TotalCash,YearCt,AcctToDrawFrom,True)
         Penalties[YearCt] += Penalty
@@ -135,11 +123,8 @@ def ExecuteDeltaWithdrawal(PostTax,Roth,PreTax457b,PreTax,Taxes,Income,TotalCash
             Income['Total'][YearCt] = IncTotStd + IncTotLTcapGains # updating
 
             # Update taxes
-            NewTaxes = ComputeTaxes(TaxRateInfo,FilingStatus,IncTotStd,IncTotLTcapGains)
-            Taxes[YearCt] = NewTaxes['Total']
-
-    else:
-        print('Delta percent min indices not corresponding to specific account - investigate.')
-        exit()
+            if UpdateTaxes:
+                NewTaxes = ComputeTaxes(TaxRateInfo,FilingStatus,IncTotStd,IncTotLTcapGains)
+                Taxes[YearCt] = NewTaxes['Total']
 
     return IncTotStd, TaxableSS, IncTotLTcapGains
@@ -0,0 +1,105 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# ExecuteTPMwithdrawals.py
+
+import numpy as np
+
+from ComputeTaxes import ComputeTaxes
+from TaxableSSconsolidated import TaxableSSconsolidated
+from TaxableIncomeTargetMethodWithSSI import TaxableIncomeTargetMethodWithSSI
+from NonAdjustableIncome import NonAdjustableIncome
+from WithdrawFromAllPreTax import WithdrawFromAllPreTax
+from WithdrawFromPostTax import WithdrawFromPostTax
+from GetRemainingNeededCashNoTaxesOrPenalties import GetRemainingNeededCashNoTaxesOrPenalties
+from GetRemainingNeededCashWithTaxesAndOrPenalties import GetRemainingNeededCashWithTaxesAndOrPenalties
+from TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc import *
+from BreakpointJumpStep import DefaultWithdrawalSolverTolerance
+from Instrumentation import Instrumented
+from EventLog import LogEvent
+
+# Generate the income and cash for a single year using the Tax and Penalty Minimization (TPM) withdrawal method, once
+# investment growth has been applied and TotalCashNeeded, Income['MaxTotal'] and Income['MaxStandard'] have been set
+# for the year (Schedules: see YearlySchedules).
+
+@Instrumented
+def ExecuteTPMwithdrawals(PreTax,PreTax457b,PostTax,Roth,RMD,Income,TotalCash,CashCushion,Taxes,Penalties,IVdict,
+                          IncDict,Schedules,TaxRateInfo,FilingStatus,TotalCashNeeded,Age,YearCt):
+
+    # All "non-adjustable" income sources (i.e., we cannot modify the amounts, in the framework of this simulation),
+    # including dividends, "other income", RMDs, and social security
+    NonAdjustableIncome(TotalCash,Income,PreTax,PreTax457b,RMD, PostTax,IncDict,Schedules,Age,YearCt)
+
+    # Below are "adjustable" income/cash sources - i.e. we can modify these income/cash values each year of the
+    # simulation to achieve our goals.
+
+    # Goals:
+    # 1. Achieve exact specified total max income
+    #     a. If not possible, try to have total income not exceed specified total max income
+    # 2. Achieve standard income equal to max standard income (e.g. to maximize standard deduction if max standard
+    # income = standard deduction)
+    #     a. If not possible, try to have standard income not exceed max standard income
+    # 3. Generate enough cash to cover TotalCashNeeded: TotalCash >= TotalCashNeeded
+    # 4. Generate income and cash first from tax and penalty-free sources, then progress up from the lowest tax/
+    # penalty options to the highest (i.e. starting with the standard deduction for standard income and 0% LT cap
+    # gains bracket for LT cap gains, then up from lowest tax/penalty options to highest)
+
+    if Income['TotalSS'][YearCt] > 0.:
+
+        # Run TaxableIncomeTargetMethodWithSSI
+        # Note: any references to "SSI" stand for normal social security income (RIB), not Supplemental Security
+        # Income (a different program that is also provided by the Social Security Administration).
+        TaxableSSdesired, Income['MaxStandard'][YearCt], Income['MaxTotal'][YearCt] = \
+            TaxableIncomeTargetMethodWithSSI(Income['TotalStandard'][YearCt],Income['TotalLTcapGains'][YearCt],
+                                             Income['TotalSS'][YearCt],Income['MaxStandard'][YearCt],
+                                             Income['MaxTotal'][YearCt], FilingStatus) #Income['TaxableSS'][YearCt]
+        Income['TotalStandard'][YearCt] += TaxableSSdesired
+        Income['Total'][YearCt] += TaxableSSdesired
+
+    # Withdraw from PreTax accounts (PreTax and PreTax457b)
+    WithdrawFromAllPreTax(PreTax,PreTax457b,Income,TotalCash,Roth, Age,YearCt)
+
+    # Withdraw from post-tax lots
+    WithdrawFromPostTax(PostTax,TotalCash,Income, TotalCashNeeded,IVdict,YearCt)
+
+    # Compute TaxableSS, based on income from WithdrawFromAllPreTax and WithdrawFromPostTax
+    if Income['TotalSS'][YearCt] > 0.:
+        NonSSstandardIncome = Income['TotalStandard'][YearCt] - TaxableSSdesired
+        Income['TaxableSS'][YearCt] = TaxableSSconsolidated(NonSSstandardIncome + Income['TotalLTcapGains'][YearCt],
+                                                            Income['TotalSS'][YearCt], FilingStatus)
+        if np.abs(Income['TaxableSS'][YearCt] - TaxableSSdesired) >= 0.01:
+            Income['TotalStandard'][YearCt] = NonSSstandardIncome + Income['TaxableSS'][YearCt]
+            Income['Total'][YearCt] = Income['TotalStandard'][YearCt] + Income['TotalLTcapGains'][YearCt]
+
+    # Compute Taxes
+    TaxesDict = ComputeTaxes(TaxRateInfo,FilingStatus,Income['TotalStandard'][YearCt],Income['TotalLTcapGains'][YearCt])
+    Taxes[YearCt] = TaxesDict['Total']
+
+    if TotalCash[YearCt] < TotalCashNeeded:
+        # Get cash with no taxes or penalties to meet TotalCashNeeded, if needed
+        GetRemainingNeededCashNoTaxesOrPenalties(TotalCash,Roth,CashCushion, TotalCashNeeded,Age,YearCt)
+
+    if IncDict['TryIncreasingPostTaxWithdrawalAndMaybeReducingStdIncFlag']:
+        if TotalCash[YearCt] < TotalCashNeeded:
+            # Try reducing standard income & increasing LT cap gains by same amount to get more cash, if possible
+            TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc(TotalCash,PreTax,PreTax457b,PostTax,Roth,Income,
+                                                                 Taxes, Age,TotalCashNeeded,YearCt,TaxRateInfo,
+                                                                 FilingStatus,IVdict,
+                                                                 IncDict.get('WithdrawalSolver','Breakpoint'),
+                                                                 IncDict.get('WithdrawalSolverTolerance',
+                                                                             DefaultWithdrawalSolverTolerance))
+
+    if TotalCash[YearCt] < TotalCashNeeded:
+        # If unable to obtain enough cash without additional taxes or penalties, proceed with sources that WILL
+        # generate additional taxes and/or penalties
+        GetRemainingNeededCashWithTaxesAndOrPenalties(PreTax,PreTax457b,PostTax,Roth,Income,TotalCash,Taxes,
+                                                      Penalties,IVdict,TaxRateInfo,FilingStatus,TotalCashNeeded,Age,
+                                                      YearCt,IncDict.get('WithdrawalSolver','Breakpoint'),
+                                                      IncDict.get('WithdrawalSolverTolerance',
+                                                                  DefaultWithdrawalSolverTolerance))
+
+    LogEvent('Debug','WithdrawalsExecuted',YearCt=YearCt,TotalCash=TotalCash[YearCt],TotalCashNeeded=TotalCashNeeded,
+             TotalIncome=Income['Total'][YearCt],TotalStandardIncome=Income['TotalStandard'][YearCt],
+             TotalLTcapGainsIncome=Income['TotalLTcapGains'][YearCt],Taxes=Taxes[YearCt],Penalties=Penalties[YearCt])
@@ -7,9 +7,11 @@
 
 import numpy as np
 from WithdrawFromRoth import WithdrawFromRoth
+from Instrumentation import Instrumented
 
 # Get cash with no taxes or penalties to meet TotalCashNeeded, if needed
 
+@Instrumented
 def GetRemainingNeededCashNoTaxesOrPenalties(TotalCash,Roth,CashCushion, TotalCashNeeded,Age,YearCt):
 
     # Unpack needed dictionary items - for easier access
@@ -22,7 +24,7 @@ def GetRemainingNeededCashNoTaxesOrPenalties(TotalCash,Roth,CashCushion, TotalCa
         # loop over people
         for ct in range(NumPeople):
             WithdrawFromRoth(Roth,TotalCash, TotalCashNeeded,Age,YearCt,ct)
-        RothTotal = np.sum(RothBal) # RothBal connected to Roth['Bal'][YearCt,:], modified in WithdrawFromRoth
+        RothTotal = RothBal.sum() # RothBal connected to Roth['Bal'][YearCt,:], modified in WithdrawFromRoth
 
     # if TotalCash less than TotalCashNeeded, next need to pull from Cash Cushion
     if TotalCash[YearCt] < TotalCashNeeded:
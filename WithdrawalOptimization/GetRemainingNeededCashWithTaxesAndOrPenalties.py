@@ -10,6 +10,10 @@ import numpy as np
 from ComputeDeltaPercent import *
 from ExecuteDeltaWithdrawal import *
 from SingleNonZeroAcctBalStep import *
+from SelectDeltaWithdrawalAccount import SelectDeltaWithdrawalAccount
+from BreakpointJumpStep import BreakpointJumpStep, ClearDeltaPercentLead, DefaultWithdrawalSolverTolerance
+from Instrumentation import Instrumented, CountEvent
+from EventLog import LogEvent, SilencedEvents
 
 # If unable to obtain enough cash without additional taxes or penalties, proceed with sources that WILL generate
 # additional taxes and/or penalties
@@ -20,8 +24,48 @@ from SingleNonZeroAcctBalStep import *
 # Withdraw from lowest delta percentage account (i.e. lowest tax+penalty percentage)
 # Repeat until less than $100 from TotalCashNeeded, then attempt to withdraw remaining amount for each account
 
+# WithdrawalSolver:
+# 'Breakpoint' (default): whenever no tax/penalty breakpoint is near and the lowest delta percentage account clearly
+# wins (see BreakpointJumpStep), take every $100 step up to the next breakpoint from that account without recomputing
+# the delta percentages. The results are identical to 'Stepping' (WithdrawalSolverCheck.py checks whole projections).
+# 'Stepping': take every $100 step (the original loop)
+# 'Check': run both, and report any year where they differ by more than WithdrawalSolverTolerance dollars (in total
+# cash, income, taxes or penalties), keeping the 'Breakpoint' result. This compares both from the same starting state
+# each year, so WithdrawalSolverCheck.py is what catches differences that build up from year to year.
+
+@Instrumented
 def GetRemainingNeededCashWithTaxesAndOrPenalties(PreTax,PreTax457b,PostTax,Roth,Income,TotalCash,Taxes,Penalties,
-                                                  IVdict,TaxRateInfo,FilingStatus,TotalCashNeeded,Age,YearCt):
+                                                  IVdict,TaxRateInfo,FilingStatus,TotalCashNeeded,Age,YearCt,
+                                                  WithdrawalSolver='Breakpoint',
+                                                  WithdrawalSolverTolerance=DefaultWithdrawalSolverTolerance):
+
+    if WithdrawalSolver == 'Check':
+        # Run the original loop on copies of everything it modifies
+        SteppingState = copy.deepcopy({'PreTax': PreTax, 'PreTax457b': PreTax457b, 'PostTax': PostTax, 'Roth': Roth,
+                                       'Income': Income, 'TotalCash': TotalCash, 'Taxes': Taxes,
+                                       'Penalties': Penalties})
+        with SilencedEvents():
+            GetRemainingNeededCashWithTaxesAndOrPenalties(SteppingState['PreTax'],SteppingState['PreTax457b'],
+                                                          SteppingState['PostTax'],SteppingState['Roth'],
+                                                          SteppingState['Income'],SteppingState['TotalCash'],
+                                                          SteppingState['Taxes'],SteppingState['Penalties'],IVdict,
+                                                          TaxRateInfo,FilingStatus,TotalCashNeeded,Age,YearCt,
+                                                          'Stepping')
+        GetRemainingNeededCashWithTaxesAndOrPenalties(PreTax,PreTax457b,PostTax,Roth,Income,TotalCash,Taxes,Penalties,
+                                                      IVdict,TaxRateInfo,FilingStatus,TotalCashNeeded,Age,YearCt,
+                                                      'Breakpoint')
+        for Name, SteppingValue, BreakpointValue in \
+                [('TotalCash',SteppingState['TotalCash'][YearCt],TotalCash[YearCt]),
+                 ('TotalIncome',SteppingState['Income']['Total'][YearCt],Income['Total'][YearCt]),
+                 ('TotalStandardIncome',SteppingState['Income']['TotalStandard'][YearCt],
+                  Income['TotalStandard'][YearCt]),
+                 ('Taxes',SteppingState['Taxes'][YearCt],Taxes[YearCt]),
+                 ('Penalties',SteppingState['Penalties'][YearCt],Penalties[YearCt])]:
+            if np.abs(SteppingValue - BreakpointValue) > WithdrawalSolverTolerance:
+                LogEvent('Warning','WithdrawalSolverCheck',Routine='GetRemainingNeededCashWithTaxesAndOrPenalties',
+                         Name=Name,Difference=BreakpointValue-SteppingValue,SteppingValue=SteppingValue,
+                         BreakpointValue=BreakpointValue,YearCt=YearCt)
+        return
 
     # Unpack needed dictionary items - for easier access
     TotalSS = Income['TotalSS'][YearCt]
@@ -51,6 +95,8 @@ def GetRemainingNeededCashWithTaxesAndOrPenalties(PreTax,PreTax457b,PostTax,Roth
 
     while TotalCashNeeded - TotalCash[YearCt] >= 0.01:
 
+        CountEvent('DeltaLoopIterations')
+
         # Recompute for each step through the loop
         RemainingCashNeeded = TotalCashNeeded - TotalCash[YearCt]
 
@@ -67,24 +113,43 @@ def GetRemainingNeededCashWithTaxesAndOrPenalties(PreTax,PreTax457b,PostTax,Roth
                                                                       TaxRateInfo,Taxes,Age)
 
         # exit while loop if out of money - if entire WithdrawalDeltaArray is zero
-        if np.sum(WithdrawalDeltaArray) == 0.:
+        if WithdrawalDeltaArray.sum() == 0.:
             break
 
         # Determine if down to a single non-zero balance account, set step accordingly
-        if np.size(np.nonzero(WithdrawalDeltaArray)) == 1:
+        if np.count_nonzero(WithdrawalDeltaArray) == 1:
             Step = SingleNonZeroAcctBalStep(WithdrawalDeltaArray,PostTax,Roth,PreTax457b,PreTax,YearCt,
                                             RemainingCashNeeded,NumPeople)
 
-        # Withdraw from the lowest tax+penalty delta percentage account, even if it doesn't provide full Step
-        IncTotStd, TaxableSS, IncTotLTcapGains = \
-            ExecuteDeltaWithdrawal(PostTax,Roth,PreTax457b,PreTax,Taxes,Income,TotalCash,Penalties, NumPeople,Step,
-                                   IVdict,YearCt,TotalSS,TaxableSS,IncTotStd,IncTotLTcapGains,FilingStatus,TaxRateInfo,
-                                   Age,DeltaPercentArray,PreTax457bIndices,PreTaxIndices,PostTaxIndex,RothIndices)
+        # Otherwise, if the next breakpoint is more than a step away, every step until then withdraws from the same
+        # account, so they can all be taken without recomputing the delta percentages
+        Account = None
+        NumSteps = 1
+        if np.count_nonzero(WithdrawalDeltaArray) > 1 and WithdrawalSolver == 'Breakpoint' and \
+                Step == TargetingIncrement and ClearDeltaPercentLead(WithdrawalDeltaArray,DeltaPercentArray,
+                                                                            TargetingIncrement):
+            Account = SelectDeltaWithdrawalAccount(DeltaPercentArray,NumPeople,PreTax457bIndices,PreTaxIndices,
+                                                   PostTaxIndex,RothIndices)
+            JumpStep = BreakpointJumpStep(Account[0],Account[1],PostTax,Roth,PreTax457b,PreTax,IVdict,YearCt,TotalSS,
+                                          TaxableSS,IncTotStd,IncTotLTcapGains,FilingStatus,TaxRateInfo,
+                                          RemainingCashNeeded,TargetingIncrement)
+            NumSteps = max(int(round(JumpStep/TargetingIncrement)),1)
+
+        # Withdraw from the lowest tax+penalty delta percentage account, even if it doesn't provide full Step. The
+        # steps of a jump are still withdrawn one at a time, so each rounds to the cent exactly as the stepping loop
+        # does (e.g. a PostTax lot's cap gains), and the results are identical to 'Stepping'. Only the last step's
+        # taxes are computed, since each step's would replace the previous one's.
+        for StepCt in range(NumSteps):
+            IncTotStd, TaxableSS, IncTotLTcapGains = \
+                ExecuteDeltaWithdrawal(PostTax,Roth,PreTax457b,PreTax,Taxes,Income,TotalCash,Penalties, NumPeople,Step,
+                                       IVdict,YearCt,TotalSS,TaxableSS,IncTotStd,IncTotLTcapGains,FilingStatus,
+                                       TaxRateInfo,Age,DeltaPercentArray,PreTax457bIndices,PreTaxIndices,
+                                       PostTaxIndex,RothIndices,Account,StepCt == NumSteps-1)
 
 
     # Update "Total" values for PreTax and PreTax457b
-    PreTax['Total'][YearCt] = np.sum(PreTax['Bal'][YearCt,:])
-    PreTax457b['Total'][YearCt] = np.sum(PreTax457b['Bal'][YearCt,:])
+    PreTax['Total'][YearCt] = PreTax['Bal'][YearCt,:].sum()
+    PreTax457b['Total'][YearCt] = PreTax457b['Bal'][YearCt,:].sum()
     # Not needed for PostTax, since that Total value is computed at the end of ProjFinalBalance (after purchasing
     # any new PostTax lots with excess cash).
 
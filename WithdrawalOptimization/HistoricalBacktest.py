@@ -0,0 +1,156 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# HistoricalBacktest.py
+
+import numpy as np
+import sys
+import os
+
+from MonteCarloProjection import ProjectReturnPathsParallel
+
+# Columns of a historical returns file, one row per calendar year (consecutive): the year, the nominal total returns
+# (dividends / interest reinvested) of stocks and bonds over that year, and inflation over that year, all as fractions
+# (e.g. 0.07 for 7%)
+HistoricalReturnsColumns = ['Year','StockReturn','BondReturn','Inflation']
+
+# Load historical returns from FileName: a .npz file with an array for each of HistoricalReturnsColumns, or a .csv file
+# with a header line naming HistoricalReturnsColumns (any order, other columns ignored, lines starting with # are
+# comments). The file is read locally - nothing is downloaded. Returns a dict of float arrays, one per column.
+def LoadHistoricalReturns(FileName):
+
+    if not os.path.isfile(FileName):
+        print('Historical returns file '+FileName+' not found (columns: '+', '.join(HistoricalReturnsColumns)+
+              '). Exiting.')
+        sys.exit()
+
+    if FileName.endswith('.npz'):
+        with np.load(FileName) as Data:
+            ColumnNames = Data.files
+            HistoricalReturns = {Column: np.array(Data[Column],dtype=float) for Column in HistoricalReturnsColumns
+                                 if Column in ColumnNames}
+    else:
+        # (comment lines removed first, since genfromtxt takes the first line, even a comment, as the header)
+        with open(FileName) as File:
+            Lines = [Line for Line in File if Line.strip() != '' and not Line.lstrip().startswith('#')]
+        Data = np.genfromtxt(Lines,delimiter=',',names=True)
+        ColumnNames = Data.dtype.names
+        HistoricalReturns = {Column: np.atleast_1d(np.array(Data[Column],dtype=float))
+                             for Column in HistoricalReturnsColumns if Column in ColumnNames}
+
+    MissingColumns = [Column for Column in HistoricalReturnsColumns if Column not in HistoricalReturns]
+    if len(MissingColumns) > 0:
+        print('Historical returns file '+FileName+' is missing columns '+', '.join(MissingColumns)+'. Exiting.')
+        sys.exit()
+    if np.any(np.isnan(np.array([HistoricalReturns[Column] for Column in HistoricalReturnsColumns]))) or \
+            np.any(np.diff(HistoricalReturns['Year']) != 1.):
+        print('Historical returns file '+FileName+' must have a value in every column, for consecutive years. Exiting.')
+        sys.exit()
+
+    return HistoricalReturns
+
+# Real (inflation-adjusted) annual returns of a portfolio of StockAllocation stocks and the rest bonds, rebalanced every
+# year, for each rolling start year cohort: a cohort starting in year Y gets the returns of years Y to
+# Y+NumYearsToProject-1, as its R (R[ct] is the return earned over year ct). Since the projections are in current year
+# dollars, the returns are real. Every start year from FirstStartYear to LastStartYear (default: the first and last with
+# NumYearsToProject years of data) is a cohort.
+# Returns the StartYears (cohorts) and ReturnPaths (cohorts x NumYearsToProject).
+def HistoricalReturnPaths(HistoricalReturns,NumYearsToProject,StockAllocation=1.,FirstStartYear=None,
+                          LastStartYear=None):
+
+    Years = HistoricalReturns['Year']
+    RealReturns = (1. + StockAllocation*HistoricalReturns['StockReturn'] +
+                   (1. - StockAllocation)*HistoricalReturns['BondReturn']) / (1. + HistoricalReturns['Inflation']) - 1.
+
+    # Start years with NumYearsToProject years of data, within the requested range
+    StartInd = np.arange(len(Years) - NumYearsToProject + 1)
+    if FirstStartYear is not None:
+        StartInd = StartInd[Years[StartInd] >= FirstStartYear]
+    if LastStartYear is not None:
+        StartInd = StartInd[Years[StartInd] <= LastStartYear]
+    if len(StartInd) == 0:
+        print('No start year with '+str(NumYearsToProject)+' years of historical returns (data covers '+
+              '{:.0f}'.format(Years[0])+'-'+'{:.0f}'.format(Years[-1])+'). Exiting.')
+        sys.exit()
+
+    StartYears = Years[StartInd]
+    ReturnPaths = np.array([RealReturns[Ind:Ind+NumYearsToProject] for Ind in StartInd])
+
+    return StartYears, ReturnPaths
+
+# Historical backtest: project the TPM and/or Traditional withdrawal method with the historical returns of every rolling
+# start year cohort (see HistoricalReturnPaths), each cohort being a return path projected as in MonteCarloProjection -
+# with NumWorkers > 1, in parallel processes. Returns a dict with the cohorts' 'StartYears' and 'ReturnPaths', plus for
+# each method (see SummarizeBacktest):
+# 'SuccessRate': fraction of cohorts that never run out of money
+# 'TotalAssets': TotalAssets of each cohort (cohorts x years)
+# 'FinalAssets', 'OutOfMoneyAge': of each cohort (OutOfMoneyAge nan if the money lasts)
+# 'WorstStartYears', 'WorstOutOfMoneyAge', 'WorstFinalAssets': the NumWorstCohorts worst cohorts
+def HistoricalBacktest(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject,FilingStatus,
+                       TPMwithdraw457bFirst,HistoricalReturns,StockAllocation=1.,TPMorTraditionalWithdrawal='Both',
+                       NumWorkers=1,NumWorstCohorts=5,FirstStartYear=None,LastStartYear=None):
+
+    if TPMorTraditionalWithdrawal == 'Both':
+        MethodList = ['TPM','Traditional']
+    elif TPMorTraditionalWithdrawal in ['TPM','Traditional']:
+        MethodList = [TPMorTraditionalWithdrawal]
+    else:
+        print('Withdrawal method not recognized. Exiting.')
+        sys.exit()
+
+    StartYears, ReturnPaths = HistoricalReturnPaths(HistoricalReturns,NumYearsToProject,StockAllocation,
+                                                    FirstStartYear,LastStartYear)
+
+    BacktestDict = {'StartYears': StartYears,
+                    'ReturnPaths': ReturnPaths}
+    for Method in MethodList:
+        TotalAssets, OutOfMoneyAge = ProjectReturnPathsParallel(Method,TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,
+                                                                RMDstartAge,NumYearsToProject,ReturnPaths,
+                                                                FilingStatus,TPMwithdraw457bFirst,NumWorkers)
+        BacktestDict[Method] = SummarizeBacktest(StartYears,TotalAssets,OutOfMoneyAge,NumWorstCohorts)
+
+    return BacktestDict
+
+# Summarize the TotalAssets (cohorts x years) and OutOfMoneyAge (cohorts) of a backtest. The worst cohorts are those
+# that run out of money earliest, then (among those that don't) those with the lowest final TotalAssets.
+def SummarizeBacktest(StartYears,TotalAssets,OutOfMoneyAge,NumWorstCohorts):
+
+    Success = np.isnan(OutOfMoneyAge)
+    FinalAssets = TotalAssets[:,-1]
+
+    WorstInd = np.lexsort((FinalAssets,np.where(Success,np.inf,OutOfMoneyAge)))[:NumWorstCohorts]
+
+    SummaryDict = {'SuccessRate': np.mean(Success),
+                   'StartYears': StartYears,
+                   'TotalAssets': TotalAssets,
+                   'FinalAssets': FinalAssets,
+                   'OutOfMoneyAge': OutOfMoneyAge,
+                   'WorstStartYears': StartYears[WorstInd],
+                   'WorstOutOfMoneyAge': OutOfMoneyAge[WorstInd],
+                   'WorstFinalAssets': FinalAssets[WorstInd]}
+
+    return SummaryDict
+
+# Text report of a HistoricalBacktest result: for each method, the success rate and the worst cohorts
+def BacktestReport(BacktestDict):
+
+    StartYears = BacktestDict['StartYears']
+    Lines = ['Historical backtest: '+str(len(StartYears))+' cohorts, starting '+'{:.0f}'.format(StartYears[0])+'-'+
+             '{:.0f}'.format(StartYears[-1])]
+    for Method in ['TPM','Traditional']:
+        if Method not in BacktestDict:
+            continue
+        Summary = BacktestDict[Method]
+        Lines += ['', Method+' Success Rate: '+'{:.1f}'.format(Summary['SuccessRate']*100.)+'% ('+
+                  str(int(np.sum(np.isnan(Summary['OutOfMoneyAge']))))+' of '+str(len(StartYears))+' cohorts)',
+                  Method+' Worst Cohorts:', 'Start Year'.rjust(10)+'Out of Money Age'.rjust(18)+
+                  'Final Total Assets'.rjust(20)]
+        for ct in range(len(Summary['WorstStartYears'])):
+            OutOfMoneyAge = Summary['WorstOutOfMoneyAge'][ct]
+            Lines.append('{:.0f}'.format(Summary['WorstStartYears'][ct]).rjust(10)+
+                         ('-' if np.isnan(OutOfMoneyAge) else '{:.0f}'.format(OutOfMoneyAge)).rjust(18)+
+                         ('$'+'{:.2f}'.format(Summary['WorstFinalAssets'][ct])).rjust(20))
+
+    return '\n'.join(Lines)
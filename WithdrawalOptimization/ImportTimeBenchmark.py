@@ -0,0 +1,75 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# ImportTimeBenchmark.py
+
+import numpy as np
+import sys
+import os
+import glob
+import subprocess
+
+# Benchmark cold import of the calculation core (ProjFinalBalance, ComputeTaxes, the WithdrawFrom* methods,
+# NonAdjustableIncome, and the social security and ACA helpers), each time in a fresh interpreter. Fails (nonzero exit
+# status) if the core imports any of the heavy plotting / analysis / process pool packages, or if importing it takes
+# more than MaxCoreImportRatio times as long as importing numpy itself. The limit is relative to numpy, measured in the
+# same interpreter, so it holds whether or not the machine is busy with something else. The analysis tools
+# (MonteCarloProjection, OptimizeIncomeTargets, etc., which use process pools) aren't part of the core. Run as a script:
+# python ImportTimeBenchmark.py
+
+# Inputs
+NumRuns = 5
+MaxCoreImportRatio = 0.5 # core import time (beyond numpy's) / numpy import time (about 0.1 today)
+CoreModules = ['ProjFinalBalance','ComputeTaxes','NonAdjustableIncome','TaxableSSconsolidated',
+               'TaxableIncomeTargetMethodWithSSI','ComputeMaxAdjustableNonSSstandardIncome','ComputeSubsidy',
+               'ComputeFPLpercent','ComputeExpectedContribution']
+HeavyPackages = ['matplotlib', 'scipy', 'pandas', 'multiprocessing', 'concurrent']
+
+def ImportTimeBenchmark(NumRuns,MaxCoreImportRatio,CoreModules,HeavyPackages):
+
+    CoreDir = os.path.dirname(os.path.abspath(__file__))
+    CoreModules = CoreModules + sorted(os.path.splitext(os.path.basename(File))[0] for File in
+                                       glob.glob(os.path.join(CoreDir,'WithdrawFrom*.py')))
+
+    # Code run in each fresh interpreter: time importing numpy, then the core, and list any heavy packages loaded
+    ChildCode = ('import sys, time\n'
+                 't0 = time.perf_counter()\n'
+                 'import numpy\n'
+                 't1 = time.perf_counter()\n'
+                 'for Module in '+repr(CoreModules)+': __import__(Module)\n'
+                 't2 = time.perf_counter()\n'
+                 'print(t1-t0, t2-t1, *sorted({Name.split(".")[0] for Name in sys.modules} & '+
+                 repr(set(HeavyPackages))+'))\n')
+
+    NumpyImportTime = np.zeros(NumRuns)
+    CoreImportTime = np.zeros(NumRuns)
+    for ct in range(NumRuns):
+        Output = subprocess.run([sys.executable,'-c',ChildCode],cwd=CoreDir,capture_output=True,text=True,check=True)
+        Fields = Output.stdout.split()
+        NumpyImportTime[ct] = float(Fields[0])
+        CoreImportTime[ct] = float(Fields[1])
+        HeavyPackagesImported = Fields[2:]
+
+    # best of the runs, to reduce noise from whatever else the machine is doing (each run's ratio compares two imports
+    # made under the same load)
+    CoreImportRatio = CoreImportTime / NumpyImportTime
+    print('Import time: numpy '+'{:.3f}'.format(np.min(NumpyImportTime))+' s, core ('+str(len(CoreModules))+
+          ' modules) '+'{:.3f}'.format(np.min(CoreImportTime))+' s beyond numpy, '+
+          '{:.2f}'.format(np.min(CoreImportRatio))+'x numpy (limit '+str(MaxCoreImportRatio)+'x)')
+
+    Passed = True
+    if len(HeavyPackagesImported) > 0:
+        print('FAIL: core imports '+', '.join(HeavyPackagesImported)+' - import these lazily, where they are used')
+        Passed = False
+    if np.min(CoreImportRatio) > MaxCoreImportRatio:
+        print('FAIL: core import time regressed')
+        Passed = False
+
+    return Passed
+
+if __name__ == '__main__':
+    if not ImportTimeBenchmark(NumRuns,MaxCoreImportRatio,CoreModules,HeavyPackages):
+        sys.exit(1)
+    print('PASS')
@@ -0,0 +1,134 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# Instrumentation.py
+
+import time
+import json
+import contextlib
+import functools
+
+# Opt-in instrumentation of the projection engine: number of calls and cumulative time of the main engine functions
+# (ComputeTaxes, TaxableSSconsolidated, ComputeSubsidy, NonAdjustableIncome, WithdrawFromAllPreTax, etc.), plus event
+# counters (e.g. iterations of the GetRemainingNeededCashWithTaxesAndOrPenalties delta loop), in total and per year of
+# the projection. Usage:
+#     with InstrumentationContext() as Stats:
+#         ProjArrays = ProjFinalBalance(...)
+#     print(InstrumentationReport(Stats))
+#     SaveInstrumentation(Stats,'Instrumentation.json')
+# Only calls made in this process are recorded (not those of parallel workers, e.g. MonteCarloProjection with
+# NumWorkers > 1), and none for projections loaded from the projection cache.
+
+# Stats are a dict:
+# 'TotalTime': wall time of the whole context (seconds), recorded even when instrumentation is disabled
+# 'Functions': {Name: {'Calls': number of calls / events, 'Time': cumulative time (seconds)}}, over all years
+# 'Years': {YearCt: {Name: {'Calls', 'Time'}}}, per year of the projection (YearCt = None for calls outside the loop
+# over years)
+# Times are inclusive: the time of a function includes the time of the instrumented functions it calls (e.g.
+# ExecuteTPMwithdrawals includes WithdrawFromPostTax), so they don't add up to TotalTime.
+
+# Current instrumentation state. When disabled, an instrumented function only costs one dict lookup on top of the call.
+InstrumentationState = {'Enabled': False,
+                        'YearCt': None,
+                        'Stats': None}
+
+# Instrument a function: count its calls and add up its run time, while instrumentation is enabled
+def Instrumented(Fn):
+
+    Name = Fn.__name__
+
+    @functools.wraps(Fn)
+    def InstrumentedFn(*Args,**Kwargs):
+
+        if not InstrumentationState['Enabled']:
+            return Fn(*Args,**Kwargs)
+
+        t0 = time.perf_counter()
+        try:
+            return Fn(*Args,**Kwargs)
+        finally:
+            RecordCall(Name,time.perf_counter()-t0)
+
+    return InstrumentedFn
+
+# Count an event (e.g. an iteration of a loop) that isn't a function call of its own
+def CountEvent(Name,NumEvents=1):
+
+    if InstrumentationState['Enabled']:
+        RecordCall(Name,0.,NumEvents)
+
+# Year the following calls belong to, set by the projections at the start of each year
+def SetInstrumentationYear(YearCt):
+
+    InstrumentationState['YearCt'] = YearCt
+
+# Add calls and time to the totals of Name, overall and for the current year
+def RecordCall(Name,CallTime,NumCalls=1):
+
+    Stats = InstrumentationState['Stats']
+    Years = Stats['Years']
+    YearCt = InstrumentationState['YearCt']
+    if YearCt not in Years:
+        Years[YearCt] = {}
+
+    for Totals in (Stats['Functions'],Years[YearCt]):
+        if Name not in Totals:
+            Totals[Name] = {'Calls': 0, 'Time': 0.}
+        Totals[Name]['Calls'] += NumCalls
+        Totals[Name]['Time'] += CallTime
+
+# Collect stats of everything run in the context (if Enabled), and the total time it took. Yields the stats dict, which
+# is complete once the context exits.
+@contextlib.contextmanager
+def InstrumentationContext(Enabled=True):
+
+    Stats = {'TotalTime': 0., 'Functions': {}, 'Years': {}}
+    PreviousState = dict(InstrumentationState)
+    InstrumentationState.update({'Enabled': Enabled, 'YearCt': None, 'Stats': Stats})
+
+    t0 = time.perf_counter()
+    try:
+        yield Stats
+    finally:
+        Stats['TotalTime'] = time.perf_counter() - t0
+        InstrumentationState.update(PreviousState)
+
+# Report table of the stats: calls and time of each function / event over the whole context (slowest first), then the
+# number of calls of each per year
+def InstrumentationReport(Stats):
+
+    Names = sorted(Stats['Functions'],key=lambda Name: -Stats['Functions'][Name]['Time'])
+    NameWidth = max([len(Name) for Name in Names]+[len('Function')])
+
+    Lines = ['Total Time: '+'{:.3f}'.format(Stats['TotalTime'])+' seconds', '',
+             'Function'.ljust(NameWidth)+'       Calls    Time (s)  Time/Call (ms)  % of Total']
+    for Name in Names:
+        Calls = Stats['Functions'][Name]['Calls']
+        Time = Stats['Functions'][Name]['Time']
+        TimePercentage = 100.*Time/Stats['TotalTime'] if Stats['TotalTime'] > 0. else 0.
+        Lines.append(Name.ljust(NameWidth)+'{:12d}'.format(Calls)+'{:12.4f}'.format(Time)+
+                     '{:16.4f}'.format(1000.*Time/max(Calls,1))+'{:12.1f}'.format(TimePercentage))
+
+    # Calls per year, one column per function / event (in the same order)
+    if len(Names) > 0:
+        ColumnWidths = [max(len(Name),6)+2 for Name in Names]
+        Lines += ['', 'Calls per year:', 'Year'.rjust(6)+''.join(Name.rjust(Width) for Name, Width in
+                                                                  zip(Names,ColumnWidths))]
+        YearCts = sorted(Stats['Years'],key=lambda YearCt: -1 if YearCt is None else YearCt)
+        for YearCt in YearCts:
+            YearTotals = Stats['Years'][YearCt]
+            Lines.append(('-' if YearCt is None else str(YearCt)).rjust(6)+
+                         ''.join(str(YearTotals[Name]['Calls'] if Name in YearTotals else 0).rjust(Width)
+                                 for Name, Width in zip(Names,ColumnWidths)))
+
+    return '\n'.join(Lines)
+
+# Save the stats to a JSON file (years as string keys, 'None' for calls outside the loop over years)
+def SaveInstrumentation(Stats,FileName):
+
+    with open(FileName,'w') as File:
+        json.dump({'TotalTime': Stats['TotalTime'],
+                   'Functions': Stats['Functions'],
+                   'Years': {str(YearCt): Stats['Years'][YearCt] for YearCt in Stats['Years']}},File,indent=1)
@@ -0,0 +1,105 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# LotBook.py
+
+import numpy as np
+
+# Order in which PostTax lots are sold, shared by every PostTax withdrawal routine: lots sorted by the percentage of the
+# lot that is cap gains (ties broken by lot index, oldest lot first), with empty lots left out.
+
+# A lot book is a dict:
+# 'YearCt', 'NumLots': the year and number of lots it was built for
+# 'CapGainPercentage': CG / Bal of each lot (nan for empty lots)
+# 'Order': indices of the non-empty lots, from lowest to highest CapGainPercentage
+# 'PurchasedFirstYear': lots that can't be sold without generating short term cap gains (lots purchased the first year
+# of the analysis, so only set for YearCt = 0)
+
+# The book is built once per year (see GetLotBook), and after each sale UpdateLotBook moves just the lot sold to its new
+# position, instead of recomputing every lot's cap gain percentage and re-sorting.
+
+def BuildLotBook(PostTaxBal,PostTaxCG,LotPurchasedFirstYear,YearCt):
+
+    NumLots = len(PostTaxBal)
+
+    CapGainPercentage = np.full(NumLots,np.nan)
+    NonEmpty = PostTaxBal > 0.
+    CapGainPercentage[NonEmpty] = PostTaxCG[NonEmpty] / PostTaxBal[NonEmpty]
+
+    # stable sort of the non-empty lots (in index order), so ties stay in index order
+    Order = np.flatnonzero(NonEmpty)
+    Order = Order[np.argsort(CapGainPercentage[Order],kind='stable')]
+
+    PurchasedFirstYear = np.zeros(NumLots,dtype=bool)
+    if YearCt == 0:
+        PurchasedFirstYear[:len(LotPurchasedFirstYear)] = LotPurchasedFirstYear
+
+    LotBook = {'YearCt': YearCt,
+               'NumLots': NumLots,
+               'CapGainPercentage': CapGainPercentage,
+               'Order': Order,
+               'PurchasedFirstYear': PurchasedFirstYear}
+
+    return LotBook
+
+# Lot book of the TPM engine's PostTax dict for this year, kept in PostTax['LotBook']: rebuilt at the first use each
+# year (after investment growth has changed every lot) and whenever lots have been added since (AddPostTaxLot)
+def GetLotBook(PostTax,IVdict,YearCt):
+
+    LotBook = PostTax.get('LotBook')
+    if LotBook is None or LotBook['YearCt'] != YearCt or LotBook['NumLots'] != PostTax['NumLots']:
+        LotBook = BuildLotBook(PostTax['Bal'][YearCt,:PostTax['NumLots']],PostTax['CG'][YearCt,:PostTax['NumLots']],
+                               IVdict['LotPurchasedFirstYear'],YearCt)
+        PostTax['LotBook'] = LotBook
+
+    return LotBook
+
+# Lots in the order to sell them: lowest to highest cap gain percentage (or highest to lowest, if Descending), leaving
+# out lots purchased the first year if ExcludePurchasedFirstYear
+def LotSaleOrder(LotBook,Descending=False,ExcludePurchasedFirstYear=True):
+
+    Order = LotBook['Order']
+    if ExcludePurchasedFirstYear and LotBook['YearCt'] == 0:
+        Order = Order[~LotBook['PurchasedFirstYear'][Order]]
+    if Descending:
+        Order = Order[::-1]
+
+    return Order
+
+# After (partially or entirely) selling lot LotInd, recompute its cap gain percentage and move it to its new position in
+# the order (or remove it, if now empty)
+def UpdateLotBook(LotBook,PostTaxBal,PostTaxCG,LotInd):
+
+    CapGainPercentage = LotBook['CapGainPercentage']
+    Order = LotBook['Order']
+
+    # A partial sale usually leaves the lot where it was (its percentage only moves by the rounding of the sale to the
+    # cent), in which case there's nothing to move
+    if PostTaxBal[LotInd] > 0.:
+        NewPercentage = PostTaxCG[LotInd] / PostTaxBal[LotInd]
+        Position = np.flatnonzero(Order == LotInd)
+        if len(Position) == 1:
+            Position = Position[0]
+            # sort keys: percentage, then lot index for ties
+            LotKey = (NewPercentage,LotInd)
+            if (Position == 0 or (CapGainPercentage[Order[Position-1]],Order[Position-1]) < LotKey) and \
+               (Position == len(Order)-1 or LotKey < (CapGainPercentage[Order[Position+1]],Order[Position+1])):
+                CapGainPercentage[LotInd] = NewPercentage
+                return
+
+    Order = Order[Order != LotInd]
+
+    if PostTaxBal[LotInd] > 0.:
+        CapGainPercentage[LotInd] = NewPercentage
+        # after every lot with a lower percentage, and every lot with the same percentage but lower index
+        OrderPercentage = CapGainPercentage[Order]
+        FirstTie = np.searchsorted(OrderPercentage,CapGainPercentage[LotInd],side='left')
+        LastTie = np.searchsorted(OrderPercentage,CapGainPercentage[LotInd],side='right')
+        Position = FirstTie + np.searchsorted(Order[FirstTie:LastTie],LotInd)
+        Order = np.insert(Order,Position,LotInd)
+    else:
+        CapGainPercentage[LotInd] = np.nan
+
+    LotBook['Order'] = Order
@@ -0,0 +1,89 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# MaxSustainableExpense.py
+
+import numpy as np
+import sys
+import copy
+
+from ProjFinalBalance import ProjFinalBalance
+from ProjFinalBalanceTraditional import ProjFinalBalanceTraditional
+
+# Highest annual expenses (ExpDict['Exp'], with ExpRate and FutureExpenseAdjustments kept as they are) that don't run
+# out of money within NumYearsToProject, with the TPM ('TPM') or traditional ('Traditional') withdrawal method, to
+# within Tolerance dollars. R is either a single value or one value per year (e.g. a historical sequence of returns).
+# Since higher expenses never make the money last longer, this bisects between expenses that are sustainable and
+# expenses that aren't, instead of projecting every expense in a range: from a $50k range down to $1, ~16 projections
+# instead of one per $1000 step. Each projection stops as soon as it will provably run out of money (see
+# OutOfMoneyBound.py), so the unsustainable ones are also cheaper.
+# The search starts from the range [MinExpense, MaxExpense]. If MaxExpense is None, it starts at ExpDict['Exp'] (or
+# $10k, if higher) and doubles until unsustainable.
+# Returns a dict:
+# 'MaxSustainableExpense': highest sustainable expenses found (nan if even MinExpense isn't sustainable, MaxExpense if
+# MaxExpense is sustainable)
+# 'MinUnsustainableExpense': lowest unsustainable expenses found (nan if MaxExpense is sustainable)
+# 'ProjArrays': ProjArrays of the projection at MaxSustainableExpense (None if nan)
+# 'NumProjections': number of projections run
+def MaxSustainableExpense(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject,R,FilingStatus,
+                          TPMwithdraw457bFirst,Method='TPM',MinExpense=0.,MaxExpense=None,Tolerance=1.):
+
+    if Method not in ['TPM','Traditional']:
+        print('Method '+str(Method)+' not recognized (options: TPM, Traditional). Exiting.')
+        sys.exit()
+
+    Search = {'NumProjections': 0}
+
+    # Project with expenses Exp, returning its ProjArrays if the money lasts, None if not
+    def ProjectExpense(Exp):
+
+        Search['NumProjections'] += 1
+        ExpenseExpDict = copy.deepcopy(ExpDict)
+        ExpenseExpDict['Exp'] = Exp
+        # deep copy inputs, since the projection can modify them
+        if Method == 'TPM':
+            ProjArrays = ProjFinalBalance(TaxRateInfo,copy.deepcopy(IVdict),copy.deepcopy(IncDict),ExpenseExpDict,
+                                          CurrentAge,RMDstartAge,NumYearsToProject,R,FilingStatus,TPMwithdraw457bFirst,
+                                          StopIfProvablyOutOfMoney=True)
+        else:
+            ProjArrays = ProjFinalBalanceTraditional(TaxRateInfo,copy.deepcopy(IVdict),copy.deepcopy(IncDict),
+                                                     ExpenseExpDict,CurrentAge,RMDstartAge,NumYearsToProject,R,
+                                                     FilingStatus,StopIfProvablyOutOfMoney=True)
+        if np.isnan(ProjArrays['OutOfMoneyAge']):
+            return ProjArrays
+        return None
+
+    # Bracket: Sustainable (with its ProjArrays) and Unsustainable expenses
+    Sustainable = float(MinExpense)
+    SustainableProjArrays = ProjectExpense(Sustainable)
+    if SustainableProjArrays is None:
+        return {'MaxSustainableExpense': np.nan, 'MinUnsustainableExpense': Sustainable, 'ProjArrays': None,
+                'NumProjections': Search['NumProjections']}
+
+    if MaxExpense is None:
+        Unsustainable = max(float(ExpDict['Exp']),10000.,Sustainable + Tolerance)
+        ProjArrays = ProjectExpense(Unsustainable)
+        while ProjArrays is not None:
+            Sustainable, SustainableProjArrays = Unsustainable, ProjArrays
+            Unsustainable *= 2.
+            ProjArrays = ProjectExpense(Unsustainable)
+    else:
+        Unsustainable = float(MaxExpense)
+        ProjArrays = ProjectExpense(Unsustainable)
+        if ProjArrays is not None:
+            return {'MaxSustainableExpense': Unsustainable, 'MinUnsustainableExpense': np.nan, 'ProjArrays': ProjArrays,
+                    'NumProjections': Search['NumProjections']}
+
+    # Bisect
+    while Unsustainable - Sustainable > Tolerance:
+        Exp = 0.5*(Sustainable + Unsustainable)
+        ProjArrays = ProjectExpense(Exp)
+        if ProjArrays is not None:
+            Sustainable, SustainableProjArrays = Exp, ProjArrays
+        else:
+            Unsustainable = Exp
+
+    return {'MaxSustainableExpense': Sustainable, 'MinUnsustainableExpense': Unsustainable,
+            'ProjArrays': SustainableProjArrays, 'NumProjections': Search['NumProjections']}
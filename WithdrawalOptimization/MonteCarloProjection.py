@@ -0,0 +1,144 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# MonteCarloProjection.py
+
+import numpy as np
+import sys
+import copy
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from ProjFinalBalanceScenarios import ProjFinalBalanceScenarios
+from ProjFinalBalanceTraditionalBatch import ProjFinalBalanceTraditionalBatch
+
+# Generate annual return paths (NumPaths x NumYearsToProject) for Monte Carlo sequence-of-returns analysis, from a
+# seeded random number generator so results are repeatable:
+# 'Normal': annual returns normally distributed, with mean Mean and standard deviation StdDev
+# 'Lognormal': 1 + annual return lognormally distributed, with the same mean and standard deviation as 'Normal' (but
+# never a return below -100%)
+# 'Bootstrap': annual returns drawn (with replacement) from HistoricalReturns
+def GenerateReturnPaths(NumPaths,NumYearsToProject,Distribution='Lognormal',Mean=0.07,StdDev=0.15,
+                        HistoricalReturns=None,Seed=None):
+
+    rng = np.random.default_rng(Seed)
+
+    if Distribution == 'Normal':
+        ReturnPaths = rng.normal(Mean,StdDev,(NumPaths,NumYearsToProject))
+    elif Distribution == 'Lognormal':
+        Sigma = np.sqrt(np.log(1. + (StdDev/(1.+Mean))**2))
+        Mu = np.log(1.+Mean) - 0.5*Sigma**2
+        ReturnPaths = rng.lognormal(Mu,Sigma,(NumPaths,NumYearsToProject)) - 1.
+    elif Distribution == 'Bootstrap':
+        if HistoricalReturns is None:
+            print('Bootstrap return distribution requires HistoricalReturns. Exiting.')
+            sys.exit()
+        ReturnPaths = rng.choice(np.asarray(HistoricalReturns,dtype=float),(NumPaths,NumYearsToProject),replace=True)
+    else:
+        print('Return distribution not recognized. Exiting.')
+        sys.exit()
+
+    return ReturnPaths
+
+# Project a chunk of return paths with one withdrawal method, returning TotalAssets (paths x years) and OutOfMoneyAge
+# (paths). TPM paths are projected one at a time (ProjFinalBalanceScenarios), Traditional paths all at once
+# (ProjFinalBalanceTraditionalBatch).
+def ProjectReturnPaths(TPMorTraditionalWithdrawal,TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,
+                       NumYearsToProject,ReturnPaths,FilingStatus,TPMwithdraw457bFirst):
+
+    if TPMorTraditionalWithdrawal == 'TPM':
+        ProjArraysList = ProjFinalBalanceScenarios(TaxRateInfo,copy.deepcopy(IVdict),copy.deepcopy(IncDict),
+                                                   copy.deepcopy(ExpDict),CurrentAge,RMDstartAge,NumYearsToProject,
+                                                   ReturnPaths,FilingStatus,TPMwithdraw457bFirst)
+    elif TPMorTraditionalWithdrawal == 'Traditional':
+        ProjArraysList = ProjFinalBalanceTraditionalBatch(TaxRateInfo,copy.deepcopy(IVdict),copy.deepcopy(IncDict),
+                                                          copy.deepcopy(ExpDict),CurrentAge,RMDstartAge,
+                                                          NumYearsToProject,ReturnPaths,FilingStatus)
+
+    TotalAssets = np.array([ProjArrays['TotalAssets'] for ProjArrays in ProjArraysList])
+    OutOfMoneyAge = np.array([ProjArrays['OutOfMoneyAge'] for ProjArrays in ProjArraysList],dtype=float)
+
+    return TotalAssets, OutOfMoneyAge
+
+# ProjectReturnPaths for every return path (row of ReturnPaths), with NumWorkers > 1 splitting the paths into chunks
+# that are projected in parallel processes. Returns TotalAssets (paths x years) and OutOfMoneyAge (paths).
+def ProjectReturnPathsParallel(TPMorTraditionalWithdrawal,TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,
+                               NumYearsToProject,ReturnPaths,FilingStatus,TPMwithdraw457bFirst,NumWorkers=1):
+
+    # split paths into chunks (a few per worker, to balance the load when some chunks run out of money early)
+    NumPaths = np.shape(ReturnPaths)[0]
+    if NumWorkers > 1:
+        NumChunks = min(4*NumWorkers,NumPaths)
+    else:
+        NumChunks = 1
+    PathIndChunks = np.array_split(np.arange(NumPaths),NumChunks)
+
+    ArgsList = [(TPMorTraditionalWithdrawal,TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,
+                 NumYearsToProject,ReturnPaths[PathInd],FilingStatus,TPMwithdraw457bFirst) for PathInd in PathIndChunks]
+
+    # Worker processes are forked, since spawned workers would re-run the driver script (the templates have no
+    # if __name__ == '__main__' guard). Where fork isn't available (e.g. Windows), the chunks run serially.
+    if NumWorkers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        with ProcessPoolExecutor(max_workers=NumWorkers,mp_context=multiprocessing.get_context('fork')) as executor:
+            ResultsList = list(executor.map(ProjectReturnPaths,*zip(*ArgsList)))
+    else:
+        ResultsList = [ProjectReturnPaths(*Args) for Args in ArgsList]
+
+    TotalAssets = np.concatenate([Results[0] for Results in ResultsList])
+    OutOfMoneyAge = np.concatenate([Results[1] for Results in ResultsList])
+
+    return TotalAssets, OutOfMoneyAge
+
+# Monte Carlo sequence-of-returns analysis: project every return path (row of ReturnPaths, e.g. from
+# GenerateReturnPaths) with the TPM and/or Traditional withdrawal method, and summarize the results for each method:
+# probability of success (never running out of money), percentile bands of TotalAssets vs age, and the distribution of
+# OutOfMoneyAge. With NumWorkers > 1, the paths are split into chunks that are projected in parallel processes.
+def MonteCarloProjection(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject,ReturnPaths,
+                         FilingStatus,TPMwithdraw457bFirst,TPMorTraditionalWithdrawal='TPM',NumWorkers=1,
+                         Percentiles=np.array([5.,25.,50.,75.,95.])):
+
+    NumPaths = np.shape(ReturnPaths)[0]
+    if np.shape(ReturnPaths) != (NumPaths,NumYearsToProject):
+        print('ReturnPaths must have shape (number of paths, NumYearsToProject). Exiting.')
+        sys.exit()
+
+    if TPMorTraditionalWithdrawal == 'Both':
+        MethodList = ['TPM','Traditional']
+    elif TPMorTraditionalWithdrawal in ['TPM','Traditional']:
+        MethodList = [TPMorTraditionalWithdrawal]
+    else:
+        print('Withdrawal method not recognized. Exiting.')
+        sys.exit()
+
+    MCdict = {}
+    for Method in MethodList:
+
+        TotalAssets, OutOfMoneyAge = ProjectReturnPathsParallel(Method,TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,
+                                                                RMDstartAge,NumYearsToProject,ReturnPaths,
+                                                                FilingStatus,TPMwithdraw457bFirst,NumWorkers)
+
+        MCdict[Method] = SummarizeMonteCarlo(TotalAssets,OutOfMoneyAge,Percentiles)
+
+    return MCdict
+
+# Summarize the TotalAssets (paths x years) and OutOfMoneyAge (paths) of a Monte Carlo analysis
+def SummarizeMonteCarlo(TotalAssets,OutOfMoneyAge,Percentiles):
+
+    # a path succeeds if it never runs out of money
+    Success = np.isnan(OutOfMoneyAge)
+
+    # distribution of the age money runs out, over the paths that fail
+    OutOfMoneyAgeValues, OutOfMoneyAgeCounts = np.unique(OutOfMoneyAge[~Success],return_counts=True)
+
+    SummaryDict = {'SuccessProbability': np.mean(Success),
+                   'Percentiles': Percentiles,
+                   'TotalAssetsPercentiles': np.percentile(TotalAssets,Percentiles,axis=0),
+                   'TotalAssets': TotalAssets,
+                   'FinalBalance': TotalAssets[:,-1],
+                   'OutOfMoneyAge': OutOfMoneyAge,
+                   'OutOfMoneyAgeValues': OutOfMoneyAgeValues,
+                   'OutOfMoneyAgeCounts': OutOfMoneyAgeCounts}
+
+    return SummaryDict
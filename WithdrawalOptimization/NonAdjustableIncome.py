@@ -8,11 +8,13 @@
 import numpy as np
 from ComputeRMD import ComputeRMD
 import copy
+from Instrumentation import Instrumented
 
 # All "non-adjustable" income sources (i.e., we cannot modify the amounts, in the framework of this simulation),
 # including dividends, "other income", RMDs, and social security
 
-def NonAdjustableIncome(TotalCash,Income,PreTax,PreTax457b,RMD, PostTax,IncDict,Age,YearCt):
+@Instrumented
+def NonAdjustableIncome(TotalCash,Income,PreTax,PreTax457b,RMD, PostTax,IncDict,Schedules,Age,YearCt):
 
     # Unpack needed dictionary items - for easier access
     QualDivYield = IncDict['QualifiedDividendYield']
@@ -22,31 +24,28 @@ def NonAdjustableIncome(TotalCash,Income,PreTax,PreTax457b,RMD, PostTax,IncDict,
     IncTot = Income['Total'][YearCt]
     IncMaxStd = Income['MaxStandard'][YearCt]
     IncMaxTot = Income['MaxTotal'][YearCt]
-    OtherIncomeSources = IncDict['OtherIncomeSources']
-    AgeOtherIncomeSourcesWillStart = IncDict['AgeOtherIncomeSourcesWillStart']
+    OtherIncome = Schedules['OtherIncome'][YearCt]
     PreTaxBal = PreTax['Bal'][YearCt,:]
     PreTax457bBal = PreTax457b['Bal'][YearCt,:]
     RMDbal = RMD['Bal'][YearCt,:]
     RMDtot = RMD['Total'][YearCt]
-    SocialSecurityPayments = IncDict['SocialSecurityPayments']
-    AgeSSwillStart = IncDict['AgeSSwillStart']
     TotalSS = Income['TotalSS'][YearCt]
 
     # Dividends
-    QualDiv = QualDivYield * np.sum(PostTax['Bal'][YearCt,:])
-    NonQualDiv = NonQualDivYield * np.sum(PostTax['Bal'][YearCt,:])
+    PostTaxTotal = PostTax['Bal'][YearCt,:PostTax['NumLots']].sum()
+    QualDiv = QualDivYield * PostTaxTotal
+    NonQualDiv = NonQualDivYield * PostTaxTotal
     TotalCash[YearCt] += QualDiv + NonQualDiv
     IncTotStd += NonQualDiv
     IncTotLTcapGains += QualDiv
     IncTot += QualDiv + NonQualDiv
 
     # Other income
-    for ct in range(len(OtherIncomeSources)):
-        if Age[YearCt,0] >= AgeOtherIncomeSourcesWillStart[ct]:
-            TotalCash[YearCt] += OtherIncomeSources[ct]
-            # assuming all "other income sources" are taxed as standard income (vs LT cap gains, social security, etc.)
-            IncTotStd += OtherIncomeSources[ct]
-            IncTot += OtherIncomeSources[ct]
+    if OtherIncome != 0.:
+        TotalCash[YearCt] += OtherIncome
+        # assuming all "other income sources" are taxed as standard income (vs LT cap gains, social security, etc.)
+        IncTotStd += OtherIncome
+        IncTot += OtherIncome
 
     # If after "other income" the Total Standard Income or Total Income exceeds the user set Max Standard Income or
     # Max Total Income, reset Max Standard Income and/or Max Total Income
@@ -71,12 +70,10 @@ def NonAdjustableIncome(TotalCash,Income,PreTax,PreTax457b,RMD, PostTax,IncDict,
             # remove from pretax accounts
             PreTaxBal[ct] -= RMDpretax
             PreTax457bBal[ct] -= RMD457b
-    RMDtot = np.sum(RMDbal)
+    RMDtot = RMDbal.sum()
 
     # Social security
-    for ct in range(len(SocialSecurityPayments)):
-        if Age[YearCt,ct] >= AgeSSwillStart[ct]:
-            TotalSS += SocialSecurityPayments[ct]
+    TotalSS += Schedules['TotalSS'][YearCt]
     TotalCash[YearCt] += TotalSS
 
     # Repack any modified immutable dictionary items (mutable items such as arrays will already be modified)
@@ -0,0 +1,206 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# OptimizeIncomeTargets.py
+
+import numpy as np
+import sys
+import copy
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from ProjFinalBalance import ProjFinalBalance
+from YearlySchedules import AddScheduledAmounts
+
+# IncDict entries of each income target: base value, changes, and the ages the changes start
+TargetKeys = {'MaxStandardIncome': ('MaxStandardIncome','MaxStandardIncomeChange',
+                                    'AgeMaxStandardIncomeChangeWillStart'),
+              'SpecifiedIncome': ('SpecifiedIncome','SpecifiedIncomeChange','AgeSpecifiedIncomeChangeWillStart')}
+
+# Search for the TPM income targets - MaxStandardIncome (max standard income) and/or SpecifiedIncome (total income
+# target) - that maximize final TotalAssets (Objective='FinalAssets') or minimize lifetime taxes plus penalties
+# (Objective='TaxesAndPenalties'), without running out of money. Rather than one global offset, each target gets its
+# own value in each age band: the first band starts at CurrentAge, and the others at each of BandStartAges (ages of the
+# first person, increasing), e.g. np.array([65.,67.,75.]) for before ACA eligibility ends, before SS, before RMDs, and
+# after. For a target per year, use np.arange(CurrentAge[0]+1,CurrentAge[0]+NumYearsToProject).
+# Targets: 'MaxStandardIncome', 'SpecifiedIncome', or 'Both'. The other target keeps its IncDict schedule.
+# Derivative-free compass search, starting from the IncDict schedules (in whole dollars): try moving each band's target
+# up and down by Step, move to the best candidate if it improves on the current targets, and halve Step once none does,
+# until Step is below MinStep or MaxProjections projections have been run. Every target stays >= 0 and in whole
+# dollars. Candidates that run out of money rank below all that don't, and among themselves by how soon they run out
+# (so the search also works from starting targets that run out). The candidates of each step are projected in
+# NumWorkers parallel processes, and targets already projected are never projected again.
+# Returns a dict:
+# 'MaxStandardIncome', 'SpecifiedIncome': best target of each band (whether searched or not)
+# 'IncDict': copy of IncDict with the best targets (as band changes at BandStartAges)
+# 'ProjArrays': ProjArrays of the best targets
+# 'FinalAssets', 'TaxesAndPenalties', 'OutOfMoneyAge': of the best targets (OutOfMoneyAge nan if money lasts)
+# 'InitialFinalAssets', 'InitialTaxesAndPenalties', 'InitialOutOfMoneyAge': of the starting targets
+# 'NumProjections': number of projections run
+def OptimizeIncomeTargets(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject,R,FilingStatus,
+                          TPMwithdraw457bFirst,BandStartAges,Targets='Both',Objective='FinalAssets',InitialStep=8000.,
+                          MinStep=250.,MaxProjections=1000,NumWorkers=1):
+
+    if Targets == 'Both':
+        TargetNames = ['MaxStandardIncome','SpecifiedIncome']
+    elif Targets in TargetKeys:
+        TargetNames = [Targets]
+    else:
+        print('Targets '+str(Targets)+' not recognized (options: MaxStandardIncome, SpecifiedIncome, Both). Exiting.')
+        sys.exit()
+    if Objective not in ['FinalAssets','TaxesAndPenalties']:
+        print('Objective '+str(Objective)+' not recognized (options: FinalAssets, TaxesAndPenalties). Exiting.')
+        sys.exit()
+
+    BandStartAges = np.array(BandStartAges,dtype=float)
+    if np.any(np.diff(BandStartAges) <= 0.) or (len(BandStartAges) > 0 and BandStartAges[0] <= CurrentAge[0]):
+        print('BandStartAges must be increasing, and after CurrentAge. Exiting.')
+        sys.exit()
+    NumBands = len(BandStartAges) + 1
+
+    # Starting targets: the IncDict schedules at the start of each band, in whole dollars. X holds the searched ones,
+    # one target after the other.
+    BandAges = np.concatenate(([float(CurrentAge[0])],BandStartAges))
+    StartTargets = {Name: np.round(IncomeTargetsAtAges(IncDict,Name,BandAges)) for Name in TargetKeys}
+    X = np.concatenate([StartTargets[Name] for Name in TargetNames])
+
+    # Memo of every projected X: tuple(X) -> Evaluation (see EvaluateIncomeTargets)
+    Memo = {}
+    Search = {'Best': None}
+
+    # Project every X in Candidates not yet projected (in parallel, with Executor), returning the Evaluation of each
+    def Evaluate(Candidates,Executor):
+
+        New = []
+        for Candidate in Candidates:
+            if tuple(Candidate) not in Memo and tuple(Candidate) not in [tuple(Cand) for Cand in New]:
+                New.append(Candidate)
+
+        ArgsList = [(TaxRateInfo,IVdict,ApplyIncomeTargets(IncDict,BandStartAges,CandidateTargets(Candidate)),ExpDict,
+                     CurrentAge,RMDstartAge,NumYearsToProject,R,FilingStatus,TPMwithdraw457bFirst,Objective)
+                    for Candidate in New]
+        if Executor is not None:
+            Evaluations = list(Executor.map(EvaluateIncomeTargets,*zip(*ArgsList)))
+        else:
+            Evaluations = [EvaluateIncomeTargets(*Args) for Args in ArgsList]
+
+        for Candidate, Evaluation in zip(New,Evaluations):
+            # ProjArrays only kept while best
+            if Search['Best'] is None or Evaluation['Cost'] < Search['Best']['Cost']:
+                Search['Best'] = Evaluation
+                Search['BestX'] = Candidate
+            Memo[tuple(Candidate)] = {Key: Evaluation[Key] for Key in Evaluation if Key != 'ProjArrays'}
+
+        return [Memo[tuple(Candidate)] for Candidate in Candidates]
+
+    # Targets of X, with the targets not searched from IncDict
+    def CandidateTargets(Candidate):
+
+        BandTargets = dict(StartTargets)
+        for ct, Name in enumerate(TargetNames):
+            BandTargets[Name] = Candidate[ct*NumBands:(ct+1)*NumBands]
+        return {Name: BandTargets[Name] for Name in TargetNames}
+
+    # Worker processes are forked, as in MonteCarloProjection (the templates have no if __name__ == '__main__' guard).
+    # Where fork isn't available (e.g. Windows), the candidates are projected one after the other.
+    if NumWorkers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        Executor = ProcessPoolExecutor(max_workers=NumWorkers,mp_context=multiprocessing.get_context('fork'))
+    else:
+        Executor = None
+
+    try:
+        Initial = Evaluate([X],Executor)[0]
+        Current = Initial
+        Step = float(InitialStep)
+        while Step >= MinStep and len(Memo) < MaxProjections:
+            Candidates = []
+            for ct in range(len(X)):
+                for Sign in [1.,-1.]:
+                    Candidate = X.copy()
+                    Candidate[ct] = max(np.round(X[ct] + Sign*Step),0.)
+                    if Candidate[ct] != X[ct]:
+                        Candidates.append(Candidate)
+            Evaluations = Evaluate(Candidates[:MaxProjections-len(Memo)],Executor)
+            BestCt = min(range(len(Evaluations)),key=lambda ct: Evaluations[ct]['Cost'],default=None)
+            if BestCt is not None and Evaluations[BestCt]['Cost'] < Current['Cost']:
+                X = Candidates[BestCt]
+                Current = Evaluations[BestCt]
+            else:
+                Step /= 2.
+    finally:
+        if Executor is not None:
+            Executor.shutdown()
+
+    Best = Search['Best']
+    BestTargets = dict(StartTargets)
+    BestTargets.update(CandidateTargets(Search['BestX']))
+
+    OptimizedDict = {'MaxStandardIncome': BestTargets['MaxStandardIncome'],
+                     'SpecifiedIncome': BestTargets['SpecifiedIncome'],
+                     'IncDict': ApplyIncomeTargets(IncDict,BandStartAges,CandidateTargets(Search['BestX'])),
+                     'ProjArrays': Best['ProjArrays'],
+                     'FinalAssets': Best['FinalAssets'],
+                     'TaxesAndPenalties': Best['TaxesAndPenalties'],
+                     'OutOfMoneyAge': Best['OutOfMoneyAge'],
+                     'InitialFinalAssets': Initial['FinalAssets'],
+                     'InitialTaxesAndPenalties': Initial['TaxesAndPenalties'],
+                     'InitialOutOfMoneyAge': Initial['OutOfMoneyAge'],
+                     'NumProjections': len(Memo)}
+
+    return OptimizedDict
+
+# Project income targets (already applied to IncDict), returning a dict:
+# 'Cost': (years short, objective) - lower is better, and compared in that order: years short is 0 unless the money
+# runs out (stopping as soon as it provably will), and the objective is -FinalAssets or TaxesAndPenalties
+# 'FinalAssets': TotalAssets in the last year
+# 'TaxesAndPenalties': total taxes plus penalties over all years
+# 'OutOfMoneyAge', 'ProjArrays'
+def EvaluateIncomeTargets(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject,R,FilingStatus,
+                          TPMwithdraw457bFirst,Objective):
+
+    # deep copy inputs, since the projection can modify them
+    ProjArrays = ProjFinalBalance(TaxRateInfo,copy.deepcopy(IVdict),IncDict,copy.deepcopy(ExpDict),CurrentAge,
+                                  RMDstartAge,NumYearsToProject,R,FilingStatus,TPMwithdraw457bFirst,
+                                  StopIfProvablyOutOfMoney=True)
+
+    FinalAssets = ProjArrays['TotalAssets'][-1]
+    TaxesAndPenalties = np.sum(ProjArrays['Taxes']) + np.sum(ProjArrays['Penalties'])
+    if np.isnan(ProjArrays['OutOfMoneyAge']):
+        YearsShort = 0.
+    else:
+        YearsShort = ProjArrays['Age'][-1,0] + 1. - ProjArrays['OutOfMoneyAge']
+
+    if Objective == 'FinalAssets':
+        Cost = (YearsShort,-FinalAssets)
+    else:
+        Cost = (YearsShort,TaxesAndPenalties)
+
+    Evaluation = {'Cost': Cost,
+                  'FinalAssets': FinalAssets,
+                  'TaxesAndPenalties': TaxesAndPenalties,
+                  'OutOfMoneyAge': ProjArrays['OutOfMoneyAge'],
+                  'ProjArrays': ProjArrays}
+
+    return Evaluation
+
+# Value of an income target (TargetKeys name) at each of Ages, from its IncDict schedule
+def IncomeTargetsAtAges(IncDict,Name,Ages):
+
+    BaseKey, ChangeKey, AgeKey = TargetKeys[Name]
+
+    return AddScheduledAmounts(float(IncDict[BaseKey]) + np.zeros(len(Ages)),IncDict[ChangeKey],IncDict[AgeKey],Ages)
+
+# Copy of IncDict with each of BandTargets (dict of TargetKeys name: target of each band) as that target's schedule:
+# the first band's target as the base value, plus a change at each of BandStartAges
+def ApplyIncomeTargets(IncDict,BandStartAges,BandTargets):
+
+    TargetsIncDict = copy.deepcopy(IncDict)
+    for Name in BandTargets:
+        BaseKey, ChangeKey, AgeKey = TargetKeys[Name]
+        TargetsIncDict[BaseKey] = float(BandTargets[Name][0])
+        TargetsIncDict[ChangeKey] = np.diff(np.asarray(BandTargets[Name],dtype=float))
+        TargetsIncDict[AgeKey] = np.array(BandStartAges,dtype=float)
+
+    return TargetsIncDict
@@ -0,0 +1,73 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# OutOfMoneyBound.py
+
+import numpy as np
+
+# Proof that a projection will run out of money, from the state at the end of a year, without projecting the following
+# years (used by ProjFinalBalance and ProjFinalBalanceTraditional with StopIfProvablyOutOfMoney, e.g. when searching
+# for the maximum sustainable expenses, where only whether the money lasts matters).
+
+# As long as a projection doesn't run out of money, the total assets at the end of year k are at most
+#     W[k] = F[k]*W[k-1] + OtherIncome[k] + SS[k] + MaxACArefund[k-1] + RoundingSlack - Expenses[k]
+# starting from W[YearCt] = TotalAssets[YearCt] + the tax refund due the following year, where:
+# F[k]: largest growth factor of any account going into year k: 1+ROI (PreTax, 457b, Roth), (1+ROI-yield)*(1+yield)
+# (PostTax, with its dividends), 1+yield (refund lots, which only earn dividends the year they're purchased), 1 (cash
+# cushion)
+# MaxACArefund[k-1]: the most the ACA tax bill adjustment can refund in year k (up to the benchmark price, when still
+# on ACA and adjusting the tax bill)
+# RoundingSlack: far more than the rounding of every account to the cent, each year
+# Taxes, penalties and RMDs are left out (they can only lower the total assets), as are Roth conversions (which move
+# money between accounts). Estimated tax payments are left out too: any overpayment comes back as a refund the
+# following year, which the growth factor (at least 1) already more than covers.
+# So if W[k] < 0 for some k, the projection runs out of money by year k at the latest.
+
+RoundingSlack = 10.
+
+# Terms of the bound that don't depend on the projection state, from the inputs of a projection (see YearlySchedules):
+# 'Discount': D[k] = 1/(F[1]*...*F[k])
+# 'CumulativeNetCash': C[k] = sum over j = 1..k of D[j]*(net cash of year j), so that
+#     W[k]*D[k] = W[t]*D[t] + C[k] - C[t]
+# 'MinFutureNetCash': lowest C[k] over the years k > t, for each year t (inf for the last year)
+def OutOfMoneyBound(IncDict,Schedules,ROI):
+
+    NumYearsToProject = len(Schedules['Expenses'])
+    DividendYield = IncDict['QualifiedDividendYield'] + IncDict['NonQualifiedDividendYield']
+
+    # Growth factors going into each year (none for the first year)
+    GrowthFactor = np.ones(NumYearsToProject)
+    GrowthFactor[1:] = np.maximum.reduce([np.ones(NumYearsToProject-1),1.+ROI[:-1],
+                                          (1.+ROI[:-1]-DividendYield)*(1.+DividendYield),
+                                          np.full(NumYearsToProject-1,1.+DividendYield)])
+
+    # Net cash of each year (none counted for the first year, which is already in the projection state)
+    NetCash = Schedules['OtherIncome'] + Schedules['TotalSS'] - Schedules['Expenses'] + RoundingSlack
+    # refund from the previous year's ACA tax bill adjustment
+    if IncDict['AdjustTaxBillIfIncomeForACAsubsidiesNotMet']:
+        NetCash[1:] += np.where(Schedules['ACAeligible'][:-1],IncDict['BenchmarkPrice'],0.)
+    NetCash[0] = 0.
+
+    Discount = 1./np.cumprod(GrowthFactor)
+    CumulativeNetCash = np.cumsum(Discount*NetCash)
+    MinFutureNetCash = np.full(NumYearsToProject,np.inf)
+    MinFutureNetCash[:-1] = np.minimum.accumulate(CumulativeNetCash[::-1])[::-1][1:]
+
+    Bound = {'Discount': Discount,
+             'CumulativeNetCash': CumulativeNetCash,
+             'MinFutureNetCash': MinFutureNetCash}
+
+    return Bound
+
+# Whether the projection runs out of money after year YearCt, given TotalAssets and the tax refund due the following
+# year (if any) at the end of year YearCt. Returns the last year count it can run out of money at, or None if it can't
+# be proven.
+def ProvablyOutOfMoney(Bound,YearCt,TotalAssets,RefundDue):
+
+    Threshold = Bound['CumulativeNetCash'][YearCt] - (TotalAssets + RefundDue)*Bound['Discount'][YearCt]
+    if Bound['MinFutureNetCash'][YearCt] >= Threshold:
+        return None
+
+    return YearCt + 1 + int(np.argmax(Bound['CumulativeNetCash'][YearCt+1:] < Threshold))
@@ -9,26 +9,30 @@ import numpy as np
 import sys
 import copy
 
-from ComputeTaxes import ComputeTaxes
-from TaxableSSconsolidated import TaxableSSconsolidated
-from TaxableIncomeTargetMethodWithSSI import TaxableIncomeTargetMethodWithSSI
-from NonAdjustableIncome import NonAdjustableIncome
-from WithdrawFromAllPreTax import WithdrawFromAllPreTax
-from WithdrawFromPostTax import WithdrawFromPostTax
-from GetRemainingNeededCashNoTaxesOrPenalties import GetRemainingNeededCashNoTaxesOrPenalties
-from GetRemainingNeededCashWithTaxesAndOrPenalties import GetRemainingNeededCashWithTaxesAndOrPenalties
-from TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc import *
+from ExecuteTPMwithdrawals import ExecuteTPMwithdrawals
 from ComputeSubsidy import *
+from AddPostTaxLot import AddPostTaxLot, PostTaxLotCapacity
+from Instrumentation import SetInstrumentationYear
+from EventLog import LogEvent
+from OutOfMoneyBound import OutOfMoneyBound, ProvablyOutOfMoney
+from ProjectionSetup import ProjectionSetup
 
 # Expand width of output in console
-import pandas as pd
 desired_width = 1000 #320
-pd.set_option('display.width', desired_width)
 np.set_printoptions(linewidth=desired_width)
 
 # Project final balance, from inputs (e.g. initial balances, tax rates, etc.)
+# Optionally, save a checkpoint of the complete projection state at the end of each year in CheckpointYears (year
+# counts, 0 = first year), returned in ProjArrays['Checkpoints'][YearCt]. Passing one of those checkpoints as
+# ResumeState starts the projection from the end of that year instead of from the initial values, projecting only the
+# years after it - for input variants that only change later years (see ProjectVariants).
+# With StopIfProvablyOutOfMoney, the projection stops at the end of the first year from which it will provably run out
+# of money (see OutOfMoneyBound.py), and OutOfMoneyAge is then the latest age it can run out of money at - for when only
+# whether the money lasts matters (see MaxSustainableExpense).
+# Setup: the ProjectionSetup of these inputs, if already computed (e.g. by ProjectBothStrategies).
 def ProjFinalBalance(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject, R, FilingStatus,
-                     TPMwithdraw457bFirst):
+                     TPMwithdraw457bFirst,CheckpointYears=(),ResumeState=None,StopIfProvablyOutOfMoney=False,
+                     Setup=None):
 
     # number of people (1 or 2)
     NumPeople = np.size(IVdict['PreTaxIV'])
@@ -43,10 +47,13 @@ def ProjFinalBalance(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,N
                   'Withdrawn': np.zeros((NumYearsToProject,NumPeople)),
                   'TotalWithdrawn': np.zeros(NumYearsToProject),
                   'TPMwithdraw457bFirst': TPMwithdraw457bFirst}
-    PostTax = {'Bal': np.zeros((NumYearsToProject,np.size(IVdict['PostTaxIV']))),
+    # PostTax lots are preallocated (see AddPostTaxLot), with only the first PostTax['NumLots'] columns in use
+    MaxNumLots = PostTaxLotCapacity(np.size(IVdict['PostTaxIV']),NumYearsToProject)
+    PostTax = {'Bal': np.zeros((NumYearsToProject,MaxNumLots)),
                'Total': np.zeros(NumYearsToProject),
-               'CG': np.zeros((NumYearsToProject,np.size(IVdict['PostTaxIV']))),
-               'CGtotal': np.zeros(NumYearsToProject)}
+               'CG': np.zeros((NumYearsToProject,MaxNumLots)),
+               'CGtotal': np.zeros(NumYearsToProject),
+               'NumLots': np.size(IVdict['PostTaxIV'])}
     Roth = {'Bal': np.zeros((NumYearsToProject,NumPeople)),
             'Total': np.zeros(NumYearsToProject),
             'Contributions': np.zeros((NumYearsToProject,NumPeople))}
@@ -58,8 +65,8 @@ def ProjFinalBalance(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,N
 
     PreTax['Bal'][0,:] = IVdict['PreTaxIV']
     PreTax457b['Bal'][0,:] = IVdict['PreTax457bIV']
-    PostTax['Bal'][0,:] = IVdict['PostTaxIV']
-    PostTax['CG'][0,:] = IVdict['CurrentUnrealizedCapGains']
+    PostTax['Bal'][0,:PostTax['NumLots']] = IVdict['PostTaxIV']
+    PostTax['CG'][0,:PostTax['NumLots']] = IVdict['CurrentUnrealizedCapGains']
     Roth['Bal'][0,:] = IVdict['RothIV']
     Roth['Contributions'][0,:] = IVdict['RothContributions']
     Roth['ConversionAmount'] = IVdict['RothConversionAmount']
@@ -79,8 +86,6 @@ def ProjFinalBalance(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,N
     RMD = {'Bal': np.zeros((NumYearsToProject,np.size(CurrentAge))),
            'Total': np.zeros(NumYearsToProject),
            'RMDstartAge': RMDstartAge}
-    Age = np.zeros((NumYearsToProject,np.size(CurrentAge)))
-    Age[0,:] = CurrentAge
     TotalCash = np.zeros(NumYearsToProject)
     TotalCashNeeded = np.zeros(NumYearsToProject)
     Expenses = np.zeros(NumYearsToProject)
@@ -100,65 +105,97 @@ def ProjFinalBalance(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,N
 
     OutOfMoneyAge = np.nan
 
-    # ROI for post-tax remove dividend yield, since input ROI assumes reinvested dividends
-    ROInoDividends = R - (IncDict['QualifiedDividendYield'] + IncDict['NonQualifiedDividendYield'])
-
-    # Fill out Age array, in case money runs out - don't want Ages equal zero after that, for plot
-    for ct1 in range(0,NumYearsToProject):
-        if ct1 > 0:
-            Age[ct1,:] = Age[ct1-1,:] + 1
+    # Ages, ROI of each year, and expenses, income targets, other income, social security and ACA eligibility of every
+    # year
+    if Setup is None:
+        Setup = ProjectionSetup(IncDict,ExpDict,CurrentAge,NumYearsToProject,R)
+    Age = Setup['Age'].copy()
+    ROI = Setup['ROI']
+    ROInoDividends = Setup['ROInoDividends']
+    Schedules = Setup['Schedules']
+
+    # Resume from a checkpoint: restore the state at the end of year ResumeState['YearCt'] (deep copied, so the
+    # checkpoint can be resumed from again), and continue with the following year
+    if ResumeState is None:
+        StartYear = 0
+    else:
+        if np.shape(ResumeState['TotalAssets']) != (NumYearsToProject,) or \
+                np.shape(ResumeState['PreTax']['Bal']) != (NumYearsToProject,NumPeople) or \
+                not np.array_equal(ResumeState['Age'][0,:],CurrentAge):
+            print('ResumeState is from a projection with different ages / number of years / number of people. Exiting.')
+            sys.exit()
+        State = copy.deepcopy(ResumeState)
+        PreTax = State['PreTax']
+        PreTax457b = State['PreTax457b']
+        PreTax457b['TPMwithdraw457bFirst'] = TPMwithdraw457bFirst
+        PostTax = State['PostTax']
+        Roth = State['Roth']
+        RMD = State['RMD']
+        RMD['RMDstartAge'] = RMDstartAge
+        Income = State['Income']
+        CashCushion = State['CashCushion']
+        TotalAssets = State['TotalAssets']
+        TotalCash = State['TotalCash']
+        TotalCashNeeded = State['TotalCashNeeded']
+        Expenses = State['Expenses']
+        Taxes = State['Taxes']
+        TaxesGenPrevYear = State['TaxesGenPrevYear']
+        TaxesPaidPrevYear = State['TaxesPaidPrevYear']
+        EstimatedTaxesPaidThisYear = State['EstimatedTaxesPaidThisYear']
+        Penalties = State['Penalties']
+        PenaltiesGenPrevYear = State['PenaltiesGenPrevYear']
+        PenaltiesPaidPrevYear = State['PenaltiesPaidPrevYear']
+        EstimatedPenaltiesPaidThisYear = State['EstimatedPenaltiesPaidThisYear']
+        StartYear = State['YearCt'] + 1
+
+    Checkpoints = {}
+
+    if StopIfProvablyOutOfMoney:
+        Bound = OutOfMoneyBound(IncDict,Schedules,ROI)
 
     # loop over years
-    for ct1 in range(0,NumYearsToProject):
+    for ct1 in range(StartYear,NumYearsToProject):
 
-        print('Year Count = ',ct1)
+        LogEvent('Info','YearStart',YearCt=ct1,Age=Age[ct1,0])
+        SetInstrumentationYear(ct1)
 
         # apply investment growth to accounts if not at first year
         if ct1 > 0:
 
             # tax advantaged accounts
-            for ct2 in range(np.shape(PreTax['Bal'])[1]):
-                PreTax['Bal'][ct1,ct2] = np.round(PreTax['Bal'][ct1-1,ct2]*(1+R),2)
-                PreTax457b['Bal'][ct1,ct2] = np.round(PreTax457b['Bal'][ct1-1,ct2]*(1+R),2)
-                Roth['Bal'][ct1,ct2] = np.round(Roth['Bal'][ct1-1,ct2]*(1+R),2)
+            PreTax['Bal'][ct1,:] = np.round(PreTax['Bal'][ct1-1,:]*(1+ROI[ct1-1]),2)
+            PreTax457b['Bal'][ct1,:] = np.round(PreTax457b['Bal'][ct1-1,:]*(1+ROI[ct1-1]),2)
+            Roth['Bal'][ct1,:] = np.round(Roth['Bal'][ct1-1,:]*(1+ROI[ct1-1]),2)
             Roth['Contributions'][ct1,:] = Roth['Contributions'][ct1-1,:]
             CashCushion[ct1] = CashCushion[ct1-1]
-            # loop over post-tax lots
-            for ct2 in range(np.shape(PostTax['Bal'])[1]):
-                # Compute gains, add to capital gains array
-                PostTax['CG'][ct1,ct2] = PostTax['CG'][ct1-1,ct2] + np.round(PostTax['Bal'][ct1-1,ct2]*ROInoDividends,2)
-                # then add to PostTax array
-                PostTax['Bal'][ct1,ct2] = np.round(PostTax['Bal'][ct1-1,ct2]*(1+ROInoDividends),2)
+            # all post-tax lots in use at once
+            NumLots = PostTax['NumLots']
+            # Compute gains, add to capital gains array
+            PostTax['CG'][ct1,:NumLots] = PostTax['CG'][ct1-1,:NumLots] + \
+                                          np.round(PostTax['Bal'][ct1-1,:NumLots]*ROInoDividends[ct1-1],2)
+            # then add to PostTax array
+            PostTax['Bal'][ct1,:NumLots] = np.round(PostTax['Bal'][ct1-1,:NumLots]*(1+ROInoDividends[ct1-1]),2)
 
             TaxesGenPrevYear[ct1] = Taxes[ct1-1]
             PenaltiesGenPrevYear[ct1] = Penalties[ct1-1]
             TaxesPaidPrevYear[ct1] = EstimatedTaxesPaidThisYear[ct1-1]
             PenaltiesPaidPrevYear[ct1] = EstimatedPenaltiesPaidThisYear[ct1-1]
 
-        # Compute expenses for current year
-        Expenses[ct1] = ExpDict['Exp'] + ExpDict['ExpRate']*float(ct1)
-        for ct2 in range(len(ExpDict['FutureExpenseAdjustments'])):
-            if Age[ct1,0] >= ExpDict['FutureExpenseAdjustmentsAge'][ct2]:
-                Expenses[ct1] += ExpDict['FutureExpenseAdjustments'][ct2]
+        # Expenses for current year
+        Expenses[ct1] = Schedules['Expenses'][ct1]
 
         # Taxes/Penalties
 
         # If taxes paid last year exceed what was owed, collect that refund
         if (TaxesPaidPrevYear[ct1] - TaxesGenPrevYear[ct1]) > 0.: # collect refund, place into new PostTax lot
-            NewLot = np.zeros((np.shape(PostTax['Bal'])[0],1))
-            NewLot[ct1,0] = TaxesPaidPrevYear[ct1] - TaxesGenPrevYear[ct1]
-            PostTax['Bal'] = np.append(PostTax['Bal'],NewLot,1)
-            PostTax['CG'] = np.append(PostTax['CG'],np.zeros((np.shape(PostTax['CG'])[0],1)),1)
+            AddPostTaxLot(PostTax,TaxesPaidPrevYear[ct1] - TaxesGenPrevYear[ct1],ct1)
             TaxesStillOwed = 0.
         else: # otherwise need to pay the amount owed this year
             TaxesStillOwed = TaxesGenPrevYear[ct1] - TaxesPaidPrevYear[ct1]
 
         # If penalties paid last year exceed what was owed, collect that refund
         if (PenaltiesPaidPrevYear[ct1] - PenaltiesGenPrevYear[ct1]) > 0.: # collect refund, place into new PostTax lot
-            NewLot = np.zeros((np.shape(PostTax['Bal'])[0],1))
-            NewLot[ct1,0] = PenaltiesPaidPrevYear[ct1] - PenaltiesGenPrevYear[ct1]
-            PostTax['Bal'] = np.append(PostTax['Bal'],NewLot,1)
-            PostTax['CG'] = np.append(PostTax['CG'],np.zeros((np.shape(PostTax['CG'])[0],1)),1)
+            AddPostTaxLot(PostTax,PenaltiesPaidPrevYear[ct1] - PenaltiesGenPrevYear[ct1],ct1)
             PenaltiesStillOwed = 0.
         else: # otherwise need to pay the amount owed this year
             PenaltiesStillOwed = PenaltiesGenPrevYear[ct1] - PenaltiesPaidPrevYear[ct1]
@@ -184,88 +221,16 @@ def ProjFinalBalance(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,N
         #     Income['MaxTotal'][ct1] = IncDict['SpecifiedIncomeAfterACA']
         # else:
         #     Income['MaxTotal'][ct1] = IncDict['SpecifiedIncome']
-        Income['MaxTotal'][ct1] = IncDict['SpecifiedIncome']
-        for ct2 in range(len(IncDict['SpecifiedIncomeChange'])):
-            if Age[ct1,0] >= IncDict['AgeSpecifiedIncomeChangeWillStart'][ct2]:
-                Income['MaxTotal'][ct1] += IncDict['SpecifiedIncomeChange'][ct2]
-
-        Income['MaxStandard'][ct1] = IncDict['MaxStandardIncome']
-        for ct2 in range(len(IncDict['MaxStandardIncomeChange'])):
-            if Age[ct1,0] >= IncDict['AgeMaxStandardIncomeChangeWillStart'][ct2]:
-                Income['MaxStandard'][ct1] += IncDict['MaxStandardIncomeChange'][ct2]
-
-        # All "non-adjustable" income sources (i.e., we cannot modify the amounts, in the framework of this simulation),
-        # including dividends, "other income", RMDs, and social security
-        NonAdjustableIncome(TotalCash,Income,PreTax,PreTax457b,RMD, PostTax,IncDict,Age,ct1)
-
-        # Below are "adjustable" income/cash sources - i.e. we can modify these income/cash values each year of the
-        # simulation to achieve our goals.
-
-        # Goals:
-        # 1. Achieve exact specified total max income
-        #     a. If not possible, try to have total income not exceed specified total max income
-        # 2. Achieve standard income equal to max standard income (e.g. to maximize standard deduction if max standard
-        # income = standard deduction)
-        #     a. If not possible, try to have standard income not exceed max standard income
-        # 3. Generate enough cash to cover TotalCashNeeded: TotalCash >= TotalCashNeeded
-        # 4. Generate income and cash first from tax and penalty-free sources, then progress up from the lowest tax/
-        # penalty options to the highest (i.e. starting with the standard deduction for standard income and 0% LT cap
-        # gains bracket for LT cap gains, then up from lowest tax/penalty options to highest)
-
-        if Income['TotalSS'][ct1] > 0.:
-
-            # Run TaxableIncomeTargetMethodWithSSI
-            # Note: any references to "SSI" stand for normal social security income (RIB), not Supplemental Security
-            # Income (a different program that is also provided by the Social Security Administration).
-            TaxableSSdesired, Income['MaxStandard'][ct1], Income['MaxTotal'][ct1] = \
-                TaxableIncomeTargetMethodWithSSI(Income['TotalStandard'][ct1],Income['TotalLTcapGains'][ct1],
-                                                 Income['TotalSS'][ct1],Income['MaxStandard'][ct1],
-                                                 Income['MaxTotal'][ct1], FilingStatus) #Income['TaxableSS'][ct1]
-            Income['TotalStandard'][ct1] += TaxableSSdesired
-            Income['Total'][ct1] += TaxableSSdesired
-
-        # Withdraw from PreTax accounts (PreTax and PreTax457b)
-        WithdrawFromAllPreTax(PreTax,PreTax457b,Income,TotalCash,Roth, Age,ct1)
-
-        # Withdraw from post-tax lots
-        WithdrawFromPostTax(PostTax,TotalCash,Income, TotalCashNeeded[ct1],IVdict,ct1)
-
-        # Compute TaxableSS, based on income from WithdrawFromAllPreTax and WithdrawFromPostTax
-        if Income['TotalSS'][ct1] > 0.:
-            NonSSstandardIncome = Income['TotalStandard'][ct1] - TaxableSSdesired
-            Income['TaxableSS'][ct1] = TaxableSSconsolidated(NonSSstandardIncome + Income['TotalLTcapGains'][ct1],
-                                                             Income['TotalSS'][ct1], FilingStatus)
-            if np.abs(Income['TaxableSS'][ct1] - TaxableSSdesired) >= 0.01:
-                Income['TotalStandard'][ct1] = NonSSstandardIncome + Income['TaxableSS'][ct1]
-                Income['Total'][ct1] = Income['TotalStandard'][ct1] + Income['TotalLTcapGains'][ct1]
-
-        # Compute Taxes
-        TaxesDict = ComputeTaxes(TaxRateInfo,FilingStatus,Income['TotalStandard'][ct1],Income['TotalLTcapGains'][ct1])
-        Taxes[ct1] = TaxesDict['Total']
-
-        if TotalCash[ct1] < TotalCashNeeded[ct1]:
-            # Get cash with no taxes or penalties to meet TotalCashNeeded, if needed
-            GetRemainingNeededCashNoTaxesOrPenalties(TotalCash,Roth,CashCushion, TotalCashNeeded[ct1],Age,ct1)
-
-        if IncDict['TryIncreasingPostTaxWithdrawalAndMaybeReducingStdIncFlag']:
-            if TotalCash[ct1] < TotalCashNeeded[ct1]:
-                # Try reducing standard income & increasing LT cap gains by same amount to get more cash, if possible
-                TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc(TotalCash,PreTax,PreTax457b,PostTax,Roth,Income,
-                                                                     Taxes, Age,TotalCashNeeded[ct1],ct1,TaxRateInfo,
-                                                                     FilingStatus)
-
-
-        if TotalCash[ct1] < TotalCashNeeded[ct1]:
-            # If unable to obtain enough cash without additional taxes or penalties, proceed with sources that WILL
-            # generate additional taxes and/or penalties
-            GetRemainingNeededCashWithTaxesAndOrPenalties(PreTax,PreTax457b,PostTax,Roth,Income,TotalCash,Taxes,
-                                                          Penalties,IVdict,TaxRateInfo,FilingStatus,TotalCashNeeded[ct1],Age,
-                                                          ct1)
+        Income['MaxTotal'][ct1] = Schedules['MaxTotal'][ct1]
+        Income['MaxStandard'][ct1] = Schedules['MaxStandard'][ct1]
+
+        # Generate this year's income and cash via the TPM withdrawal method
+        ExecuteTPMwithdrawals(PreTax,PreTax457b,PostTax,Roth,RMD,Income,TotalCash,CashCushion,Taxes,Penalties,IVdict,
+                              IncDict,Schedules,TaxRateInfo,FilingStatus,TotalCashNeeded[ct1],Age,ct1)
 
         # if TotalCash still less than TotalCashNeeded, you've run out of money!
         if TotalCashNeeded[ct1] - TotalCash[ct1] >= 0.01:
-            print('Ran out of money!')
-            print('Age = '+str(Age[ct1,0]))
+            LogEvent('Warning','OutOfMoney',YearCt=ct1,Age=Age[ct1,0])
             OutOfMoneyAge = Age[ct1,0]
             break
 
@@ -275,11 +240,7 @@ def ProjFinalBalance(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,N
         ExcessCash = TotalCash[ct1] - TotalCashNeeded[ct1]
         if ExcessCash >= 0.01:
             # put remainder of cash into new lot (column) within PostTax since purchasing a new lot
-            NewLot = np.zeros((np.shape(PostTax['Bal'])[0],1))
-            NewLot[ct1,0] = ExcessCash
-            PostTax['Bal'] = np.append(PostTax['Bal'],NewLot,1)
-            # Also expand PostTax['CG'] array for new lot, with cap gain = 0 (since newly purchased)
-            PostTax['CG'] = np.append(PostTax['CG'],np.zeros((np.shape(PostTax['CG'])[0],1)),1)
+            AddPostTaxLot(PostTax,ExcessCash,ct1)
 
         # Adjust tax bill for next year if total income not achieved, and have ACA health insurance (since subsidies
         # will change) (which also means checking to see if either person still under 65, and thus not eligible for
@@ -290,7 +251,7 @@ def ProjFinalBalance(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,N
         # if Income['Total'][ct1] != IncDict['ExpectedIncomeForACAsubsidies'] and \
         #         IncDict['AdjustTaxBillIfIncomeForACAsubsidiesNotMet'] and Age[ct1,-1] < 65.:
         if np.abs(Income['Total'][ct1] - IncDict['ExpectedIncomeForACAsubsidies']) > 0.009 and \
-                IncDict['AdjustTaxBillIfIncomeForACAsubsidiesNotMet'] and Age[ct1,-1] < 65.:
+                IncDict['AdjustTaxBillIfIncomeForACAsubsidiesNotMet'] and Schedules['ACAeligible'][ct1]:
 
             # Compute subsidy using expected income IncDict['ExpectedIncomeForACAsubsidies']
             NominalSubsidy = ComputeSubsidy(IncDict['ExpectedIncomeForACAsubsidies'],IncDict['NumPeopleOnACA'],
@@ -307,22 +268,56 @@ def ProjFinalBalance(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,N
 
 
         # Compute total PostTax
-        PostTax['Total'][ct1] = np.sum(PostTax['Bal'][ct1,:])
+        PostTax['Total'][ct1] = np.sum(PostTax['Bal'][ct1,:PostTax['NumLots']])
 
         # Compute total cap gains
-        PostTax['CGtotal'][ct1] = np.sum(PostTax['CG'][ct1,:])
+        PostTax['CGtotal'][ct1] = np.sum(PostTax['CG'][ct1,:PostTax['NumLots']])
 
         # Compute total assets
         TotalAssets[ct1] = PostTax['Total'][ct1] + PreTax['Total'][ct1] + PreTax457b['Total'][ct1] + Roth['Total'][ct1]\
                            + CashCushion[ct1]
 
+        # Save checkpoint of everything the following years depend on (including the Roth conversion ledger, which
+        # withdrawals modify), deep copied since later years keep modifying these arrays
+        if ct1 in CheckpointYears:
+            Checkpoints[ct1] = copy.deepcopy(
+                {'YearCt': ct1, 'PreTax': PreTax, 'PreTax457b': PreTax457b, 'PostTax': PostTax, 'Roth': Roth,
+                 'RMD': RMD, 'Income': Income, 'CashCushion': CashCushion, 'TotalAssets': TotalAssets, 'Age': Age,
+                 'TotalCash': TotalCash, 'TotalCashNeeded': TotalCashNeeded, 'Expenses': Expenses, 'Taxes': Taxes,
+                 'TaxesGenPrevYear': TaxesGenPrevYear, 'TaxesPaidPrevYear': TaxesPaidPrevYear,
+                 'EstimatedTaxesPaidThisYear': EstimatedTaxesPaidThisYear, 'Penalties': Penalties,
+                 'PenaltiesGenPrevYear': PenaltiesGenPrevYear, 'PenaltiesPaidPrevYear': PenaltiesPaidPrevYear,
+                 'EstimatedPenaltiesPaidThisYear': EstimatedPenaltiesPaidThisYear})
+
+        # Stop if the following years will provably run out of money (counting the refund of any taxes overpaid)
+        if StopIfProvablyOutOfMoney:
+            OutOfMoneyYearCt = ProvablyOutOfMoney(Bound,ct1,TotalAssets[ct1],
+                                                  max(EstimatedTaxesPaidThisYear[ct1] - Taxes[ct1],0.))
+            if OutOfMoneyYearCt is not None:
+                LogEvent('Warning','ProvablyOutOfMoney',YearCt=ct1,Age=Age[OutOfMoneyYearCt,0])
+                OutOfMoneyAge = Age[OutOfMoneyYearCt,0]
+                break
+
+    SetInstrumentationYear(None)
+
     # assemble output dictionary
+    ProjArrays = AssembleProjArrays(PreTax,PreTax457b,PostTax,Roth,RMD,Income,CashCushion,TotalAssets,Age,
+                                    OutOfMoneyAge,TotalCash,TotalCashNeeded,Expenses,Taxes,Penalties)
+    if len(CheckpointYears) > 0:
+        ProjArrays['Checkpoints'] = Checkpoints
+
+    return ProjArrays
+
+# Assemble the output dictionary of a single projection
+def AssembleProjArrays(PreTax,PreTax457b,PostTax,Roth,RMD,Income,CashCushion,TotalAssets,Age,OutOfMoneyAge,TotalCash,
+                       TotalCashNeeded,Expenses,Taxes,Penalties):
+
     ProjArrays = {'PreTax': PreTax['Bal'],
                   'PreTaxTotal': PreTax['Total'],
                   'PreTax457b': PreTax457b['Bal'],
                   'PreTax457bTotal': PreTax457b['Total'],
-                  'PostTax': PostTax['Bal'],
-                  'PostTaxCG': PostTax['CG'],
+                  'PostTax': PostTax['Bal'][:,:PostTax['NumLots']], # trimmed to the lots actually used
+                  'PostTaxCG': PostTax['CG'][:,:PostTax['NumLots']],
                   'Roth': Roth['Bal'],
                   'RothTotal': Roth['Total'],
                   'RothContributions': Roth['Contributions'],
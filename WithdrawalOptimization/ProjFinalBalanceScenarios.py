@@ -0,0 +1,96 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# ProjFinalBalanceScenarios.py
+
+import numpy as np
+import sys
+import copy
+
+from ProjFinalBalance import ProjFinalBalance
+
+# Inputs that can vary by scenario, along with their number of dimensions for a single scenario. To vary an input by
+# scenario, give it a leading scenario axis, e.g. ExpDict['Exp'] = np.array([40000.,50000.,60000.]) or
+# IVdict['PreTaxIV'] = np.array([[100000.,50000.],[200000.,50000.]]). All other inputs are shared by every scenario.
+# R is special: one value per scenario has shape (NumScenarios), and one value per scenario per year (e.g. Monte Carlo
+# return paths) has shape (NumScenarios,NumYearsToProject).
+ScenarioInputNdim = {'PreTaxIV': 1,
+                     'PreTax457bIV': 1,
+                     'PostTaxIV': 1,
+                     'CurrentUnrealizedCapGains': 1,
+                     'RothIV': 1,
+                     'RothContributions': 1,
+                     'CashCushion': 0,
+                     'SpecifiedIncome': 0,
+                     'MaxStandardIncome': 0,
+                     'Exp': 0,
+                     'R': 0}
+
+def IsScenarioInput(Key,Value):
+
+    if Key == 'R':
+        return np.ndim(Value) >= 1
+    else:
+        return Key in ScenarioInputNdim and np.ndim(Value) == ScenarioInputNdim[Key] + 1
+
+# Number of scenarios implied by the inputs (1 if nothing varies by scenario)
+def GetNumScenarios(IVdict,IncDict,ExpDict,R):
+
+    NumScenarios = None
+    for InputDict in [IVdict,IncDict,ExpDict,{'R': R}]:
+        for Key in InputDict:
+            if IsScenarioInput(Key,InputDict[Key]):
+                if NumScenarios is None:
+                    NumScenarios = len(InputDict[Key])
+                elif len(InputDict[Key]) != NumScenarios:
+                    print('Scenario axis of '+Key+' has length '+str(len(InputDict[Key]))+', expected '+
+                          str(NumScenarios)+'. Exiting.')
+                    sys.exit()
+
+    if NumScenarios is None:
+        NumScenarios = 1
+
+    return NumScenarios
+
+# Inputs for a single scenario of a batch, in the form ProjFinalBalance takes them. Everything is copied, so scenarios
+# never share arrays that get modified during a projection (e.g. the Roth conversion arrays).
+def GetScenarioInputs(IVdict,IncDict,ExpDict,R,ScenarioCt):
+
+    ScenarioDicts = []
+    for InputDict in [IVdict,IncDict,ExpDict]:
+        ScenarioDict = {}
+        for Key in InputDict:
+            if IsScenarioInput(Key,InputDict[Key]):
+                ScenarioDict[Key] = copy.deepcopy(InputDict[Key][ScenarioCt])
+            else:
+                ScenarioDict[Key] = copy.deepcopy(InputDict[Key])
+        ScenarioDicts.append(ScenarioDict)
+
+    if IsScenarioInput('R',R):
+        ScenarioR = R[ScenarioCt]
+    else:
+        ScenarioR = R
+
+    return ScenarioDicts[0], ScenarioDicts[1], ScenarioDicts[2], ScenarioR
+
+# Project final balance for many scenarios in one call (e.g. a sweep over expenses, ROI or specified income), returning
+# a list with one ProjArrays per scenario. This is a loop over the scenarios, each projected on its own with
+# ProjFinalBalance, so the results are exactly those of ProjFinalBalance, and so is the run time: nothing is vectorized
+# across scenarios, since the TPM withdrawals branch on each scenario's own balances, lots and breakpoints. (For a
+# projection vectorized across scenarios, see ProjFinalBalanceTraditionalBatch, for the traditional withdrawal method,
+# which takes the same scenario inputs.)
+def ProjFinalBalanceScenarios(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject, R,
+                              FilingStatus,TPMwithdraw457bFirst):
+
+    NumScenarios = GetNumScenarios(IVdict,IncDict,ExpDict,R)
+
+    ProjArraysList = []
+    for ct in range(NumScenarios):
+        ScenarioIVdict, ScenarioIncDict, ScenarioExpDict, ScenarioR = GetScenarioInputs(IVdict,IncDict,ExpDict,R,ct)
+        ProjArraysList.append(ProjFinalBalance(TaxRateInfo,ScenarioIVdict,ScenarioIncDict,ScenarioExpDict,CurrentAge,
+                                               RMDstartAge,NumYearsToProject,ScenarioR,FilingStatus,
+                                               TPMwithdraw457bFirst))
+
+    return ProjArraysList
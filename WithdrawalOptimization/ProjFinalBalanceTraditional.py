@@ -16,15 +16,21 @@ from WithdrawFromPreTaxTraditionalWithPenalty import WithdrawFromPreTaxTradition
 from WithdrawFromRothTraditional import WithdrawFromRothTraditional
 from WithdrawFromRothTraditionalWithPenalty import WithdrawFromRothTraditionalWithPenalty
 from ComputeRMD import ComputeRMD
+from LotBook import BuildLotBook, LotSaleOrder
+from Instrumentation import SetInstrumentationYear
+from EventLog import LogEvent
+from OutOfMoneyBound import OutOfMoneyBound, ProvablyOutOfMoney
+from ProjectionSetup import ProjectionSetup
 
 # Expand width of output in console
-import pandas as pd
 desired_width = 1000 #320
-pd.set_option('display.width', desired_width)
 np.set_printoptions(linewidth=desired_width)
 
 # Use standard / traditional method for retirement withdrawal order: PostTax until depleted, PreTax until depleted, Roth
-def ProjFinalBalanceTraditional(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject, R, FilingStatus):
+# StopIfProvablyOutOfMoney: stop once the projection will provably run out of money (see ProjFinalBalance)
+# Setup: the ProjectionSetup of these inputs, if already computed (e.g. by ProjectBothStrategies)
+def ProjFinalBalanceTraditional(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject, R, FilingStatus,
+                                StopIfProvablyOutOfMoney=False,Setup=None):
 
     # Number of people (1 or 2)
     NumPeople = np.size(IVdict['PreTaxIV'])
@@ -53,8 +59,6 @@ def ProjFinalBalanceTraditional(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RM
     CashCushion[0] = IVdict['CashCushion']
 
     # Initialize Yearly values
-    Age = np.zeros((NumYearsToProject,np.size(CurrentAge)))
-    Age[0,:] = CurrentAge
     RMD = np.zeros((NumYearsToProject,np.size(CurrentAge)))
     TotalCash = np.zeros(NumYearsToProject)
     TotalStandardIncome = np.zeros(NumYearsToProject)
@@ -80,43 +84,44 @@ def ProjFinalBalanceTraditional(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RM
 
     OutOfMoneyAge = np.nan
 
-    # ROI for post-tax remove dividend yield, since input ROI assumes reinvested dividends
-    ROInoDividends = R - (IncDict['QualifiedDividendYield'] + IncDict['NonQualifiedDividendYield'])
+    # Ages, ROI of each year, and expenses, other income and social security of every year
+    if Setup is None:
+        Setup = ProjectionSetup(IncDict,ExpDict,CurrentAge,NumYearsToProject,R)
+    Age = Setup['Age'].copy()
+    ROI = Setup['ROI']
+    ROInoDividends = Setup['ROInoDividends']
+    Schedules = Setup['Schedules']
 
-    # Fill out Age array, in case money runs out - don't want Ages equal zero after that, for plot
-    for ct1 in range(0,NumYearsToProject):
-        if ct1 > 0:
-            Age[ct1,:] = Age[ct1-1,:] + 1
+    if StopIfProvablyOutOfMoney:
+        Bound = OutOfMoneyBound(IncDict,Schedules,ROI)
 
     # Loop over years
     for ct1 in range(0,NumYearsToProject):
 
+        LogEvent('Info','YearStart',YearCt=ct1,Age=Age[ct1,0])
+        SetInstrumentationYear(ct1)
+
         # Apply investment growth to accounts if not at first year
         if ct1 > 0:
             # Tax advantaged accounts
-            for ct2 in range(np.shape(PreTax)[1]):
-                PreTax[ct1,ct2] = np.round(PreTax[ct1-1,ct2]*(1+R),2)
-                PreTax457b[ct1,ct2] = np.round(PreTax457b[ct1-1,ct2]*(1+R),2)
-                Roth[ct1,ct2] = np.round(Roth[ct1-1,ct2]*(1+R),2)
+            PreTax[ct1,:] = np.round(PreTax[ct1-1,:]*(1+ROI[ct1-1]),2)
+            PreTax457b[ct1,:] = np.round(PreTax457b[ct1-1,:]*(1+ROI[ct1-1]),2)
+            Roth[ct1,:] = np.round(Roth[ct1-1,:]*(1+ROI[ct1-1]),2)
             RothContributions[ct1,:] = RothContributions[ct1-1,:]
             CashCushion[ct1] = CashCushion[ct1-1]
-            # Loop over post-tax lots
-            for ct2 in range(np.shape(PostTax)[1]):
-                # Compute gains, add to capital gains array
-                PostTaxCG[ct1,ct2] = PostTaxCG[ct1-1,ct2] + np.round(PostTax[ct1-1,ct2]*ROInoDividends,2)
-                # Then add to PostTax array
-                PostTax[ct1,ct2] = np.round(PostTax[ct1-1,ct2]*(1+ROInoDividends),2)
+            # All post-tax lots at once
+            # Compute gains, add to capital gains array
+            PostTaxCG[ct1,:] = PostTaxCG[ct1-1,:] + np.round(PostTax[ct1-1,:]*ROInoDividends[ct1-1],2)
+            # Then add to PostTax array
+            PostTax[ct1,:] = np.round(PostTax[ct1-1,:]*(1+ROInoDividends[ct1-1]),2)
 
             TaxesGenPrevYear[ct1] = Taxes[ct1-1]
             PenaltiesGenPrevYear[ct1] = Penalties[ct1-1]
             TaxesPaidPrevYear[ct1] = EstimatedTaxesPaidThisYear[ct1-1]
             PenaltiesPaidPrevYear[ct1] = EstimatedPenaltiesPaidThisYear[ct1-1]
 
-        # Compute expenses for current year
-        Expenses[ct1] = ExpDict['Exp'] + ExpDict['ExpRate']*float(ct1)
-        for ct2 in range(len(ExpDict['FutureExpenseAdjustments'])):
-            if Age[ct1,0] >= ExpDict['FutureExpenseAdjustmentsAge'][ct2]:
-                Expenses[ct1] += ExpDict['FutureExpenseAdjustments'][ct2]
+        # Expenses for current year
+        Expenses[ct1] = Schedules['Expenses'][ct1]
 
         # Taxes/Penalties
 
@@ -167,12 +172,11 @@ def ProjFinalBalanceTraditional(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RM
                             IncDict['NonQualifiedDividendYield'] * np.sum(PostTax[ct1,:])
 
         # Other income
-        for ct2 in range(len(IncDict['OtherIncomeSources'])):
-            if Age[ct1,0] >= IncDict['AgeOtherIncomeSourcesWillStart'][ct2]:
-                TotalCash[ct1] += IncDict['OtherIncomeSources'][ct2]
-                # Assuming all "other income sources" are taxed as standard income (vs LT cap gains, social security, etc.)
-                TotalStandardIncome[ct1] += IncDict['OtherIncomeSources'][ct2]
-                TotalIncome[ct1] += IncDict['OtherIncomeSources'][ct2]
+        if Schedules['OtherIncome'][ct1] != 0.:
+            TotalCash[ct1] += Schedules['OtherIncome'][ct1]
+            # Assuming all "other income sources" are taxed as standard income (vs LT cap gains, social security, etc.)
+            TotalStandardIncome[ct1] += Schedules['OtherIncome'][ct1]
+            TotalIncome[ct1] += Schedules['OtherIncome'][ct1]
 
         # Required Minimum Distributions (RMDs)
         for ct2 in range(np.shape(PreTax)[1]):
@@ -194,10 +198,7 @@ def ProjFinalBalanceTraditional(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RM
         RMDtotal[ct1] = np.sum(RMD[ct1,:])
 
         # Social security
-        TotalSS = 0.
-        for ct2 in range(len(IncDict['SocialSecurityPayments'])):
-            if Age[ct1,ct2] >= IncDict['AgeSSwillStart'][ct2]:
-                TotalSS += IncDict['SocialSecurityPayments'][ct2]
+        TotalSS = Schedules['TotalSS'][ct1]
 
         if TotalSS > 0.:
             TotalCash[ct1] += TotalSS
@@ -207,29 +208,10 @@ def ProjFinalBalanceTraditional(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RM
 
         # Make withdrawals as needed from PostTax lots to obtain cash needed for expenses
 
-        # First determine what percentage of lot is cap gains
-        CapGainPercentage = np.zeros(len(PostTax[ct1,:]))
-        for ct2 in range(len(CapGainPercentage)):
-            if PostTax[ct1,ct2] > 0.:
-                CapGainPercentage[ct2] = PostTaxCG[ct1,ct2] / PostTax[ct1,ct2]
-            else:
-                CapGainPercentage[ct2] = np.nan
-
-        # Set lots in order from highest % cap gains to highest, since most people likely have the default FIFO cost basis
-        CGpercentOrder = np.argsort(CapGainPercentage)[::-1]
-
-        # If first year, remove any indices in CGpercentOrder that correspond to LotPurchasedFirstYear = True
-        if ct1 == 0:
-            LotIndicesToRemove = np.where(IVdict['LotPurchasedFirstYear'])[0]
-            # Remove those indices
-            for ct2 in range(len(LotIndicesToRemove)):
-                CGpercentOrder = CGpercentOrder[CGpercentOrder != LotIndicesToRemove[ct2]]
-
-        # Then remove any indices in CGpercentOrder that correspond to CapGainPercentage = np.nan
-        LotIndicesToRemove = np.where(np.isnan(CapGainPercentage))[0]
-        # Remove those indices
-        for ct2 in range(len(LotIndicesToRemove)):
-            CGpercentOrder = CGpercentOrder[CGpercentOrder != LotIndicesToRemove[ct2]]
+        # Set lots in order from highest % cap gains to lowest, since most people likely have the default FIFO cost
+        # basis (leaving out any purchased the first year, to avoid short term cap gains)
+        CGpercentOrder = LotSaleOrder(BuildLotBook(PostTax[ct1,:],PostTaxCG[ct1,:],IVdict['LotPurchasedFirstYear'],ct1),
+                                      Descending=True)
 
         # Loop over non-zero lots
         for ct2 in range(len(CGpercentOrder)):
@@ -325,8 +307,7 @@ def ProjFinalBalanceTraditional(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RM
 
         # If CashMinusTaxes still less than TotalCashNeeded, you've run out of money!
         if TotalCashNeeded - TotalCash[ct1] >= 0.01:
-            print('Ran out of money!')
-            print('Age = '+str(Age[ct1,0]))
+            LogEvent('Warning','OutOfMoney',YearCt=ct1,Age=Age[ct1,0])
             OutOfMoneyAge = Age[ct1,0]
             break
 
@@ -344,6 +325,10 @@ def ProjFinalBalanceTraditional(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RM
         TaxesDict = ComputeTaxes(TaxRateInfo,FilingStatus,TotalStandardIncome[ct1],TotalLTcapGainsIncome[ct1])
         Taxes[ct1] = np.round(TaxesDict['Total'],2)
 
+        LogEvent('Debug','WithdrawalsExecuted',YearCt=ct1,TotalCash=TotalCash[ct1],TotalCashNeeded=TotalCashNeeded,
+                 TotalIncome=TotalIncome[ct1],TotalStandardIncome=TotalStandardIncome[ct1],
+                 TotalLTcapGainsIncome=TotalLTcapGainsIncome[ct1],Taxes=Taxes[ct1],Penalties=Penalties[ct1])
+
         # If ExcessCash > 0, need to reinvest
         ExcessCash = TotalCash[ct1] - TotalCashNeeded
         if ExcessCash >= 0.01:
@@ -372,6 +357,17 @@ def ProjFinalBalanceTraditional(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RM
         # Compute total assets
         TotalAssets[ct1] = PostTaxTotal[ct1] + PreTaxTotal[ct1] + PreTax457bTotal[ct1] + RothTotal[ct1] + CashCushion[ct1]
 
+        # Stop if the following years will provably run out of money (counting the refund of any taxes overpaid)
+        if StopIfProvablyOutOfMoney:
+            OutOfMoneyYearCt = ProvablyOutOfMoney(Bound,ct1,TotalAssets[ct1],
+                                                  max(EstimatedTaxesPaidThisYear[ct1] - Taxes[ct1],0.))
+            if OutOfMoneyYearCt is not None:
+                LogEvent('Warning','ProvablyOutOfMoney',YearCt=ct1,Age=Age[OutOfMoneyYearCt,0])
+                OutOfMoneyAge = Age[OutOfMoneyYearCt,0]
+                break
+
+    SetInstrumentationYear(None)
+
     # Assemble output dictionary
     ProjArrays = {'PreTax': PreTax,
                   'PreTaxTotal': PreTaxTotal,
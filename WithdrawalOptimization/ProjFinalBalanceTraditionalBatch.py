@@ -0,0 +1,446 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# ProjFinalBalanceTraditionalBatch.py
+
+import numpy as np
+
+from TaxableSSconsolidated import TaxableSSconsolidated
+from ComputeTaxes import ComputeTaxes
+from ComputeRMD import ComputeRMD
+from AddPostTaxLot import PostTaxLotCapacity
+from ProjFinalBalanceScenarios import GetNumScenarios
+from ProjectionSetup import ProjectionSetup
+from Instrumentation import SetInstrumentationYear
+from EventLog import LogEvent, EventLevelLogged
+
+# Project final balance with the traditional withdrawal method for many scenarios at once (e.g. the Traditional side of
+# a TPM vs Traditional sweep, or Monte Carlo return paths), returning a list with one ProjArrays per scenario, identical
+# to what ProjFinalBalanceTraditional returns for that scenario on its own. The arrays of each ProjArrays are views into
+# the batch arrays.
+# The inputs that can vary by scenario are those of ProjFinalBalanceScenarios (see ScenarioInputNdim there): give them a
+# leading scenario axis.
+# Since the traditional withdrawal order is fixed (PostTax lots from highest to lowest cap gain percentage, then 457b,
+# PreTax over 60, Roth, CashCushion, PreTax with penalty, Roth with penalty), every step of every year - including the
+# withdrawals - is a NumPy operation over the scenarios, masked to those the step applies to, instead of a projection
+# per scenario. Scenarios that run out of money are masked out of all later years, leaving their remaining years zero
+# just like ProjFinalBalanceTraditional.
+def ProjFinalBalanceTraditionalBatch(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject,R,
+                                     FilingStatus):
+
+    NumScenarios = GetNumScenarios(IVdict,IncDict,ExpDict,R)
+
+    # annual ROI of each scenario and year (see ProjFinalBalance)
+    if np.ndim(R) == 1:
+        ROI = np.zeros((NumScenarios,NumYearsToProject)) + R[:,None]
+    else:
+        ROI = np.zeros((NumScenarios,NumYearsToProject)) + R
+
+    # Ages, ROI, and expenses (of every scenario), other income and social security of every year
+    Setup = ProjectionSetup(IncDict,dict(ExpDict,Exp=np.zeros(NumScenarios)+ExpDict['Exp']),CurrentAge,
+                            NumYearsToProject,ROI)
+    Age = Setup['Age']
+    ROInoDividends = Setup['ROInoDividends']
+    Schedules = Setup['Schedules']
+
+    # Number of people (1 or 2)
+    NumPeople = np.shape(IVdict['PreTaxIV'])[-1]
+
+    # Initialize asset values, with a leading scenario axis. PostTax lots are preallocated (see AddPostTaxLot), with
+    # only the first NumLots[ct] columns in use by scenario ct.
+    NumInitialLots = np.shape(IVdict['PostTaxIV'])[-1]
+    NumLots = np.full(NumScenarios,NumInitialLots)
+    MaxNumLots = PostTaxLotCapacity(NumInitialLots,NumYearsToProject)
+    PreTax = np.zeros((NumScenarios,NumYearsToProject,NumPeople))
+    PreTax457b = np.zeros((NumScenarios,NumYearsToProject,NumPeople))
+    PostTax = np.zeros((NumScenarios,NumYearsToProject,MaxNumLots))
+    PostTaxCG = np.zeros((NumScenarios,NumYearsToProject,MaxNumLots))
+    Roth = np.zeros((NumScenarios,NumYearsToProject,NumPeople))
+    RothContributions = np.zeros((NumScenarios,NumYearsToProject,NumPeople))
+    CashCushion = np.zeros((NumScenarios,NumYearsToProject))
+    PreTaxTotal = np.zeros((NumScenarios,NumYearsToProject))
+    PreTax457bTotal = np.zeros((NumScenarios,NumYearsToProject))
+    PostTaxTotal = np.zeros((NumScenarios,NumYearsToProject))
+    CapGainsTotal = np.zeros((NumScenarios,NumYearsToProject))
+    RothTotal = np.zeros((NumScenarios,NumYearsToProject))
+    TotalAssets = np.zeros((NumScenarios,NumYearsToProject))
+
+    PreTax[:,0,:] = IVdict['PreTaxIV']
+    PreTax457b[:,0,:] = IVdict['PreTax457bIV']
+    PostTax[:,0,:NumInitialLots] = IVdict['PostTaxIV']
+    PostTaxCG[:,0,:NumInitialLots] = IVdict['CurrentUnrealizedCapGains']
+    Roth[:,0,:] = IVdict['RothIV']
+    RothContributions[:,0,:] = IVdict['RothContributions']
+    CashCushion[:,0] = IVdict['CashCushion']
+
+    # Initialize Yearly values
+    RMD = np.zeros((NumScenarios,NumYearsToProject,np.size(CurrentAge)))
+    TotalCash = np.zeros((NumScenarios,NumYearsToProject))
+    TotalCashNeeded = np.zeros((NumScenarios,NumYearsToProject))
+    TotalStandardIncome = np.zeros((NumScenarios,NumYearsToProject))
+    TotalLTcapGainsIncome = np.zeros((NumScenarios,NumYearsToProject))
+    TotalSSincome = np.zeros((NumScenarios,NumYearsToProject))
+    TotalIncome = np.zeros((NumScenarios,NumYearsToProject))
+    Expenses = np.zeros((NumScenarios,NumYearsToProject))
+    SpecifiedIncome = np.zeros(NumYearsToProject) #not used in this method, but it does make plotting consistent
+    Taxes = np.zeros((NumScenarios,NumYearsToProject))
+    TaxesGenPrevYear = np.zeros((NumScenarios,NumYearsToProject))
+    TaxesPaidPrevYear = np.zeros((NumScenarios,NumYearsToProject))
+    EstimatedTaxesPaidThisYear = np.zeros((NumScenarios,NumYearsToProject))
+    Penalties = np.zeros((NumScenarios,NumYearsToProject))
+    PenaltiesGenPrevYear = np.zeros((NumScenarios,NumYearsToProject))
+    PenaltiesPaidPrevYear = np.zeros((NumScenarios,NumYearsToProject))
+    EstimatedPenaltiesPaidThisYear = np.zeros((NumScenarios,NumYearsToProject))
+    RMDtotal = np.zeros((NumScenarios,NumYearsToProject))
+
+    TaxesGenPrevYear[:,0] = IVdict['TaxesGenPrevYear']
+    TaxesPaidPrevYear[:,0] = IVdict['TaxesPaidPrevYear']
+    PenaltiesGenPrevYear[:,0] = IVdict['PenaltiesGenPrevYear']
+    PenaltiesPaidPrevYear[:,0] = IVdict['PenaltiesPaidPrevYear']
+
+    OutOfMoneyAge = np.full(NumScenarios,np.nan)
+
+    # scenarios that still have money
+    Active = np.ones(NumScenarios,dtype=bool)
+
+    # Loop over years
+    for ct1 in range(0,NumYearsToProject):
+
+        # indices of active scenarios
+        Ind = np.flatnonzero(Active)
+        if np.size(Ind) == 0:
+            break
+
+        LogEvent('Info','YearStart',YearCt=ct1,Age=Age[ct1,0],NumScenarios=np.size(Ind))
+        SetInstrumentationYear(ct1)
+
+        # Apply investment growth to accounts if not at first year
+        if ct1 > 0:
+            # Tax advantaged accounts
+            PreTax[Ind,ct1,:] = np.round(PreTax[Ind,ct1-1,:]*(1+ROI[Ind,ct1-1,None]),2)
+            PreTax457b[Ind,ct1,:] = np.round(PreTax457b[Ind,ct1-1,:]*(1+ROI[Ind,ct1-1,None]),2)
+            Roth[Ind,ct1,:] = np.round(Roth[Ind,ct1-1,:]*(1+ROI[Ind,ct1-1,None]),2)
+            RothContributions[Ind,ct1,:] = RothContributions[Ind,ct1-1,:]
+            CashCushion[Ind,ct1] = CashCushion[Ind,ct1-1]
+            # post-tax lots, up to the most lots in use by any scenario (unused lots are zero, and stay zero)
+            MaxLots = np.max(NumLots[Ind])
+            # Compute gains, add to capital gains array
+            PostTaxCG[Ind,ct1,:MaxLots] = PostTaxCG[Ind,ct1-1,:MaxLots] + \
+                                          np.round(PostTax[Ind,ct1-1,:MaxLots]*ROInoDividends[Ind,ct1-1,None],2)
+            # Then add to PostTax array
+            PostTax[Ind,ct1,:MaxLots] = np.round(PostTax[Ind,ct1-1,:MaxLots]*(1+ROInoDividends[Ind,ct1-1,None]),2)
+
+            TaxesGenPrevYear[Ind,ct1] = Taxes[Ind,ct1-1]
+            PenaltiesGenPrevYear[Ind,ct1] = Penalties[Ind,ct1-1]
+            TaxesPaidPrevYear[Ind,ct1] = EstimatedTaxesPaidThisYear[Ind,ct1-1]
+            PenaltiesPaidPrevYear[Ind,ct1] = EstimatedPenaltiesPaidThisYear[Ind,ct1-1]
+
+        # Expenses for current year
+        Expenses[Ind,ct1] = Schedules['Expenses'][Ind,ct1]
+
+        # Taxes/Penalties
+
+        # If taxes paid last year exceed what was owed, collect that refund (into a new PostTax lot), otherwise need to
+        # pay the amount owed this year
+        TaxDiff = TaxesPaidPrevYear[Ind,ct1] - TaxesGenPrevYear[Ind,ct1]
+        AddPostTaxLots(PostTax,PostTaxCG,NumLots,Ind[TaxDiff > 0.],TaxDiff[TaxDiff > 0.],ct1)
+        TaxesStillOwed = np.where(TaxDiff > 0.,0.,TaxesGenPrevYear[Ind,ct1] - TaxesPaidPrevYear[Ind,ct1])
+
+        # If penalties paid last year exceed what was owed, collect that refund (into a new PostTax lot), otherwise need
+        # to pay the amount owed this year
+        PenaltiesDiff = PenaltiesPaidPrevYear[Ind,ct1] - PenaltiesGenPrevYear[Ind,ct1]
+        AddPostTaxLots(PostTax,PostTaxCG,NumLots,Ind[PenaltiesDiff > 0.],PenaltiesDiff[PenaltiesDiff > 0.],ct1)
+        PenaltiesStillOwed = np.where(PenaltiesDiff > 0.,0.,
+                                      PenaltiesGenPrevYear[Ind,ct1] - PenaltiesPaidPrevYear[Ind,ct1])
+
+        # Taxes to pay this year, the amount you paid last year (see ProjFinalBalanceTraditional)
+        EstimatedTaxesPaidThisYear[Ind,ct1] = TaxesGenPrevYear[Ind,ct1]
+        EstimatedPenaltiesPaidThisYear[Ind,ct1] = 0.
+
+        # Compute cash needed this year
+        TotalCashNeeded[Ind,ct1] = Expenses[Ind,ct1] + TaxesStillOwed + PenaltiesStillOwed + \
+                                   EstimatedTaxesPaidThisYear[Ind,ct1] + EstimatedPenaltiesPaidThisYear[Ind,ct1]
+        CashNeeded = TotalCashNeeded[Ind,ct1]
+
+        # Dividends
+        PostTaxSum = LotSums(PostTax[:,ct1,:],NumLots,Ind)
+        TotalCash[Ind,ct1] += IncDict['QualifiedDividendYield'] * PostTaxSum + \
+                              IncDict['NonQualifiedDividendYield'] * PostTaxSum
+        TotalStandardIncome[Ind,ct1] += IncDict['NonQualifiedDividendYield'] * PostTaxSum
+        TotalLTcapGainsIncome[Ind,ct1] += IncDict['QualifiedDividendYield'] * PostTaxSum
+        TotalIncome[Ind,ct1] += IncDict['QualifiedDividendYield'] * PostTaxSum + \
+                                IncDict['NonQualifiedDividendYield'] * PostTaxSum
+
+        # Other income
+        if Schedules['OtherIncome'][ct1] != 0.:
+            TotalCash[Ind,ct1] += Schedules['OtherIncome'][ct1]
+            # Assuming all "other income sources" are taxed as standard income (vs LT cap gains, social security, etc.)
+            TotalStandardIncome[Ind,ct1] += Schedules['OtherIncome'][ct1]
+            TotalIncome[Ind,ct1] += Schedules['OtherIncome'][ct1]
+
+        # Required Minimum Distributions (RMDs), of every scenario at once (ages are the same in every scenario)
+        for ct2 in range(NumPeople):
+            if Age[ct1,ct2] >= RMDstartAge[ct2]:
+                # PreTax
+                RMDpretax, WR = ComputeRMD(PreTax[Ind,ct1,ct2],Age[ct1,ct2])
+                # 457b
+                RMD457b, WR = ComputeRMD(PreTax457b[Ind,ct1,ct2],Age[ct1,ct2])
+                # Sum of all pretax accounts
+                RMD[Ind,ct1,ct2] = RMDpretax + RMD457b
+                # Add to cash and income totals
+                TotalCash[Ind,ct1] += RMD[Ind,ct1,ct2]
+                TotalStandardIncome[Ind,ct1] += RMD[Ind,ct1,ct2]
+                TotalIncome[Ind,ct1] += RMD[Ind,ct1,ct2]
+                # Remove from pretax accounts
+                PreTax[Ind,ct1,ct2] -= RMDpretax
+                PreTax457b[Ind,ct1,ct2] -= RMD457b
+
+        RMDtotal[Ind,ct1] = np.sum(RMD[Ind,ct1,:],axis=1)
+
+        # Social security
+        TotalSS = Schedules['TotalSS'][ct1]
+
+        if TotalSS > 0.:
+            TotalCash[Ind,ct1] += TotalSS
+            TotalSSincome[Ind,ct1] = TotalSS
+
+        # Make withdrawals as needed from PostTax lots to obtain cash needed for expenses
+        SellPostTaxLots(PostTax,PostTaxCG,NumLots,TotalCash,TotalLTcapGainsIncome,TotalIncome,CashNeeded,
+                        IVdict['LotPurchasedFirstYear'],Ind,ct1)
+
+        # If still not enough cash, withdraw from 457b, then PreTax (over 60), then Roth (only contributions, if under
+        # 60), then CashCushion, then PreTax with the 10% penalty (under 60), then Roth with the 10% penalty (under 60)
+        for ct2 in range(NumPeople):
+            WithdrawTraditional(PreTax457b[:,ct1,ct2],TotalCash,TotalStandardIncome,TotalIncome,CashNeeded,Ind,ct1,
+                                StrictlyGreater=False)
+        for ct2 in range(NumPeople):
+            if Age[ct1,ct2] >= 60.:
+                WithdrawTraditional(PreTax[:,ct1,ct2],TotalCash,TotalStandardIncome,TotalIncome,CashNeeded,Ind,ct1)
+        for ct2 in range(NumPeople):
+            WithdrawRothTraditional(Roth[:,ct1,ct2],RothContributions[:,ct1,ct2],TotalCash,CashNeeded,Age[ct1,ct2],
+                                    Ind,ct1)
+        # CashCushion is like a (tax free) account of its own
+        WithdrawTraditional(CashCushion[:,ct1],TotalCash,None,None,CashNeeded,Ind,ct1)
+        for ct2 in range(NumPeople):
+            if Age[ct1,ct2] < 60.:
+                WithdrawTraditional(PreTax[:,ct1,ct2],TotalCash,TotalStandardIncome,TotalIncome,CashNeeded,Ind,ct1,
+                                    StrictlyGreater=False,Penalties=Penalties,EmptyAccounts=False)
+        # Traditional method does not contain Roth rollovers, so after original contributions gone, only earnings remain
+        for ct2 in range(NumPeople):
+            if Age[ct1,ct2] < 60.:
+                WithdrawTraditional(Roth[:,ct1,ct2],TotalCash,TotalStandardIncome,TotalIncome,CashNeeded,Ind,ct1,
+                                    StrictlyGreater=False,Penalties=Penalties,EmptyAccounts=True)
+
+        # If CashMinusTaxes still less than TotalCashNeeded, that scenario has run out of money!
+        OutOfMoney = CashNeeded - TotalCash[Ind,ct1] >= 0.01
+        OutOfMoneyAge[Ind[OutOfMoney]] = Age[ct1,0]
+        for ct in Ind[OutOfMoney]:
+            LogEvent('Warning','OutOfMoney',YearCt=ct1,Age=Age[ct1,0],Scenario=ct)
+        Active[Ind[OutOfMoney]] = False
+        Ind = Ind[~OutOfMoney]
+        CashNeeded = CashNeeded[~OutOfMoney]
+
+        # After obtaining cash needed:
+
+        # Determine how much of social security income will be taxable
+        if TotalSS > 0.:
+            TaxableSSincome = TaxableSSconsolidated(TotalStandardIncome[Ind,ct1] + TotalLTcapGainsIncome[Ind,ct1],
+                                                    TotalSS,FilingStatus)
+            # Add to TotalStandardIncome[ct1] and TotalIncome[ct1]:
+            TotalStandardIncome[Ind,ct1] += TaxableSSincome
+            TotalIncome[Ind,ct1] += TaxableSSincome
+
+        # Compute taxes
+        TaxesDict = ComputeTaxes(TaxRateInfo,FilingStatus,TotalStandardIncome[Ind,ct1],TotalLTcapGainsIncome[Ind,ct1])
+        Taxes[Ind,ct1] = np.round(TaxesDict['Total'],2)
+
+        if EventLevelLogged('Debug'):
+            for ct in Ind:
+                LogEvent('Debug','WithdrawalsExecuted',YearCt=ct1,TotalCash=TotalCash[ct,ct1],
+                         TotalCashNeeded=TotalCashNeeded[ct,ct1],TotalIncome=TotalIncome[ct,ct1],
+                         TotalStandardIncome=TotalStandardIncome[ct,ct1],
+                         TotalLTcapGainsIncome=TotalLTcapGainsIncome[ct,ct1],Taxes=Taxes[ct,ct1],
+                         Penalties=Penalties[ct,ct1],Scenario=ct)
+
+        # If ExcessCash > 0, need to reinvest into a new PostTax lot
+        ExcessCash = TotalCash[Ind,ct1] - CashNeeded
+        AddPostTaxLots(PostTax,PostTaxCG,NumLots,Ind[ExcessCash >= 0.01],ExcessCash[ExcessCash >= 0.01],ct1)
+
+        # Compute total PostTax and total cap gains
+        PostTaxTotal[Ind,ct1] = LotSums(PostTax[:,ct1,:],NumLots,Ind)
+        CapGainsTotal[Ind,ct1] = LotSums(PostTaxCG[:,ct1,:],NumLots,Ind)
+
+        # Compute total PreTax, PreTax457b and Roth
+        PreTaxTotal[Ind,ct1] = np.sum(PreTax[Ind,ct1,:],axis=1)
+        PreTax457bTotal[Ind,ct1] = np.sum(PreTax457b[Ind,ct1,:],axis=1)
+        RothTotal[Ind,ct1] = np.sum(Roth[Ind,ct1,:],axis=1)
+
+        # Compute total assets
+        TotalAssets[Ind,ct1] = PostTaxTotal[Ind,ct1] + PreTaxTotal[Ind,ct1] + PreTax457bTotal[Ind,ct1] + \
+                               RothTotal[Ind,ct1] + CashCushion[Ind,ct1]
+
+    SetInstrumentationYear(None)
+
+    # Assemble output dictionaries, one per scenario
+    ProjArraysList = []
+    for ct in range(NumScenarios):
+        ProjArraysList.append({'PreTax': PreTax[ct],
+                               'PreTaxTotal': PreTaxTotal[ct],
+                               'PreTax457b': PreTax457b[ct],
+                               'PreTax457bTotal': PreTax457bTotal[ct],
+                               'PostTax': PostTax[ct,:,:NumLots[ct]], # trimmed to the lots actually used
+                               'PostTaxCG': PostTaxCG[ct,:,:NumLots[ct]],
+                               'Roth': Roth[ct],
+                               'RothTotal': RothTotal[ct],
+                               'CashCushion': CashCushion[ct],
+                               'PostTaxTotal': PostTaxTotal[ct],
+                               'CapGainsTotal': CapGainsTotal[ct],
+                               'TotalAssets': TotalAssets[ct],
+                               'Age': Age,
+                               'OutOfMoneyAge': OutOfMoneyAge[ct],
+                               'TotalCash': TotalCash[ct],
+                               'TotalStandardIncome': TotalStandardIncome[ct],
+                               'TotalLTcapGainsIncome': TotalLTcapGainsIncome[ct],
+                               'TotalSSincome': TotalSSincome[ct],
+                               'TotalIncome': TotalIncome[ct],
+                               'Expenses': Expenses[ct],
+                               'SpecifiedIncome': SpecifiedIncome,
+                               'Taxes': Taxes[ct],
+                               'Penalties': Penalties[ct],
+                               'RMDtotal': RMDtotal[ct]})
+
+    return ProjArraysList
+
+# Purchase a new PostTax lot of Amounts[ct] for each scenario in LotInd (see AddPostTaxLot)
+def AddPostTaxLots(PostTax,PostTaxCG,NumLots,LotInd,Amounts,YearCt):
+
+    PostTax[LotInd,YearCt,NumLots[LotInd]] = Amounts
+    PostTaxCG[LotInd,YearCt,NumLots[LotInd]] = 0.
+    NumLots[LotInd] += 1
+
+# Sum of the lots in use (Lots is scenarios x lots), for each scenario in Ind. Scenarios with the same number of lots
+# are summed together, so each sum is over exactly that scenario's lots, and so identical to
+# ProjFinalBalanceTraditional's (extra zero lots would change the order numpy adds the lots up in).
+def LotSums(Lots,NumLots,Ind):
+
+    Sums = np.zeros(len(Ind))
+    for Num in np.unique(NumLots[Ind]):
+        SameNum = NumLots[Ind] == Num
+        Sums[SameNum] = np.sum(Lots[Ind[SameNum],:Num],axis=1)
+
+    return Sums
+
+# Sell PostTax lots, from highest to lowest cap gain percentage (see LotSaleOrder, leaving out lots purchased the first
+# year), until each scenario in Ind has the cash it needs: one lot of every scenario at a time
+def SellPostTaxLots(PostTax,PostTaxCG,NumLots,TotalCash,TotalLTcapGainsIncome,TotalIncome,CashNeeded,
+                    LotPurchasedFirstYear,Ind,YearCt):
+
+    MaxLots = np.max(NumLots[Ind])
+    Bal = PostTax[Ind,YearCt,:MaxLots]
+    CG = PostTaxCG[Ind,YearCt,:MaxLots]
+
+    # Cap gain percentage of each non-empty lot (nan for empty lots, and those that can't be sold), in ascending order
+    # with ties in lot index order (as BuildLotBook), and the empty lots last
+    CapGainPercentage = np.full(np.shape(Bal),np.nan)
+    NonEmpty = Bal > 0.
+    if YearCt == 0:
+        NonEmpty[:,:len(LotPurchasedFirstYear)] &= ~np.asarray(LotPurchasedFirstYear,dtype=bool)
+    CapGainPercentage[NonEmpty] = CG[NonEmpty] / Bal[NonEmpty]
+    Order = np.argsort(CapGainPercentage,axis=1,kind='stable')
+    NumNonEmpty = np.sum(NonEmpty,axis=1)
+
+    # Sale position ct2 is the lot with the ct2-th highest percentage
+    for ct2 in range(np.max(NumNonEmpty,initial=0)):
+
+        RemainingCashNeeded = CashNeeded - TotalCash[Ind,YearCt]
+        Selling = (ct2 < NumNonEmpty) & (RemainingCashNeeded > 0.)
+        if not np.any(Selling):
+            break
+        Rows = np.flatnonzero(Selling)
+        LotInd = Order[Rows,NumNonEmpty[Rows]-1-ct2]
+        LotBal = Bal[Rows,LotInd]
+        LotCG = CG[Rows,LotInd]
+        Remaining = RemainingCashNeeded[Rows]
+
+        # If assets from this lot > RemainingCashNeeded, sell the fraction of the lot needed to reach exactly
+        # RemainingCashNeeded, otherwise sell the entire lot
+        Partial = LotBal > Remaining
+        Fraction = Remaining / LotBal
+        CashGenerated = np.where(Partial,np.round(LotBal * Fraction,2),LotBal)
+        CapGainGenerated = np.where(Partial,np.round(LotCG * Fraction,2),LotCG)
+
+        # Add CashGenerated to TotalCash, remove from PostTax balance
+        TotalCash[Ind[Rows],YearCt] += CashGenerated
+        Bal[Rows,LotInd] -= CashGenerated
+
+        # Add CapGainGenerated to TotalLTcapGainsIncome and TotalIncome, remove from PostTaxCG
+        TotalLTcapGainsIncome[Ind[Rows],YearCt] += CapGainGenerated
+        TotalIncome[Ind[Rows],YearCt] += CapGainGenerated
+        CG[Rows,LotInd] -= CapGainGenerated
+
+    PostTax[Ind,YearCt,:MaxLots] = Bal
+    PostTaxCG[Ind,YearCt,:MaxLots] = CG
+
+# Withdraw from Account (one balance per scenario) the remaining cash needed by each scenario in Ind, or the entire
+# balance if that's not enough (as WithdrawFrom457bTraditional / WithdrawFromPreTaxTraditional, with StrictlyGreater
+# the comparison the latter uses). Withdrawals are added to the standard income (unless StandardIncome is None), and
+# with Penalties, also incur the 10% penalty: as WithdrawFromPreTaxTraditionalWithPenalty (EmptyAccounts = False) or
+# WithdrawFromRothTraditionalWithPenalty (EmptyAccounts = True, which also "withdraws" from empty accounts).
+def WithdrawTraditional(Account,TotalCash,StandardIncome,Income,CashNeeded,Ind,YearCt,StrictlyGreater=True,
+                        Penalties=None,EmptyAccounts=False):
+
+    RemainingCashNeeded = CashNeeded - TotalCash[Ind,YearCt]
+    Balance = Account[Ind]
+    Withdrawing = RemainingCashNeeded > 0.
+    if not EmptyAccounts:
+        Withdrawing &= Balance > 0.
+    if not np.any(Withdrawing):
+        return
+    Rows = np.flatnonzero(Withdrawing)
+    WithdrawInd = Ind[Rows]
+    Balance = Balance[Rows]
+    Remaining = RemainingCashNeeded[Rows]
+
+    # if enough funds to cover the entire remainder, withdraw that, otherwise the remaining balance
+    if StrictlyGreater:
+        CoversRemainder = Balance > Remaining
+    else:
+        CoversRemainder = Balance >= Remaining
+    Withdrawal = np.where(CoversRemainder,Remaining,Balance)
+
+    TotalCash[WithdrawInd,YearCt] += Withdrawal
+    if StandardIncome is not None:
+        StandardIncome[WithdrawInd,YearCt] += Withdrawal
+        Income[WithdrawInd,YearCt] += Withdrawal
+    Account[WithdrawInd] = np.where(CoversRemainder,Balance - Remaining,0.)
+    if Penalties is not None:
+        Penalties[WithdrawInd,YearCt] += np.where(CoversRemainder,np.round(0.1*Remaining,2),0.1*Balance)
+
+# Withdraw from Roth (as WithdrawFromRothTraditional) the remaining cash needed by each scenario in Ind: from the entire
+# balance at 60 or over, otherwise only from contributions
+def WithdrawRothTraditional(Roth,RothContributions,TotalCash,CashNeeded,Age,Ind,YearCt):
+
+    RemainingCashNeeded = CashNeeded - TotalCash[Ind,YearCt]
+    Withdrawing = (RemainingCashNeeded > 0.) & (Roth[Ind] > 0.)
+    if not np.any(Withdrawing):
+        return
+    Rows = np.flatnonzero(Withdrawing)
+    WithdrawInd = Ind[Rows]
+    Balance = Roth[WithdrawInd]
+    Remaining = RemainingCashNeeded[Rows]
+
+    if Age >= 60.:
+        # pull from entire balance without worrying about anything - no penalties or taxes
+        CoversRemainder = Balance > Remaining
+        Withdrawal = np.where(CoversRemainder,Remaining,Balance)
+        TotalCash[WithdrawInd,YearCt] += Withdrawal
+        Roth[WithdrawInd] = np.where(CoversRemainder,Balance - Remaining,0.)
+    else:
+        # haven't hit 60 (actually 59.5) yet, so only pull from original contributions (or the balance, if lower)
+        MinVal = np.minimum(RothContributions[WithdrawInd],Balance)
+        Withdrawal = np.where(MinVal > Remaining,Remaining,MinVal)
+        TotalCash[WithdrawInd,YearCt] += Withdrawal
+        RothContributions[WithdrawInd] -= Withdrawal
+        Roth[WithdrawInd] = Balance - Withdrawal
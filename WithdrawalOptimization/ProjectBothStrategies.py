@@ -0,0 +1,75 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# ProjectBothStrategies.py
+
+import numpy as np
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from ProjFinalBalance import ProjFinalBalance
+from ProjFinalBalanceTraditional import ProjFinalBalanceTraditional
+from ProjectionSetup import ProjectionSetup
+from ProjectionCache import CachedProjection
+
+# Yearly totals compared between the two withdrawal methods (TPM - Traditional), e.g. for the TPMvsTraditionalDiff plots
+DiffKeys = ['TotalAssets','PostTaxTotal','PreTaxTotal','PreTax457bTotal','RothTotal','CashCushion','CapGainsTotal',
+            'TotalCash','SpecifiedIncome','TotalStandardIncome','TotalLTcapGainsIncome','TotalSSincome','TotalIncome',
+            'Expenses','Taxes','Penalties','RMDtotal']
+
+# Project the same inputs with both the TPM (ProjFinalBalance) and Traditional (ProjFinalBalanceTraditional) withdrawal
+# methods, from a single ProjectionSetup (ages, ROI and yearly schedules) shared by the two. With NumWorkers > 1, the
+# two projections run in parallel processes (which saves at most the time of the faster projection, less the time to
+# start the processes). With UseCache, each projection is loaded from / saved to the projection
+# cache in CacheDir (see ProjectionCache.py), under the same entry as when it's run on its own.
+# Returns a dict:
+# 'TPM': ProjArrays of the TPM projection
+# 'Traditional': ProjArrays of the Traditional projection
+# 'Diff': TPM - Traditional, of each of the yearly totals in DiffKeys and of OutOfMoneyAge (see StrategyDiff)
+def ProjectBothStrategies(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject,R,FilingStatus,
+                          TPMwithdraw457bFirst,NumWorkers=1,CacheDir='./ProjectionCache/',MaxCacheSize=500.e6,
+                          UseCache=False):
+
+    Setup = ProjectionSetup(IncDict,ExpDict,CurrentAge,NumYearsToProject,R)
+
+    ArgsList = [('TPM',(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject,R,FilingStatus,
+                        TPMwithdraw457bFirst),Setup,CacheDir,MaxCacheSize,UseCache),
+                ('Traditional',(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject,R,
+                                FilingStatus),Setup,CacheDir,MaxCacheSize,UseCache)]
+
+    # Worker processes are forked, as in MonteCarloProjection (the templates have no if __name__ == '__main__' guard).
+    # Where fork isn't available (e.g. Windows), the projections run one after the other.
+    if NumWorkers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        with ProcessPoolExecutor(max_workers=2,mp_context=multiprocessing.get_context('fork')) as executor:
+            ProjArrays, ProjArraysTraditional = executor.map(ProjectStrategy,*zip(*ArgsList))
+    else:
+        ProjArrays, ProjArraysTraditional = [ProjectStrategy(*Args) for Args in ArgsList]
+
+    BothDict = {'TPM': ProjArrays,
+                'Traditional': ProjArraysTraditional,
+                'Diff': StrategyDiff(ProjArrays,ProjArraysTraditional)}
+
+    return BothDict
+
+# Project Args (deep copied, since the projections can modify their inputs) with one withdrawal method, from Setup
+def ProjectStrategy(Method,Args,Setup,CacheDir,MaxCacheSize,UseCache):
+
+    if Method == 'TPM':
+        ProjFunction = ProjFinalBalance
+    else:
+        ProjFunction = ProjFinalBalanceTraditional
+
+    return CachedProjection(ProjFunction,Args,CacheDir,MaxCacheSize,UseCache,DerivedKwargs={'Setup': Setup})
+
+# Differences between the results of the two withdrawal methods (TPM - Traditional): each of the yearly totals in
+# DiffKeys, and OutOfMoneyAge (nan unless both run out of money)
+def StrategyDiff(ProjArrays,ProjArraysTraditional):
+
+    Diff = {}
+    for Key in DiffKeys:
+        Diff[Key] = ProjArrays[Key] - ProjArraysTraditional[Key]
+    Diff['OutOfMoneyAge'] = ProjArrays['OutOfMoneyAge'] - ProjArraysTraditional['OutOfMoneyAge']
+
+    return Diff
@@ -0,0 +1,124 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# ProjectVariants.py
+
+import numpy as np
+import copy
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from ProjFinalBalance import ProjFinalBalance
+from YearlySchedules import YearlySchedules
+
+# Project a base case plus a list of input variants with ProjFinalBalance, simulating the years the variants share with
+# the base case only once. Each variant in VariantList is a dict of replaced inputs, any of:
+# 'IncDict': dict of IncDict entries to replace, e.g. {'MaxStandardIncomeChange': np.array([5000.])}
+# 'ExpDict': dict of ExpDict entries to replace, e.g. {'FutureExpenseAdjustmentsAge': np.array([60.])}
+# 'R': replacement R (single value, or one value per year)
+# 'IVdict': dict of IVdict entries to replace, e.g. {'RothIV': np.array([110000.])} (always differs from the first year)
+# A variant whose inputs first differ from the base case in year Y (e.g. a change in an expense adjustment / income
+# target that starts at a later age) is resumed from the base case's checkpoint at the end of year Y-1, so only years Y
+# onward are simulated for it. Results are identical to projecting each variant from scratch. With NumWorkers > 1, the
+# variants are projected in parallel processes (after the base case).
+# Returns the base case ProjArrays, and a list of the variants' ProjArrays.
+def ProjectVariants(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject,R,FilingStatus,
+                    TPMwithdraw457bFirst,VariantList,NumWorkers=1):
+
+    # Full inputs of each variant, and the first year they differ from the base case
+    VariantInputs = []
+    DivergentYear = np.zeros(len(VariantList),dtype=int)
+    for ct in range(len(VariantList)):
+        VariantIVdict = copy.deepcopy(IVdict)
+        VariantIVdict.update(VariantList[ct].get('IVdict',{}))
+        VariantIncDict = copy.deepcopy(IncDict)
+        VariantIncDict.update(VariantList[ct].get('IncDict',{}))
+        VariantExpDict = copy.deepcopy(ExpDict)
+        VariantExpDict.update(VariantList[ct].get('ExpDict',{}))
+        VariantR = VariantList[ct].get('R',R)
+        VariantInputs.append((VariantIVdict,VariantIncDict,VariantExpDict,VariantR))
+        if any(not InputsEqual(IVdict.get(Key),VariantIVdict.get(Key)) for Key in set(IVdict) | set(VariantIVdict)):
+            DivergentYear[ct] = 0
+        else:
+            DivergentYear[ct] = FirstDivergentYear(IncDict,ExpDict,R,VariantIncDict,VariantExpDict,VariantR,
+                                                   CurrentAge,NumYearsToProject)
+
+    # Base case, with a checkpoint at the end of the last year each variant shares with it (deep copy inputs, since the
+    # projection can modify them)
+    CheckpointYears = set(DivergentYear[DivergentYear > 0] - 1)
+    BaseProjArrays = ProjFinalBalance(TaxRateInfo,copy.deepcopy(IVdict),copy.deepcopy(IncDict),copy.deepcopy(ExpDict),
+                                      CurrentAge,RMDstartAge,NumYearsToProject,R,FilingStatus,TPMwithdraw457bFirst,
+                                      CheckpointYears=CheckpointYears)
+    Checkpoints = BaseProjArrays.pop('Checkpoints',{})
+
+    # Variants identical to the base case in every year just copy it
+    ProjectedInd = [ct for ct in range(len(VariantList)) if DivergentYear[ct] < NumYearsToProject]
+    # ResumeState is None (project from the first year) if the variant differs from the first year, or if the base case
+    # ran out of money before the checkpoint year (in which case so does the variant, identically)
+    ArgsList = []
+    for ct in ProjectedInd:
+        VariantIVdict, VariantIncDict, VariantExpDict, VariantR = VariantInputs[ct]
+        ArgsList.append((TaxRateInfo,VariantIVdict,VariantIncDict,VariantExpDict,CurrentAge,RMDstartAge,
+                         NumYearsToProject,VariantR,FilingStatus,TPMwithdraw457bFirst,(),
+                         Checkpoints.get(DivergentYear[ct]-1)))
+
+    # Worker processes are forked, as in MonteCarloProjection (the templates have no if __name__ == '__main__' guard).
+    # Where fork isn't available (e.g. Windows), the variants are projected one after the other.
+    if NumWorkers > 1 and len(ArgsList) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        with ProcessPoolExecutor(max_workers=NumWorkers,mp_context=multiprocessing.get_context('fork')) as executor:
+            ProjectedList = list(executor.map(ProjFinalBalance,*zip(*ArgsList)))
+    else:
+        ProjectedList = [ProjFinalBalance(*Args) for Args in ArgsList]
+
+    VariantProjArraysList = [None]*len(VariantList)
+    for ct, ProjArrays in zip(ProjectedInd,ProjectedList):
+        VariantProjArraysList[ct] = ProjArrays
+    for ct in range(len(VariantList)):
+        if VariantProjArraysList[ct] is None:
+            VariantProjArraysList[ct] = copy.deepcopy(BaseProjArrays)
+
+    return BaseProjArrays, VariantProjArraysList
+
+# First year count (0 = first year) whose ProjFinalBalance inputs differ between two sets of inputs, or
+# NumYearsToProject if they never do. Entries applied from a given age (expense adjustments, income target changes,
+# other income sources, social security) are compared year by year through their schedules, as are per-year returns.
+# Any other difference (e.g. dividend yields, ACA inputs) counts as differing from the first year.
+def FirstDivergentYear(IncDict,ExpDict,R,VariantIncDict,VariantExpDict,VariantR,CurrentAge,NumYearsToProject):
+
+    ScheduledIncKeys = ['SpecifiedIncome','SpecifiedIncomeChange','AgeSpecifiedIncomeChangeWillStart',
+                        'MaxStandardIncome','MaxStandardIncomeChange','AgeMaxStandardIncomeChangeWillStart',
+                        'OtherIncomeSources','AgeOtherIncomeSourcesWillStart','SocialSecurityPayments','AgeSSwillStart']
+    ScheduledExpKeys = ['Exp','ExpRate','FutureExpenseAdjustments','FutureExpenseAdjustmentsAge']
+
+    # Unscheduled inputs
+    for Key in set(IncDict) | set(VariantIncDict):
+        if Key not in ScheduledIncKeys and not InputsEqual(IncDict.get(Key),VariantIncDict.get(Key)):
+            return 0
+    for Key in set(ExpDict) | set(VariantExpDict):
+        if Key not in ScheduledExpKeys and not InputsEqual(ExpDict.get(Key),VariantExpDict.get(Key)):
+            return 0
+
+    # Year by year inputs: the projection only uses each year's values of the schedules (see YearlySchedules), and the
+    # return applied going into each year (R[ct] is the return earned over year ct, so first affects year ct+1)
+    Age = np.asarray(CurrentAge,dtype=float) + np.arange(NumYearsToProject)[:,None]
+    Schedules = YearlySchedules(IncDict,ExpDict,Age)
+    VariantSchedules = YearlySchedules(VariantIncDict,VariantExpDict,Age)
+    Differs = np.zeros(NumYearsToProject,dtype=bool)
+    for Key in Schedules:
+        Differs |= Schedules[Key] != VariantSchedules[Key]
+    Differs[1:] |= (np.zeros(NumYearsToProject) + R)[:-1] != (np.zeros(NumYearsToProject) + VariantR)[:-1]
+
+    if np.any(Differs):
+        return int(np.argmax(Differs))
+
+    return NumYearsToProject
+
+# Whether two input values (numbers, strings, bools, arrays) are equal
+def InputsEqual(Value1,Value2):
+
+    if isinstance(Value1,np.ndarray) or isinstance(Value2,np.ndarray):
+        return np.shape(Value1) == np.shape(Value2) and np.array_equal(Value1,Value2)
+
+    return Value1 == Value2
@@ -0,0 +1,78 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# ProjectionBenchmark.py
+
+import numpy as np
+import copy
+import time
+from TaxRateInfoInput import TaxRateInfoInput
+from ProjFinalBalance import ProjFinalBalance
+from ProjFinalBalanceTraditional import ProjFinalBalanceTraditional
+
+# Benchmark a single 52-year projection (TPM and Traditional methods), on the template's single filer example. Each case
+# is run NumRuns times and the best time reported, to reduce noise from whatever else the machine is doing. Run as a
+# script: python ProjectionBenchmark.py
+
+# Inputs
+NumRuns = 5
+
+TaxRateInfo = TaxRateInfoInput()
+
+IVdict = {'PreTaxIV': np.array([400000.]), 'PreTax457bIV': np.array([100000.]), 'RothIV': np.array([100000.]),
+          'RothContributions': np.array([60000.]), 'PostTaxIV': np.full(8,50000.),
+          'CurrentUnrealizedCapGains': np.full(8,40000.), 'LotPurchasedFirstYear': np.array([False]*7+[True]),
+          'RothConversionAmount': np.array([]), 'RothConversionAge': np.array([]),
+          'RothConversionPerson': np.array([],dtype=int), 'CashCushion': 0., 'TaxesGenPrevYear': 0.,
+          'TaxesPaidPrevYear': 0., 'PenaltiesGenPrevYear': 0., 'PenaltiesPaidPrevYear': 0.}
+
+IncDict = {'QualifiedDividendYield': 0.016, 'NonQualifiedDividendYield': 0.,
+           'SocialSecurityPayments': np.array([17000.]), 'AgeSSwillStart': np.array([67.]),
+           'OtherIncomeSources': np.array([]), 'AgeOtherIncomeSourcesWillStart': np.array([]),
+           'MaxStandardIncome': TaxRateInfo['SingleStandardDeduction'], 'MaxStandardIncomeChange': np.array([]),
+           'AgeMaxStandardIncomeChangeWillStart': np.array([]), 'SpecifiedIncome': 40000.,
+           'SpecifiedIncomeChange': np.array([TaxRateInfo['SingleStandardDeduction'] +
+                                              TaxRateInfo['SingleIncomeBracketLTcapGainsMins'][1] - 40000.]),
+           'AgeSpecifiedIncomeChangeWillStart': np.array([65.]),
+           'TryIncreasingPostTaxWithdrawalAndMaybeReducingStdIncFlag': False,
+           'AdjustTaxBillIfIncomeForACAsubsidiesNotMet': True, 'ExpectedIncomeForACAsubsidies': 40000.,
+           'NumPeopleOnACA': 1, 'BenchmarkPrice': 454.*12., 'Residence': 'Contiguous'}
+
+ExpDict = {'Exp': 40000., 'ExpRate': 0., 'FutureExpenseAdjustments': np.array([-9600.]),
+           'FutureExpenseAdjustmentsAge': np.array([66.])}
+
+CurrentAge = np.array([40])
+RMDstartAge = np.array([75.])
+NumYearsToProject = 52
+R = 0.07
+FilingStatus = 'Single'
+TPMwithdraw457bFirst = True
+
+# Best time over NumRuns runs of Fn (with a fresh deep copy of the input dicts each run, since the projection modifies
+# them). The projections are silent, with no event log listener attached.
+def BestTime(Fn,Args,NumRuns):
+
+    RunTime = np.zeros(NumRuns)
+    for ct in range(NumRuns):
+        ArgsCopy = copy.deepcopy(Args)
+        t0 = time.perf_counter()
+        Fn(*ArgsCopy)
+        RunTime[ct] = time.perf_counter() - t0
+
+    return np.min(RunTime)
+
+def ProjectionBenchmark(NumRuns):
+
+    TPMtime = BestTime(ProjFinalBalance,(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject,
+                                         R,FilingStatus,TPMwithdraw457bFirst),NumRuns)
+    TraditionalTime = BestTime(ProjFinalBalanceTraditional,(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,
+                                                            NumYearsToProject,R,FilingStatus),NumRuns)
+    print(str(NumYearsToProject)+'-year projection: TPM '+'{:.3f}'.format(TPMtime)+' s, Traditional '+
+          '{:.3f}'.format(TraditionalTime)+' s')
+
+    return TPMtime, TraditionalTime
+
+if __name__ == '__main__':
+    ProjectionBenchmark(NumRuns)
@@ -0,0 +1,182 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# ProjectionSensitivity.py
+
+import numpy as np
+import sys
+
+from ProjectVariants import ProjectVariants
+
+# Projection outputs whose sensitivity is computed
+SensitivityOutputNames = ['FinalAssets','TaxesAndPenalties','OutOfMoneyAge']
+
+# Inputs with one value per person
+PerPersonInputs = ['PreTaxIV','PreTax457bIV','RothIV','SocialSecurityPayments','AgeSSwillStart']
+
+# Finite-difference sensitivity of the TPM projection outputs to its inputs: project the inputs as they are (the base
+# case), then with each of Perturbations applied, and return how much each output changes per Step of each input.
+# Perturbations is a list of dicts (DefaultPerturbations if None):
+# 'Input': 'R', or the name of an IVdict / IncDict / ExpDict entry with a single value (e.g. 'Exp', 'SpecifiedIncome',
+# 'QualifiedDividendYield', 'CashCushion') or one value per person (PerPersonInputs). Also 'PostTaxIV', which scales
+# every lot (and its unrealized cap gains) so the PostTax total increases by Step. Increasing RothIV increases
+# RothContributions as well (like adding cash to Roth).
+# 'Step': amount added to the input
+# 'Person' (optional, for PerPersonInputs): whose value to change (0 or 1), or None / missing for everyone's
+# With Central, each input is also projected at -Step, and the change is half the difference between +Step and -Step
+# (twice the projections, but second order accurate). Projections are run through ProjectVariants, so a perturbation
+# that only changes later years (e.g. social security, or an R per year) resumes from the base case's checkpoint
+# instead of projecting the years before it again, and the perturbed projections run in NumWorkers parallel processes.
+# Outputs (SensitivityOutputNames): final TotalAssets, total taxes plus penalties over all years, and OutOfMoneyAge -
+# counting money that lasts as running out the year after the last one projected, so it has a finite change.
+# Returns a dict:
+# 'Names': name of each perturbation (e.g. 'SocialSecurityPayments[1]' for a single person's input)
+# 'Steps': Step of each perturbation
+# 'OutputNames': SensitivityOutputNames
+# 'Base': output values of the base case (one per output)
+# 'Perturbed': output values of each perturbation (number of perturbations x outputs; at +Step)
+# 'Changes': change of each output per Step of each input (number of perturbations x outputs)
+# 'Derivatives': Changes / Steps, i.e. the Jacobian of the outputs vs the inputs (number of perturbations x outputs)
+# 'BaseProjArrays': ProjArrays of the base case
+# 'NumProjections': number of projections run (not counting the years skipped by resuming from checkpoints)
+def ProjectionSensitivity(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject,R,FilingStatus,
+                          TPMwithdraw457bFirst,Perturbations=None,Central=False,NumWorkers=1):
+
+    if Perturbations is None:
+        Perturbations = DefaultPerturbations(IVdict,IncDict)
+
+    Names = [PerturbationName(Perturbation,np.size(IVdict['PreTaxIV'])) for Perturbation in Perturbations]
+    Steps = np.array([Perturbation['Step'] for Perturbation in Perturbations],dtype=float)
+
+    # +Step variants, then -Step variants if Central
+    Signs = [1.,-1.] if Central else [1.]
+    VariantList = [PerturbedVariant(IVdict,IncDict,ExpDict,R,Perturbation,Sign) for Sign in Signs
+                   for Perturbation in Perturbations]
+
+    BaseProjArrays, VariantProjArraysList = ProjectVariants(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,
+                                                            NumYearsToProject,R,FilingStatus,TPMwithdraw457bFirst,
+                                                            VariantList,NumWorkers)
+
+    Base = SensitivityOutputs(BaseProjArrays)
+    VariantOutputs = np.array([SensitivityOutputs(ProjArrays) for ProjArrays in VariantProjArraysList])
+    VariantOutputs = VariantOutputs.reshape((len(Signs),len(Perturbations),len(SensitivityOutputNames)))
+    if Central:
+        Changes = 0.5*(VariantOutputs[0] - VariantOutputs[1])
+    else:
+        Changes = VariantOutputs[0] - Base
+
+    SensDict = {'Names': Names,
+                'Steps': Steps,
+                'OutputNames': SensitivityOutputNames,
+                'Base': Base,
+                'Perturbed': VariantOutputs[0],
+                'Changes': Changes,
+                'Derivatives': Changes / Steps[:,None],
+                'BaseProjArrays': BaseProjArrays,
+                'NumProjections': 1 + len(VariantList)}
+
+    return SensDict
+
+# Default perturbations: R, Exp, SpecifiedIncome, qualified dividend yield, each person's social security payment and
+# start age and tax-advantaged balances, and the PostTax balance (if any) and CashCushion
+def DefaultPerturbations(IVdict,IncDict):
+
+    Perturbations = [{'Input': 'R', 'Step': 0.01},
+                     {'Input': 'Exp', 'Step': 1000.},
+                     {'Input': 'SpecifiedIncome', 'Step': 1000.},
+                     {'Input': 'QualifiedDividendYield', 'Step': 0.001}]
+    NumPeople = np.size(IVdict['PreTaxIV'])
+    for Input, Step in [('SocialSecurityPayments',1000.),('AgeSSwillStart',1.),('PreTaxIV',10000.),
+                        ('PreTax457bIV',10000.),('RothIV',10000.)]:
+        for ct in range(NumPeople):
+            Perturbations.append({'Input': Input, 'Step': Step, 'Person': ct})
+    if np.sum(IVdict['PostTaxIV']) > 0.:
+        Perturbations.append({'Input': 'PostTaxIV', 'Step': 10000.})
+    Perturbations.append({'Input': 'CashCushion', 'Step': 10000.})
+
+    return Perturbations
+
+# Name of a perturbation: its input, with the person (e.g. 'RothIV[1]') if it only changes one person's value of two
+def PerturbationName(Perturbation,NumPeople):
+
+    if Perturbation['Input'] in PerPersonInputs and Perturbation.get('Person') is not None and NumPeople > 1:
+        return Perturbation['Input']+'['+str(Perturbation['Person'])+']'
+
+    return Perturbation['Input']
+
+# A ProjectVariants variant with Sign*Step added to the perturbation's input
+def PerturbedVariant(IVdict,IncDict,ExpDict,R,Perturbation,Sign):
+
+    Input = Perturbation['Input']
+    Step = Sign*Perturbation['Step']
+
+    if Input == 'R':
+        return {'R': np.asarray(R,dtype=float) + Step}
+
+    if Input == 'PostTaxIV':
+        Total = np.sum(IVdict['PostTaxIV'])
+        if Total <= 0.:
+            print('Cannot perturb PostTaxIV: no PostTax balance to scale. Exiting.')
+            sys.exit()
+        Scale = (Total + Step) / Total
+        return {'IVdict': {'PostTaxIV': np.asarray(IVdict['PostTaxIV'],dtype=float)*Scale,
+                           'CurrentUnrealizedCapGains': np.asarray(IVdict['CurrentUnrealizedCapGains'],
+                                                                   dtype=float)*Scale}}
+
+    for DictName, InputDict in [('IVdict',IVdict),('IncDict',IncDict),('ExpDict',ExpDict)]:
+        if Input in InputDict:
+            break
+    else:
+        print('Input '+str(Input)+' not found in IVdict, IncDict or ExpDict. Exiting.')
+        sys.exit()
+
+    Changed = {Input: PerturbedValue(InputDict[Input],Input,Step,Perturbation.get('Person'))}
+    if Input == 'RothIV':
+        Changed['RothContributions'] = PerturbedValue(IVdict['RothContributions'],Input,Step,
+                                                      Perturbation.get('Person'))
+
+    return {DictName: Changed}
+
+# Value + Step (for everyone, or only Person, for PerPersonInputs)
+def PerturbedValue(Value,Input,Step,Person):
+
+    if np.ndim(Value) == 0:
+        return Value + Step
+
+    Value = np.array(Value,dtype=float)
+    if Input in PerPersonInputs and Person is not None:
+        Value[Person] += Step
+    else:
+        Value += Step
+
+    return Value
+
+# SensitivityOutputNames values of a projection
+def SensitivityOutputs(ProjArrays):
+
+    if np.isnan(ProjArrays['OutOfMoneyAge']):
+        OutOfMoneyAge = ProjArrays['Age'][-1,0] + 1.
+    else:
+        OutOfMoneyAge = ProjArrays['OutOfMoneyAge']
+
+    return [ProjArrays['TotalAssets'][-1],np.sum(ProjArrays['Taxes']) + np.sum(ProjArrays['Penalties']),OutOfMoneyAge]
+
+# Table of a ProjectionSensitivity result: the base case outputs, then each input's Step and the change of each output
+# per Step
+def SensitivityReport(SensDict):
+
+    NameWidth = max([len(Name) for Name in SensDict['Names']]+[len('Input')])
+    ColumnWidths = [max(len(OutputName),12)+2 for OutputName in SensDict['OutputNames']]
+
+    Lines = ['Input'.ljust(NameWidth)+'Step'.rjust(12)+''.join(OutputName.rjust(Width) for OutputName, Width in
+                                                              zip(SensDict['OutputNames'],ColumnWidths)),
+             'Base case'.ljust(NameWidth+12)+''.join('{:.2f}'.format(Value).rjust(Width) for Value, Width in
+                                                     zip(SensDict['Base'],ColumnWidths))]
+    for ct in range(len(SensDict['Names'])):
+        Lines.append(SensDict['Names'][ct].ljust(NameWidth)+'{:g}'.format(SensDict['Steps'][ct]).rjust(12)+
+                     ''.join('{:+.2f}'.format(Change).rjust(Width) for Change, Width in
+                             zip(SensDict['Changes'][ct],ColumnWidths)))
+
+    return '\n'.join(Lines)
@@ -0,0 +1,38 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# ProjectionSetup.py
+
+import numpy as np
+
+from YearlySchedules import YearlySchedules
+
+# Values of a projection that only depend on its inputs, not on the withdrawal method, computed before the loop over
+# years (by ProjFinalBalance and ProjFinalBalanceTraditional, or once for both by ProjectBothStrategies). A dict:
+# 'Age': age of each person in each year (NumYearsToProject x number of people)
+# 'ROI': annual ROI of each year: R is either a single value used every year, or one value per year (e.g. a sequence of
+# returns for Monte Carlo analysis), where R[ct] is the return earned over year ct (and so applied going into year ct+1)
+# 'ROInoDividends': ROI for post-tax, which removes the dividend yield, since input ROI assumes reinvested dividends
+# 'Schedules': expenses, income targets, other income, social security and ACA eligibility of every year (see
+# YearlySchedules)
+# The projections copy 'Age' into their results, so a Setup can be shared by several projections.
+def ProjectionSetup(IncDict,ExpDict,CurrentAge,NumYearsToProject,R):
+
+    ROI = np.zeros(NumYearsToProject) + R
+    ROInoDividends = ROI - (IncDict['QualifiedDividendYield'] + IncDict['NonQualifiedDividendYield'])
+
+    # Fill out Age array, in case money runs out - don't want Ages equal zero after that, for plot
+    Age = np.zeros((NumYearsToProject,np.size(CurrentAge)))
+    Age[0,:] = CurrentAge
+    for ct1 in range(0,NumYearsToProject):
+        if ct1 > 0:
+            Age[ct1,:] = Age[ct1-1,:] + 1
+
+    Setup = {'Age': Age,
+             'ROI': ROI,
+             'ROInoDividends': ROInoDividends,
+             'Schedules': YearlySchedules(IncDict,ExpDict,Age)}
+
+    return Setup
@@ -0,0 +1,36 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# SelectDeltaWithdrawalAccount.py
+
+import numpy as np
+import math
+
+# Select the lowest tax+penalty delta percentage account to withdraw from, returning the account type ('457b', 'PreTax',
+# 'PostTax' or 'Roth') and the person whose account it is
+
+def SelectDeltaWithdrawalAccount(DeltaPercentArray,NumPeople,PreTax457bIndices,PreTaxIndices,PostTaxIndex,RothIndices):
+
+    # Determine which delta is smallest, go with that account (even if it doesn't provide full Step), ignoring empty
+    # accounts (nan). As a list, since numpy's per-call overhead is many times the cost of comparing a few values.
+    DeltaPercentList = DeltaPercentArray.tolist()
+    DeltaPercentMin = min([DeltaPercent for DeltaPercent in DeltaPercentList if not math.isnan(DeltaPercent)],
+                          default=np.nan)
+
+    # If multiple accounts have the same tax+penalty percentage, select the account to withdraw from in this order:
+    # 1. PreTax457b (good for reducing RMDs)
+    # 2. PreTax (good for reducing RMDs)
+    # 3. PostTax
+    # 4. Roth (best for estate, and if it can push past 59.5 you won't owe taxes either, so try to tap last)
+    # And if multiple people's accounts of the same type tie, withdraw from whichever index is lower (corresponding to
+    # the first/older person)
+    for AcctType, Indices in [('457b',PreTax457bIndices),('PreTax',PreTaxIndices),('PostTax',PostTaxIndex),
+                              ('Roth',RothIndices)]:
+        for ct in range(len(Indices)):
+            if DeltaPercentList[Indices[ct]] == DeltaPercentMin:
+                return AcctType, ct
+
+    print('Delta percent min indices not corresponding to specific account - investigate.')
+    exit()
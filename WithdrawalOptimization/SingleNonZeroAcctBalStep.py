@@ -16,7 +16,7 @@ def SingleNonZeroAcctBalStep(WithdrawalDeltaArray,PostTax,Roth,PreTax457b,PreTax
 
     # if SoleRemainingAcctInd = 0, then it's PostTax
     if SoleRemainingAcctInd == 0:
-        RemainingBal = np.sum(PostTax['Bal'][YearCt,:])
+        RemainingBal = np.sum(PostTax['Bal'][YearCt,:PostTax['NumLots']])
     # if one person:
     elif NumPeople == 1:
         if SoleRemainingAcctInd == 1:
@@ -8,7 +8,6 @@
 import numpy as np
 import copy
 import sys
-import matplotlib.pyplot as plt
 
 #############################################################################################################
 
@@ -141,6 +140,10 @@ def PreTaxFromPostTax(Needed,StandardDeduction,IncomeBracketMins,Rates):
 # General multiplot method
 def MultiPlot(PlotDict):
 
+    # Imported here rather than at the top, so importing SupportMethods (e.g. for its tax methods, or headless runs)
+    # only loads matplotlib once a plot is actually made
+    import matplotlib.pyplot as plt
+
     # Properties for text boxes - these are matplotlib.patch.Patch properties
     props = dict(boxstyle='round', facecolor='wheat', alpha=0.9)
 
@@ -0,0 +1,52 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# SyncVendoredCopies.py
+
+import sys
+import os
+import shutil
+
+# Copy the modules shared with the other analyses' engine snapshots (StressTestingAnalysis/WithdrawalOptimization,
+# ReqMinDist) from this directory, so every copy is byte for byte the same as the one implementation here. Only these
+# shared modules are synced - the rest of each snapshot is its own (older) version of the engine.
+# Run as a script: python SyncVendoredCopies.py to copy, or python SyncVendoredCopies.py check to only report copies
+# that differ (nonzero exit status if any do).
+
+# Inputs
+# Each shared module, and the directories (relative to the repository root) that have a copy of it
+VendoredCopies = {'ProjectionCache.py': ['StressTestingAnalysis/WithdrawalOptimization','ReqMinDist'],
+                  'EventLog.py': ['StressTestingAnalysis/WithdrawalOptimization']}
+
+def SyncVendoredCopies(VendoredCopies,CheckOnly=False):
+
+    SourceDir = os.path.dirname(os.path.abspath(__file__))
+    RootDir = os.path.dirname(SourceDir)
+
+    NumDiffering = 0
+    for ModuleName in VendoredCopies:
+        SourceFile = os.path.join(SourceDir,ModuleName)
+        with open(SourceFile,'rb') as File:
+            Source = File.read()
+        for CopyDir in VendoredCopies[ModuleName]:
+            CopyFile = os.path.join(RootDir,CopyDir,ModuleName)
+            if os.path.isfile(CopyFile):
+                with open(CopyFile,'rb') as File:
+                    if File.read() == Source:
+                        continue
+            NumDiffering += 1
+            if CheckOnly:
+                print(os.path.join(CopyDir,ModuleName)+' differs from WithdrawalOptimization/'+ModuleName)
+            else:
+                shutil.copyfile(SourceFile,CopyFile)
+                print('Copied WithdrawalOptimization/'+ModuleName+' to '+CopyDir)
+
+    return NumDiffering
+
+if __name__ == '__main__':
+    CheckOnly = len(sys.argv) > 1 and sys.argv[1] == 'check'
+    NumDiffering = SyncVendoredCopies(VendoredCopies,CheckOnly)
+    if CheckOnly and NumDiffering > 0:
+        sys.exit(1)
@@ -0,0 +1,223 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# TaxSchedule.py
+
+import numpy as np
+import sys
+from bisect import bisect_left
+
+# Build the tax schedule for a filing status: standard deduction, tax brackets and rates, and the cumulative tax at
+# each bracket min (for both standard income and LT cap gains), so taxes can be computed with a bracket lookup and a
+# single multiply-add (see ComputeTaxesWithSchedule) rather than walking the brackets
+def TaxSchedule(TaxRateInfo,FilingStatus):
+
+    # Use appropriate standard deduction, tax brackets
+    Prefix = FilingStatusPrefix(FilingStatus)
+
+    # Copies, so the schedule can't be changed by (or change) TaxRateInfo
+    IncomeBracketMins = np.array(TaxRateInfo[Prefix+'IncomeBracketMins'],dtype=float)
+    Rates = np.array(TaxRateInfo['Rates'],dtype=float)
+    IncomeBracketLTcapGainsMins = np.array(TaxRateInfo[Prefix+'IncomeBracketLTcapGainsMins'],dtype=float)
+    CapGainsRatesLT = np.array(TaxRateInfo['CapGainsRatesLT'],dtype=float)
+
+    Schedule = {'StandardDeduction': TaxRateInfo[Prefix+'StandardDeduction'],
+                'IncomeBracketMins': IncomeBracketMins,
+                'Rates': Rates,
+                'CumulativeTax': CumulativeTax(IncomeBracketMins,Rates),
+                'IncomeBracketLTcapGainsMins': IncomeBracketLTcapGainsMins,
+                'CapGainsRatesLT': CapGainsRatesLT,
+                'CumulativeTaxLTcapGains': CumulativeTax(IncomeBracketLTcapGainsMins,CapGainsRatesLT),
+                # As lists too, for scalar incomes (much faster than numpy for single values)
+                'IncomeBracketMinsList': IncomeBracketMins.tolist(),
+                'RatesList': Rates.tolist(),
+                'CumulativeTaxList': CumulativeTax(IncomeBracketMins,Rates).tolist(),
+                'IncomeBracketLTcapGainsMinsList': IncomeBracketLTcapGainsMins.tolist(),
+                'CapGainsRatesLTList': CapGainsRatesLT.tolist(),
+                'CumulativeTaxLTcapGainsList': CumulativeTax(IncomeBracketLTcapGainsMins,CapGainsRatesLT).tolist(),
+                # The TaxRateInfo entries the schedule was built from, and their keys (see GetTaxSchedule)
+                'Source': tuple(TaxRateInfo[Key] for Key in TaxScheduleSourceKeys(Prefix)),
+                'SourceKeys': tuple(TaxScheduleSourceKeys(Prefix))}
+
+    return Schedule
+
+# Tax due on income at each bracket min, i.e. from all the brackets below it
+def CumulativeTax(BracketMins,Rates):
+
+    CumTax = np.zeros(len(BracketMins))
+    for ct in range(1,len(BracketMins)):
+        CumTax[ct] = CumTax[ct-1] + Rates[ct-1]*(BracketMins[ct]-BracketMins[ct-1])
+
+    return CumTax
+
+# Prefix of the TaxRateInfo entries for a filing status
+def FilingStatusPrefix(FilingStatus):
+
+    if FilingStatus=='Single':
+        return 'Single'
+    elif FilingStatus=='MarriedFilingJointly' or FilingStatus=='QualifyingWidow(er)':
+        return 'MarriedFilingJointly'
+    elif FilingStatus=='MarriedFilingSeparately':
+        return 'MarriedFilingSeparately'
+    elif FilingStatus=='HeadOfHousehold':
+        return 'HeadOfHousehold'
+    else:
+        print('Filing Status not recognized. Exiting.')
+        sys.exit()
+
+# TaxRateInfo entries a filing status' schedule depends on
+def TaxScheduleSourceKeys(Prefix):
+
+    return [Prefix+'StandardDeduction', Prefix+'IncomeBracketMins', 'Rates', Prefix+'IncomeBracketLTcapGainsMins',
+            'CapGainsRatesLT']
+
+# The tax schedule for a filing status, built once and then kept in TaxRateInfo['TaxSchedules'] for later calls.
+# It's rebuilt if any of the TaxRateInfo entries it was built from is replaced (but if you modify a TaxRateInfo array
+# in place, delete TaxRateInfo['TaxSchedules'] as well).
+def GetTaxSchedule(TaxRateInfo,FilingStatus):
+
+    if 'TaxSchedules' not in TaxRateInfo:
+        TaxRateInfo['TaxSchedules'] = {}
+
+    Schedule = TaxRateInfo['TaxSchedules'].get(FilingStatus)
+    if Schedule is not None:
+        # (a plain loop, since this runs on every ComputeTaxes call)
+        for Entry, Key in zip(Schedule['Source'],Schedule['SourceKeys']):
+            if Entry is not TaxRateInfo[Key]:
+                Schedule = None
+                break
+    if Schedule is None:
+        Schedule = TaxSchedule(TaxRateInfo,FilingStatus)
+        TaxRateInfo['TaxSchedules'][FilingStatus] = Schedule
+
+    return Schedule
+
+# Compute total taxes due from both standard income and long term cap gains / qualified dividends, using a tax schedule
+# from TaxSchedule / GetTaxSchedule. Incomes can be scalars or numpy arrays (of the same shape, or broadcastable), with
+# the output dictionary values being the same shape.
+def ComputeTaxesWithSchedule(Schedule,TotalStandardIncome,TotalLTcapGainsIncome):
+
+    if np.ndim(TotalStandardIncome) == 0 and np.ndim(TotalLTcapGainsIncome) == 0:
+        return ComputeTaxesWithScheduleScalar(Schedule,float(TotalStandardIncome),float(TotalLTcapGainsIncome))
+
+    StandardDeduction = Schedule['StandardDeduction']
+    IncomeBracketMins = Schedule['IncomeBracketMins']
+    IncomeBracketLTcapGainsMins = Schedule['IncomeBracketLTcapGainsMins']
+
+    TotalStandardIncome = np.asarray(TotalStandardIncome,dtype=float)
+    TotalLTcapGainsIncome = np.asarray(TotalLTcapGainsIncome,dtype=float)
+
+    # Remove standard deduction from standard income to get taxable standard income
+    # (and from LT cap gains if needed - though hopefully it's never wasted that way)
+    TaxableStandardIncome = np.maximum(TotalStandardIncome - StandardDeduction, 0.)
+    TaxableLTcapGains = np.where(TotalStandardIncome >= StandardDeduction, TotalLTcapGainsIncome,
+                                 np.maximum(TotalLTcapGainsIncome - (StandardDeduction - TotalStandardIncome), 0.))
+    TaxableTotalIncome = TaxableStandardIncome + TaxableLTcapGains
+
+    # Compute taxes on standard income
+    # np.searchsorted returns the index of the Min value beyond TaxableStandardIncome (and +1 beyond the last index if
+    # greater than the last value) i.e. the index of the max value of the top bracket
+    StdIncTopTaxBracket = np.searchsorted(IncomeBracketMins,TaxableStandardIncome)
+    TaxesOnStandardIncome = TaxOnIncome(TaxableStandardIncome,StdIncTopTaxBracket,IncomeBracketMins,Schedule['Rates'],
+                                        Schedule['CumulativeTax'])
+    # Space remaining in the top bracket - if TaxableStandardIncome = 0 and thus StdIncTopTaxBracket = 0, then it's not
+    # really "in" a bracket, and there's no limit to the top bracket
+    StdIncTopTaxBracketSpaceRemaining = np.where(
+        (StdIncTopTaxBracket > 0) & (StdIncTopTaxBracket < len(IncomeBracketMins)),
+        IncomeBracketMins[np.minimum(StdIncTopTaxBracket,len(IncomeBracketMins)-1)] - TaxableStandardIncome, np.nan)
+
+    # Top LT cap gain tax bracket with both standard income & LTCG (lumping 0 and 1 together, since the first bracket is
+    # 0%), and the space remaining in it
+    LTCGtopTaxBracket = np.searchsorted(IncomeBracketLTcapGainsMins,TaxableTotalIncome)
+    LTCGtopTaxBracketSpaceRemaining = np.where(
+        LTCGtopTaxBracket < len(IncomeBracketLTcapGainsMins),
+        IncomeBracketLTcapGainsMins[np.clip(LTCGtopTaxBracket,1,len(IncomeBracketLTcapGainsMins)-1)] -
+        TaxableTotalIncome, np.nan)
+
+    # Compute taxes on LT Cap Gains
+    # Standard income fills up brackets first, then LT cap gains - so LT cap gains taxes are the LT cap gain bracket
+    # taxes on total taxable income, less those on taxable standard income alone
+    TaxesOnLTcapGains = TaxOnIncome(TaxableTotalIncome,LTCGtopTaxBracket,IncomeBracketLTcapGainsMins,
+                                    Schedule['CapGainsRatesLT'],Schedule['CumulativeTaxLTcapGains']) - \
+                        TaxOnIncome(TaxableStandardIncome,np.searchsorted(IncomeBracketLTcapGainsMins,
+                                                                          TaxableStandardIncome),
+                                    IncomeBracketLTcapGainsMins,Schedule['CapGainsRatesLT'],
+                                    Schedule['CumulativeTaxLTcapGains'])
+
+    # Construct output dictionary ([()] converts 0-d arrays to scalars, for scalar incomes)
+    Taxes = {'Total': (TaxesOnStandardIncome + TaxesOnLTcapGains)[()],
+             'StdInc': TaxesOnStandardIncome[()],
+             'LTCG': TaxesOnLTcapGains[()],
+             'StdIncTopTaxBracket': StdIncTopTaxBracket[()],
+             'StdIncTopTaxBracketSpaceRemaining': StdIncTopTaxBracketSpaceRemaining[()],
+             'LTCGtopTaxBracket': LTCGtopTaxBracket[()],
+             'LTCGtopTaxBracketSpaceRemaining': LTCGtopTaxBracketSpaceRemaining[()]}
+
+    return Taxes
+
+# Tax on taxable income in bracket TopTaxBracket (from np.searchsorted, 0 for zero income): the cumulative tax at the
+# bracket min, plus the bracket rate times the income above it
+def TaxOnIncome(TaxableIncome,TopTaxBracket,BracketMins,Rates,CumTax):
+
+    ind = np.maximum(TopTaxBracket - 1, 0)
+
+    return np.where(TopTaxBracket > 0, CumTax[ind] + Rates[ind]*(TaxableIncome - BracketMins[ind]), 0.)
+
+# ComputeTaxesWithSchedule for scalar incomes - same computation, in plain floats (bisect_left is np.searchsorted)
+def ComputeTaxesWithScheduleScalar(Schedule,TotalStandardIncome,TotalLTcapGainsIncome):
+
+    StandardDeduction = Schedule['StandardDeduction']
+    IncomeBracketMins = Schedule['IncomeBracketMinsList']
+    IncomeBracketLTcapGainsMins = Schedule['IncomeBracketLTcapGainsMinsList']
+
+    if TotalStandardIncome >= StandardDeduction:
+        TaxableStandardIncome = TotalStandardIncome - StandardDeduction
+        TaxableLTcapGains = TotalLTcapGainsIncome
+    elif (TotalStandardIncome + TotalLTcapGainsIncome) >= StandardDeduction:
+        TaxableStandardIncome = 0.
+        TaxableLTcapGains = TotalLTcapGainsIncome - (StandardDeduction - TotalStandardIncome)
+    else:
+        TaxableStandardIncome = 0.
+        TaxableLTcapGains = 0.
+    TaxableTotalIncome = TaxableStandardIncome + TaxableLTcapGains
+
+    StdIncTopTaxBracket = bisect_left(IncomeBracketMins,TaxableStandardIncome)
+    TaxesOnStandardIncome = TaxOnIncomeScalar(TaxableStandardIncome,StdIncTopTaxBracket,IncomeBracketMins,
+                                              Schedule['RatesList'],Schedule['CumulativeTaxList'])
+    if 0 < StdIncTopTaxBracket < len(IncomeBracketMins):
+        StdIncTopTaxBracketSpaceRemaining = IncomeBracketMins[StdIncTopTaxBracket] - TaxableStandardIncome
+    else:
+        StdIncTopTaxBracketSpaceRemaining = np.nan
+
+    LTCGtopTaxBracket = bisect_left(IncomeBracketLTcapGainsMins,TaxableTotalIncome)
+    if LTCGtopTaxBracket < len(IncomeBracketLTcapGainsMins):
+        LTCGtopTaxBracketSpaceRemaining = IncomeBracketLTcapGainsMins[max(LTCGtopTaxBracket,1)] - TaxableTotalIncome
+    else:
+        LTCGtopTaxBracketSpaceRemaining = np.nan
+
+    TaxesOnLTcapGains = TaxOnIncomeScalar(TaxableTotalIncome,LTCGtopTaxBracket,IncomeBracketLTcapGainsMins,
+                                          Schedule['CapGainsRatesLTList'],Schedule['CumulativeTaxLTcapGainsList']) - \
+                        TaxOnIncomeScalar(TaxableStandardIncome,bisect_left(IncomeBracketLTcapGainsMins,
+                                                                            TaxableStandardIncome),
+                                          IncomeBracketLTcapGainsMins,Schedule['CapGainsRatesLTList'],
+                                          Schedule['CumulativeTaxLTcapGainsList'])
+
+    Taxes = {'Total': TaxesOnStandardIncome + TaxesOnLTcapGains,
+             'StdInc': TaxesOnStandardIncome,
+             'LTCG': TaxesOnLTcapGains,
+             'StdIncTopTaxBracket': StdIncTopTaxBracket,
+             'StdIncTopTaxBracketSpaceRemaining': StdIncTopTaxBracketSpaceRemaining,
+             'LTCGtopTaxBracket': LTCGtopTaxBracket,
+             'LTCGtopTaxBracketSpaceRemaining': LTCGtopTaxBracketSpaceRemaining}
+
+    return Taxes
+
+# TaxOnIncome for a scalar income
+def TaxOnIncomeScalar(TaxableIncome,TopTaxBracket,BracketMins,Rates,CumTax):
+
+    if TopTaxBracket == 0:
+        return 0.
+
+    return CumTax[TopTaxBracket-1] + Rates[TopTaxBracket-1]*(TaxableIncome - BracketMins[TopTaxBracket-1])
@@ -11,13 +11,16 @@
 import numpy as np
 from TaxableSSconsolidated import TaxableSSconsolidated
 from ComputeMaxAdjustableNonSSstandardIncome import ComputeMaxAdjustableNonSSstandardIncome
+from Instrumentation import Instrumented
+from EventLog import LogEvent
 
+@Instrumented
 def TaxableIncomeTargetMethodWithSSI(NonadjustableStandardIncome,NonadjustableLTcapGainsIncome,TotalSS,
                                      MaxStandardIncome,MaxTotalIncome,FilingStatus):
 
     # Start by adjusting MaxStandardIncome and MaxTotalIncome if needed
-    MinTaxableSS = np.round(TaxableSSconsolidated(NonadjustableStandardIncome+NonadjustableLTcapGainsIncome,TotalSS,
-                                                  FilingStatus),2)
+    MinTaxableSS = np.round(TaxableSSconsolidated(NonadjustableStandardIncome+NonadjustableLTcapGainsIncome,
+                                                      TotalSS,FilingStatus),2)
     MinStandardIncome = NonadjustableStandardIncome + MinTaxableSS
     if MinStandardIncome > MaxStandardIncome:
         MaxStandardIncome = MinStandardIncome
@@ -35,8 +38,9 @@ def TaxableIncomeTargetMethodWithSSI(NonadjustableStandardIncome,NonadjustableLT
         # Where MaxAdjustableLTcapGainsIncome set equal to zero.
 
         MaxAdjustableNonSSstandardIncome = \
-            np.round(ComputeMaxAdjustableNonSSstandardIncome(NonadjustableStandardIncome,NonadjustableLTcapGainsIncome,
-                                                             TotalSS,MaxStandardIncome,FilingStatus),2)
+            np.round(ComputeMaxAdjustableNonSSstandardIncome(NonadjustableStandardIncome,
+                                                                 NonadjustableLTcapGainsIncome,TotalSS,
+                                                                 MaxStandardIncome,FilingStatus),2)
 
         # Compute how much of social security income will be taxable
         TaxableSS = MaxStandardIncome - NonadjustableStandardIncome - MaxAdjustableNonSSstandardIncome
@@ -56,7 +60,7 @@ def TaxableIncomeTargetMethodWithSSI(NonadjustableStandardIncome,NonadjustableLT
 
         # if MinTotalIncome > MaxTotalIncome: # in case this ever happens
         if (MinTotalIncome - MaxTotalIncome) >= 0.01: # in case this ever happens
-            print('MinTotalIncome > MaxTotalIncome: Figure out what to do in this situation (if ever encountered).')
+            LogEvent('Warning','MinTotalIncomeAboveMax',MinTotalIncome=MinTotalIncome,MaxTotalIncome=MaxTotalIncome)
 
     # If TaxableSS = 0.85*Total, then it's already maximized and additional LT cap gains won't increase TaxableSS,
     # so we can leave MaxTotalIncome as-is, indicating that MaxAdjustableLTcapGainsIncome can be increased until
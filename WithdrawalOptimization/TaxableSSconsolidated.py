@@ -4,59 +4,90 @@
 # engineeringyourfi.com (in particular https://engineeringyourfi.com/how-much-of-my-social-security-income-will-be-taxed/)
 
 # TaxableSSconsolidated.py
+import numpy as np
 import sys
+from Instrumentation import Instrumented
 
 # Compute how much of SS income is taxable, using more consolidated form of algorithm (vs using the IRS worksheet language)
+# NonSSincome, TotalSSincome and FilingStatus can be scalars, or numpy arrays (see TaxableSSconsolidatedArray)
 
+@Instrumented
 def TaxableSSconsolidated(NonSSincome,TotalSSincome,FilingStatus):
 
-    # Bracket info based on filing status
+    # The same formula as TaxableSSconsolidatedArray, in plain floats for single values (numpy's per-call overhead is
+    # many times the cost of the formula itself, and this is called for every trial withdrawal)
+    if isinstance(FilingStatus,str) and not isinstance(NonSSincome,(np.ndarray,list)) and \
+            not isinstance(TotalSSincome,(np.ndarray,list)):
+
+        MinOtherIncomeForSStoBeTaxed, DeltaToTopOf50percentTaxableBracket = SSthresholds(FilingStatus)
+
+        # If total non-SS income plus half the SS income do not reach minimum income, then none of the SSincome is
+        # taxable
+        if TotalSSincome*0.5 + NonSSincome < MinOtherIncomeForSStoBeTaxed:
+            return 0.
+
+        IncomeOverMin = TotalSSincome*0.5 + NonSSincome - MinOtherIncomeForSStoBeTaxed
+        if IncomeOverMin > DeltaToTopOf50percentTaxableBracket:
+            DeltaOver50percentTaxableBracket = IncomeOverMin - DeltaToTopOf50percentTaxableBracket
+            TaxableSSin50percentBracket = min(DeltaToTopOf50percentTaxableBracket/2., TotalSSincome*0.5)
+        else:
+            DeltaOver50percentTaxableBracket = 0.
+            TaxableSSin50percentBracket = min(IncomeOverMin/2., TotalSSincome*0.5)
+
+        return float(min(TaxableSSin50percentBracket+0.85*DeltaOver50percentTaxableBracket, 0.85*TotalSSincome))
+
+    return TaxableSSconsolidatedArray(NonSSincome,TotalSSincome,FilingStatus)
+
+# Bracket info based on filing status: the minimum income for SS to be taxed, and the range of the 50% taxable bracket
+
+def SSthresholds(FilingStatus):
+
     if FilingStatus=='MarriedFilingJointly':
-        MinOtherIncomeForSStoBeTaxed = 32000.   #MI
-        DeltaToTopOf50percentTaxableBracket = 12000.  #\Delta
+        return 32000., 12000.   #MI, \Delta
     elif FilingStatus=='Single' or FilingStatus=='HeadOfHousehold' or FilingStatus=='MarriedFilingSeparately' or \
             FilingStatus=='QualifyingWidow(er)':
-        MinOtherIncomeForSStoBeTaxed = 25000.   #MI
-        DeltaToTopOf50percentTaxableBracket = 9000.  #\Delta
+        return 25000., 9000.   #MI, \Delta
     else:
         print('Filing Status not recognized. Exiting.')
         sys.exit()
 
-    # If total non-SS income plus half the SS income do not reach minimum income, then none of the SSincome is taxable
-    if (TotalSSincome*0.5 + NonSSincome) < MinOtherIncomeForSStoBeTaxed:
-        TaxableSSincome = 0.
-        return TaxableSSincome
-
-    # If total non-SS income plus half the SS income MINUS minimum income (so the amount over that min income value)
-    # exceeds DeltaToTopOf50percentTaxableBracket (range between the bottom and top of the 50% bracket):
-    if (TotalSSincome*0.5 + NonSSincome - MinOtherIncomeForSStoBeTaxed) > DeltaToTopOf50percentTaxableBracket:
-        # Then compute amount over the top of the 50% bracket
-        DeltaOver50percentTaxableBracket = TotalSSincome*0.5 + NonSSincome - MinOtherIncomeForSStoBeTaxed - \
-                                           DeltaToTopOf50percentTaxableBracket
-
-        # And set the taxable amount in the 50% bracket as the smaller of the bracket length * 0.5 or half the TotalSSincome
-        if TotalSSincome*0.5 > DeltaToTopOf50percentTaxableBracket/2.:
-            TaxableSSin50percentBracket = DeltaToTopOf50percentTaxableBracket/2.
-        else:
-            TaxableSSin50percentBracket = TotalSSincome*0.5
+# Compute how much of SS income is taxable, for numpy arrays of NonSSincome, TotalSSincome and FilingStatus (any of
+# which can also be a scalar / single filing status string, and which are broadcast against each other - e.g. a column
+# of NonSSincome and a row of TotalSSincome give the whole grid in one call)
 
-    else: # Then nothing over the top of the 50% bracket
-        DeltaOver50percentTaxableBracket = 0.
+def TaxableSSconsolidatedArray(NonSSincome,TotalSSincome,FilingStatus):
 
-        # And set the taxable amount in the 50% bracket as the smaller of (TotalSSincome*0.5 + NonSSincome -
-        # MinOtherIncomeForSStoBeTaxed)/2 or half the TotalSSincome
-        if TotalSSincome*0.5 > (TotalSSincome*0.5 + NonSSincome - MinOtherIncomeForSStoBeTaxed)/2.:
-            TaxableSSin50percentBracket = (TotalSSincome*0.5 + NonSSincome - MinOtherIncomeForSStoBeTaxed)/2.
-        else:
-            TaxableSSin50percentBracket = TotalSSincome*0.5
+    NonSSincome = np.asarray(NonSSincome,dtype=float)
+    TotalSSincome = np.asarray(TotalSSincome,dtype=float)
+
+    # Bracket info based on filing status
+    Thresholds = {Status: SSthresholds(Status) for Status in np.unique(FilingStatus)}
+    FilingStatus = np.asarray(FilingStatus)
+    MinOtherIncomeForSStoBeTaxed = np.zeros(np.shape(FilingStatus))   #MI
+    DeltaToTopOf50percentTaxableBracket = np.zeros(np.shape(FilingStatus))  #\Delta
+    for Status in Thresholds:
+        MinOtherIncomeForSStoBeTaxed[FilingStatus == Status] = Thresholds[Status][0]
+        DeltaToTopOf50percentTaxableBracket[FilingStatus == Status] = Thresholds[Status][1]
+
+    # Total non-SS income plus half the SS income MINUS minimum income (so the amount over that min income value)
+    IncomeOverMin = TotalSSincome*0.5 + NonSSincome - MinOtherIncomeForSStoBeTaxed
+
+    # If that exceeds DeltaToTopOf50percentTaxableBracket (range between the bottom and top of the 50% bracket):
+    # compute the amount over the top of the 50% bracket, and set the taxable amount in the 50% bracket as the smaller
+    # of the bracket length * 0.5 or half the TotalSSincome
+    # Otherwise nothing is over the top of the 50% bracket, and the taxable amount in the 50% bracket is the smaller of
+    # IncomeOverMin/2 or half the TotalSSincome
+    Over50percentBracket = IncomeOverMin > DeltaToTopOf50percentTaxableBracket
+    DeltaOver50percentTaxableBracket = np.where(Over50percentBracket,
+                                                IncomeOverMin - DeltaToTopOf50percentTaxableBracket, 0.)
+    TaxableSSin50percentBracket = np.minimum(np.where(Over50percentBracket, DeltaToTopOf50percentTaxableBracket/2.,
+                                                      IncomeOverMin/2.), TotalSSincome*0.5)
 
     # The taxable amount of SSincome is equal to TaxableSSin50percentBracket + 85% of amount over 50% bracket, until it
     # reaches 85% of the SSincome, at which it's set to 85% of SSincome for all higher values
-    # Thus set TaxableSSincome to the smaller of TaxableSSin50percentBracket+0.85*DeltaOver50percentTaxableBracket vs
-    # 0.85*TotalSSincome
-    if 0.85*TotalSSincome > TaxableSSin50percentBracket+0.85*DeltaOver50percentTaxableBracket:
-        TaxableSSincome = TaxableSSin50percentBracket+0.85*DeltaOver50percentTaxableBracket
-    else:
-        TaxableSSincome = 0.85*TotalSSincome
+    TaxableSSincome = np.minimum(TaxableSSin50percentBracket+0.85*DeltaOver50percentTaxableBracket, 0.85*TotalSSincome)
+
+    # If total non-SS income plus half the SS income do not reach minimum income, then none of the SSincome is taxable
+    TaxableSSincome = np.where(TotalSSincome*0.5 + NonSSincome < MinOtherIncomeForSStoBeTaxed, 0., TaxableSSincome)
 
     return TaxableSSincome
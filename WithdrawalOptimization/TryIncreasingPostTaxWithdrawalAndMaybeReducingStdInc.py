@@ -6,17 +6,69 @@
 # TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc.py
 
 import numpy as np
+import copy
+from bisect import bisect_right, insort
 from ComputeTaxes import *
+from TaxSchedule import GetTaxSchedule
+from LotBook import GetLotBook, LotSaleOrder
+from BreakpointJumpStep import DefaultWithdrawalSolverTolerance
+from Instrumentation import Instrumented
+from EventLog import LogEvent, SilencedEvents
 
 # Try reducing standard income and increasing LT cap gains to get more cash, if possible
 
+# Each pass of the loop sells Step ($100) of LT cap gains from PostTax, and if that increased taxes, undoes Step of
+# PreTax/PreTax457b withdrawals (moving Step of income from standard income to LT cap gains).
+
+# WithdrawalSolver:
+# 'Breakpoint' (default): whenever the next tax breakpoint (or the end of the withdrawal being undone, or of the PostTax
+# cap gains) is more than a pass away, take all the passes up to it at once (see SwapJumpSteps): their PostTax sales in
+# one walk through the lot book's sale order, taxes computed once instead of every pass, and the withdrawals undone in
+# a single operation. The sales are still Step of cap gains a pass, each rounded to the cent, as a single sale of all
+# the passes' cap gains would be rounded differently (and then ordered lots differently) - so the results are
+# identical to 'Stepping'.
+# 'Stepping': take every pass (the original loop)
+# 'Check': run both, and report any year where they differ by more than WithdrawalSolverTolerance dollars (in total
+# cash, income or taxes), keeping the 'Breakpoint' result
+# Each pass (or jump of passes) is reported as a 'Debug' StdIncomeSwappedForLTcapGains event (see EventLog.py), with the
+# LT cap gains sold, standard income removed and cash generated
+
+@Instrumented
 def TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc(TotalCash,PreTax,PreTax457b,PostTax,Roth,Income,Taxes, Age,
-                                                         TotalCashNeeded,YearCt,TaxRateInfo,FilingStatus):
+                                                         TotalCashNeeded,YearCt,TaxRateInfo,FilingStatus,IVdict,
+                                                         WithdrawalSolver='Breakpoint',
+                                                         WithdrawalSolverTolerance=DefaultWithdrawalSolverTolerance):
+
+    if WithdrawalSolver == 'Check':
+        # Run the original loop on copies of everything it modifies
+        SteppingState = copy.deepcopy({'TotalCash': TotalCash, 'PreTax': PreTax, 'PreTax457b': PreTax457b,
+                                       'PostTax': PostTax, 'Roth': Roth, 'Income': Income, 'Taxes': Taxes})
+        with SilencedEvents():
+            TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc(SteppingState['TotalCash'],SteppingState['PreTax'],
+                                                                 SteppingState['PreTax457b'],SteppingState['PostTax'],
+                                                                 SteppingState['Roth'],SteppingState['Income'],
+                                                                 SteppingState['Taxes'],Age,TotalCashNeeded,YearCt,
+                                                                 TaxRateInfo,FilingStatus,IVdict,'Stepping')
+        TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc(TotalCash,PreTax,PreTax457b,PostTax,Roth,Income,Taxes,
+                                                             Age,TotalCashNeeded,YearCt,TaxRateInfo,FilingStatus,
+                                                             IVdict,'Breakpoint')
+        for Name, SteppingValue, BreakpointValue in \
+                [('TotalCash',SteppingState['TotalCash'][YearCt],TotalCash[YearCt]),
+                 ('TotalIncome',SteppingState['Income']['Total'][YearCt],Income['Total'][YearCt]),
+                 ('TotalStandardIncome',SteppingState['Income']['TotalStandard'][YearCt],
+                  Income['TotalStandard'][YearCt]),
+                 ('Taxes',SteppingState['Taxes'][YearCt],Taxes[YearCt])]:
+            if np.abs(SteppingValue - BreakpointValue) > WithdrawalSolverTolerance:
+                LogEvent('Warning','WithdrawalSolverCheck',
+                         Routine='TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc',Name=Name,
+                         Difference=BreakpointValue-SteppingValue,SteppingValue=SteppingValue,
+                         BreakpointValue=BreakpointValue,YearCt=YearCt)
+        return
 
     # Unpack needed dictionary items - for easier access, cleaner and easier to read code
-    PostTaxBal = PostTax['Bal'][YearCt,:]
+    PostTaxBal = PostTax['Bal'][YearCt,:PostTax['NumLots']]
     PostTaxTot = PostTax['Total'][YearCt]
-    PostTaxCG = PostTax['CG'][YearCt,:]
+    PostTaxCG = PostTax['CG'][YearCt,:PostTax['NumLots']]
     PostTaxCGtotal = PostTax['CGtotal'][YearCt]
     IncTot = Income['Total'][YearCt]
     IncomeTotStd = Income['TotalStandard'][YearCt]
@@ -40,8 +92,6 @@ def TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc(TotalCash,PreTax,PreTax
         pass
     else: return # using pass and return to avoid indenting the entire rest of the method
 
-    # print('Test2')
-
     NumPeople = len(PreTaxWithdrawn)
 
     # Determine step size to reduce PreTax/PreTax457b and increase PostTax LTCG by each time (until PreTax/PreTax457b
@@ -53,6 +103,14 @@ def TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc(TotalCash,PreTax,PreTax
     else:
         Step = DefaultStep
 
+    # The lots, as lists (much faster than numpy for the few lots each pass sells from): balances, cap gains, and the
+    # (cap gain percentage, lot index) of each non-empty lot, in the lot book's sale order. Written back at the end.
+    LotBook = GetLotBook(PostTax,IVdict,YearCt)
+    LotBal = PostTaxBal.tolist()
+    LotCG = PostTaxCG.tolist()
+    SaleKeys = [(LotBook['CapGainPercentage'][LotInd],LotInd) for LotInd in
+                LotSaleOrder(LotBook,ExcludePurchasedFirstYear=False).tolist()]
+
     # Initialize here, recompute for each step through the loop
     RemainingCashNeeded = TotalCashNeeded - TotalCash[YearCt]
 
@@ -61,58 +119,70 @@ def TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc(TotalCash,PreTax,PreTax
     # (or PostTax account empty)
     while RemainingCashNeeded > 0.009:
 
-        # print('Test')
+        # Breakpoint solver: if the next NumSteps passes are certain to go the same way, take them all at once
+        if WithdrawalSolver == 'Breakpoint' and Step == DefaultStep:
+            NumSteps, ReduceStdInc, UndoAcct, UndoPerson = \
+                SwapJumpSteps(Step,IncomeTotStd,IncTotLTcapGains,Taxes[YearCt],PostTaxCGtotal,PreTaxWithdrawn,
+                              PreTax457bWithdrawn,TaxRateInfo,FilingStatus)
+        else:
+            NumSteps = 0
+
+        if NumSteps > 1:
+
+            TotalCashStart = TotalCash[YearCt]
+            IncTotLTcapGainsStart = IncTotLTcapGains
+
+            # Whether undoing the withdrawal reduces cash (it doesn't for PreTax withdrawals before age 60, which were
+            # Roth conversions)
+            UndoReducesCash = ReduceStdInc and (UndoAcct == '457b' or Age[YearCt,UndoPerson] >= 60.)
+
+            # All the passes' sales at once, with the same rounding to the cent as the single passes below. Undoing the
+            # withdrawals changes income and cash by exactly Step each pass, so the sale does that too (to check the
+            # cash need after each pass, as the single passes do), and the account balances are undone once all passes
+            # are taken.
+            PostTaxTot, PostTaxCGtotal, IncTotLTcapGains, IncTot, IncomeTotStd, StepCt, LotsSold = \
+                SellPostTaxCapGains(Step,NumSteps,SaleKeys,LotBal,LotCG,TotalCash,YearCt,TotalCashNeeded,PostTaxTot,
+                                    PostTaxCGtotal,IncTotLTcapGains,IncTot,IncomeTotStd,ReduceStdInc,UndoReducesCash)
+            RemainingCashNeeded = TotalCashNeeded - TotalCash[YearCt]
+
+            if ReduceStdInc:
+                # Undo StepCt passes of the withdrawal at once (all from UndoPerson's UndoAcct account)
+                UndoAmount = StepCt*Step
+                if UndoAcct == 'PreTax':
+                    PreTaxBal[UndoPerson] += UndoAmount
+                    PreTaxTotal += UndoAmount
+                    PreTaxWithdrawn[UndoPerson] -= UndoAmount
+                    PreTaxTotalWithdrawn -= UndoAmount
+                    if Age[YearCt,UndoPerson] < 60.: # Then the withdrawal was a Roth conversion, so undo that as well
+                        RothBal[UndoPerson] -= UndoAmount
+                        RothTotal -= UndoAmount
+                        for ct2 in reversed(range(len(RothConversionAmount))):
+                            if RothConversionPerson[ct2] == UndoPerson and \
+                               RothConversionAge[ct2] == Age[YearCt,UndoPerson]:
+                                RothConversionAmount[ct2] -= UndoAmount
+                else:
+                    PreTax457bBal[UndoPerson] += UndoAmount
+                    PreTax457bTotal += UndoAmount
+                    PreTax457bWithdrawn[UndoPerson] -= UndoAmount
+                    PreTax457bTotalWithdrawn -= UndoAmount
 
-        # Withdraw from PostTax until LTCG matches Step (if possible)
+                # Taxes as recomputed after the last pass's undo
+                TaxesDict = ComputeTaxes(TaxRateInfo,FilingStatus,IncomeTotStd,IncTotLTcapGains)
+                Taxes[YearCt] = TaxesDict['Total']
 
-        # Initialize as Step - for PostTax withdrawal
-        RemainingStep = Step
+            LogEvent('Debug','StdIncomeSwappedForLTcapGains',YearCt=YearCt,NumSteps=StepCt,
+                     LTcapGainsSold=IncTotLTcapGains-IncTotLTcapGainsStart,StdIncomeRemoved=StepCt*Step*ReduceStdInc,
+                     CashGenerated=TotalCash[YearCt]-TotalCashStart)
 
-        # First determine what percentage of lot is cap gains
-        # CapGainPercentage = PostTaxCG / PostTax - doesn't account for PostTax[ct] = 0
-        CapGainPercentage = np.zeros(len(PostTaxBal))
-        for ct in range(len(CapGainPercentage)):
-            if PostTaxBal[ct] > 0.:
-                CapGainPercentage[ct] = PostTaxCG[ct] / PostTaxBal[ct]
-            else:
-                CapGainPercentage[ct] = np.nan
-
-        # set lots in order from lowest % cap gains to highest, to maximize the chance there will be sufficient cash
-        CGpercentOrder = np.argsort(CapGainPercentage)
-
-        # Remove any indices in CGpercentOrder that correspond to CapGainPercentage = np.nan
-        LotIndicesToRemove = np.where(np.isnan(CapGainPercentage))[0]
-        for ct in range(len(LotIndicesToRemove)):
-            CGpercentOrder = CGpercentOrder[CGpercentOrder != LotIndicesToRemove[ct]]
-
-        # Loop over non-zero lots
-        for ct in range(len(CGpercentOrder)):
-            # if increase in LTCG = Step has not been achieved (RemainingStep > 0.) and this lot is non-zero
-            if RemainingStep > 0.009 and PostTaxBal[CGpercentOrder[ct]] > 0.009:
-                # if cap gains from this lot > RemainingStep, sell fraction of lot
-                if PostTaxCG[CGpercentOrder[ct]] > RemainingStep:
-                    # then compute % of cap gains needed to reach exactly RemainingStep
-                    CapGainFraction = RemainingStep / PostTaxCG[CGpercentOrder[ct]]
-                    # then sell that % of lot
-                    # determine how much cash that sell generates
-                    CashGenerated = np.round(PostTaxBal[CGpercentOrder[ct]] * CapGainFraction,2)
-                    # determine how much capital gains that sell generates
-                    CapGainGenerated = np.round(PostTaxCG[CGpercentOrder[ct]] * CapGainFraction,2)
-                else: # sell entire lot
-                    CashGenerated = PostTaxBal[CGpercentOrder[ct]]
-                    CapGainGenerated = PostTaxCG[CGpercentOrder[ct]]
-
-                # add CashGenerated to TotalCash, remove from PostTax balance
-                TotalCash[YearCt] += CashGenerated
-                PostTaxBal[CGpercentOrder[ct]] -= CashGenerated
-                PostTaxTot -= CashGenerated
-
-                # add CapGainGenerated to TotalLTcapGainsIncome and TotalIncome, remove from PostTaxCG and RemainingStep
-                IncTotLTcapGains += CapGainGenerated
-                IncTot += CapGainGenerated
-                PostTaxCG[CGpercentOrder[ct]] -= CapGainGenerated
-                PostTaxCGtotal -= CapGainGenerated
-                RemainingStep -= CapGainGenerated
+            continue
+
+        TotalCashStart = TotalCash[YearCt]
+        IncTotLTcapGainsStart = IncTotLTcapGains
+
+        # Withdraw from PostTax until LTCG matches Step (if possible)
+        PostTaxTot, PostTaxCGtotal, IncTotLTcapGains, IncTot, IncomeTotStd, StepCt, LotsSold = \
+            SellPostTaxCapGains(Step,1,SaleKeys,LotBal,LotCG,TotalCash,YearCt,TotalCashNeeded,PostTaxTot,PostTaxCGtotal,
+                                IncTotLTcapGains,IncTot,IncomeTotStd,False,False)
 
         # Recompute for each step through the loop - after PostTax withdrawal AND PreTax/PreTax457b withdrawal undo
         RemainingCashNeeded = TotalCashNeeded - TotalCash[YearCt]
@@ -124,12 +194,16 @@ def TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc(TotalCash,PreTax,PreTax
         # If Taxes not increased, no reason to reduce PreTax/PreTax457b withdrawals
         # TODO: might still need to do so for future version that accounts for ACA subsidies
         if (TaxesTemp - Taxes[YearCt]) < 0.01:
+            LogEvent('Debug','StdIncomeSwappedForLTcapGains',YearCt=YearCt,NumSteps=1,
+                     LTcapGainsSold=IncTotLTcapGains-IncTotLTcapGainsStart,StdIncomeRemoved=0.,
+                     CashGenerated=TotalCash[YearCt]-TotalCashStart)
+            # If there was nothing left to sell, no later pass can change anything either
+            if not LotsSold:
+                break
             continue # skip rest of this while loop iteration
 
         # If Taxes ARE increased, reduce PreTax/PreTax457b withdrawals
 
-        print('Reducing PreTax/PreTax457b withdrawals')
-
         # Initialize as Step - for PreTax/PreTax457b withdrawal reversals
         RemainingStep = Step
 
@@ -213,6 +287,10 @@ def TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc(TotalCash,PreTax,PreTax
         TaxesDict = ComputeTaxes(TaxRateInfo,FilingStatus,IncomeTotStd,IncTotLTcapGains)
         Taxes[YearCt] = TaxesDict['Total']
 
+        LogEvent('Debug','StdIncomeSwappedForLTcapGains',YearCt=YearCt,NumSteps=1,
+                 LTcapGainsSold=IncTotLTcapGains-IncTotLTcapGainsStart,StdIncomeRemoved=Step-RemainingStep,
+                 CashGenerated=TotalCash[YearCt]-TotalCashStart)
+
         # Recompute for each step through the loop
         RemainingCashNeeded = TotalCashNeeded - TotalCash[YearCt]
 
@@ -225,10 +303,16 @@ def TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc(TotalCash,PreTax,PreTax
     TaxesDict = ComputeTaxes(TaxRateInfo,FilingStatus,IncomeTotStd,IncTotLTcapGains)
     Taxes[YearCt] = TaxesDict['Total']
 
+    # Write the lots back: balances, cap gains, and the lot book (as UpdateLotBook would have left it)
+    PostTaxBal[:] = LotBal
+    PostTaxCG[:] = LotCG
+    LotBook['Order'] = np.array([LotInd for Percentage, LotInd in SaleKeys],dtype=int)
+    LotBook['CapGainPercentage'][:] = np.nan
+    for Percentage, LotInd in SaleKeys:
+        LotBook['CapGainPercentage'][LotInd] = Percentage
+
     # Repack any modified immutable dictionary items (mutable items such as arrays will already be modified)
-    # PostTax['Bal'][YearCt,:] = PostTaxBal # mutable
     PostTax['Total'][YearCt] = PostTaxTot
-    # PostTax['CG'][YearCt,:] = PostTaxCG # mutable
     PostTax['CGtotal'][YearCt] = PostTaxCGtotal
     Income['Total'][YearCt] = IncTot
     Income['TotalStandard'][YearCt] = IncomeTotStd
@@ -246,3 +330,155 @@ def TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc(TotalCash,PreTax,PreTax
     # Roth['ConversionAmount'] = RothConversionAmount # mutable
 
     debug = 1
+
+# Sell PostTax lots, lowest cap gain percentage first, until the LT cap gains generated reach Step (or the lots run
+# out), adding the cash generated to TotalCash - for up to NumPasses passes, stopping once TotalCashNeeded is met. If
+# ReduceStdInc, each pass also takes Step of standard income back out of income (and out of cash, if UndoReducesCash),
+# as undoing Step of withdrawals does. SaleKeys is the (cap gain percentage, lot index) of each non-empty lot in sale
+# order, and is kept in order as lots are sold (ties ordered by lot index, as in the lot book). Returns the updated
+# totals, the number of passes taken, and whether any lot was sold.
+def SellPostTaxCapGains(Step,NumPasses,SaleKeys,LotBal,LotCG,TotalCash,YearCt,TotalCashNeeded,PostTaxTot,PostTaxCGtotal,
+                        IncTotLTcapGains,IncTot,IncomeTotStd,ReduceStdInc,UndoReducesCash):
+
+    LotsSold = False
+
+    PassCt = 0
+    Position = 0
+    while PassCt < NumPasses and TotalCashNeeded - TotalCash[YearCt] > 0.009:
+
+        # Initialize as Step - for PostTax withdrawal
+        RemainingStep = Step
+
+        # Loop over non-zero lots, until increase in LTCG = Step has been achieved
+        while RemainingStep > 0.009 and Position < len(SaleKeys):
+            LotInd = SaleKeys[Position][1]
+            if LotBal[LotInd] <= 0.009:
+                Position += 1
+                continue
+
+            # if cap gains from this lot > RemainingStep, sell fraction of lot
+            if LotCG[LotInd] > RemainingStep:
+                # then compute % of cap gains needed to reach exactly RemainingStep
+                CapGainFraction = RemainingStep / LotCG[LotInd]
+                # then sell that % of lot
+                # determine how much cash that sell generates
+                CashGenerated = np.round(LotBal[LotInd] * CapGainFraction,2)
+                # determine how much capital gains that sell generates
+                CapGainGenerated = np.round(LotCG[LotInd] * CapGainFraction,2)
+            else: # sell entire lot
+                CashGenerated = LotBal[LotInd]
+                CapGainGenerated = LotCG[LotInd]
+
+            # add CashGenerated to TotalCash, remove from PostTax balance
+            TotalCash[YearCt] += CashGenerated
+            LotBal[LotInd] -= CashGenerated
+            PostTaxTot -= CashGenerated
+
+            # add CapGainGenerated to TotalLTcapGainsIncome and TotalIncome, remove from PostTaxCG and RemainingStep
+            IncTotLTcapGains += CapGainGenerated
+            IncTot += CapGainGenerated
+            LotCG[LotInd] -= CapGainGenerated
+            PostTaxCGtotal -= CapGainGenerated
+            RemainingStep -= CapGainGenerated
+
+            # move the lot to where its new cap gain percentage puts it in the sale order (or drop it, if now empty -
+            # then the next lot to sell is at the same position). A partial sale usually leaves it between the same
+            # neighbors (its percentage only moves by the rounding of the sale to the cent), so just update its key.
+            if LotBal[LotInd] > 0.:
+                LotKey = (LotCG[LotInd] / LotBal[LotInd],LotInd)
+                if (Position == 0 or SaleKeys[Position-1] < LotKey) and \
+                   (Position == len(SaleKeys)-1 or LotKey < SaleKeys[Position+1]):
+                    SaleKeys[Position] = LotKey
+                else:
+                    del SaleKeys[Position]
+                    insort(SaleKeys,LotKey)
+            else:
+                del SaleKeys[Position]
+
+            LotsSold = True
+
+        # Undo Step of withdrawals
+        if ReduceStdInc:
+            if UndoReducesCash:
+                TotalCash[YearCt] -= Step
+            IncomeTotStd -= Step
+            IncTot -= Step
+
+        PassCt += 1
+
+        # Each pass starts from the first lot in the sale order (a sale can move a lot ahead of the nearly empty lots
+        # skipped over)
+        Position = 0
+
+    return PostTaxTot, PostTaxCGtotal, IncTotLTcapGains, IncTot, IncomeTotStd, PassCt, LotsSold
+
+# Number of upcoming passes of the loop certain to go the same way as the next one, and which way:
+# - Where LT cap gains are taxed at 0% (including when the standard deduction isn't used up yet), selling them doesn't
+# change taxes, so no withdrawals are undone (ReduceStdInc = False). That holds until total income nears the next LT
+# cap gains bracket.
+# - Where the next Step of LT cap gains is taxed (all or in part), each pass increases taxes, and so undoes Step of
+# withdrawals (ReduceStdInc = True), which brings total income back to where it was - so every pass sees the same tax
+# increase. That holds until the withdrawal being undone (UndoAcct 'PreTax' or '457b', of person UndoPerson) is used
+# up.
+# Either way, only passes that sell a full Step are taken, and a pass's worth of margin is left before each
+# breakpoint, so the passes that reach it (and any partial ones) are taken one at a time as before. Returns 0 passes if
+# a breakpoint is too close to be sure.
+def SwapJumpSteps(Step,IncomeTotStd,IncTotLTcapGains,TaxesThisYear,PostTaxCGtotal,PreTaxWithdrawn,PreTax457bWithdrawn,
+                  TaxRateInfo,FilingStatus):
+
+    Schedule = GetTaxSchedule(TaxRateInfo,FilingStatus)
+    IncomeBracketLTcapGainsMins = Schedule['IncomeBracketLTcapGainsMinsList']
+    CapGainsRatesLT = Schedule['CapGainsRatesLTList']
+
+    # Full Steps of PostTax cap gains left to sell, less one
+    NumSteps = np.floor(PostTaxCGtotal/Step) - 1.
+
+    # LT cap gains bracket at the top of total taxable income (LT cap gains stack on top of standard income, and both
+    # are reduced by the standard deduction), and the room left in it
+    TaxableTotalIncome = max(IncomeTotStd + IncTotLTcapGains - Schedule['StandardDeduction'], 0.)
+    Bracket = bisect_right(IncomeBracketLTcapGainsMins,TaxableTotalIncome) - 1
+    if Bracket < len(IncomeBracketLTcapGainsMins) - 1:
+        RoomInBracket = IncomeBracketLTcapGainsMins[Bracket+1] - TaxableTotalIncome
+    else:
+        RoomInBracket = np.inf
+
+    TaxesNow = ComputeTaxes(TaxRateInfo,FilingStatus,IncomeTotStd,IncTotLTcapGains)['Total']
+
+    if CapGainsRatesLT[Bracket] == 0. and RoomInBracket > 2.*(Step+0.01):
+        # Taxes stay at TaxesNow until the next bracket, so each pass skips the undo as long as they haven't already
+        # increased (compared to Taxes[YearCt], as of the last undo)
+        if TaxesNow - TaxesThisYear >= 0.009:
+            return 0, False, None, None
+        # (each pass sells Step, give or take the rounding of the sale to the cent)
+        NumSteps = min(NumSteps, np.floor(RoomInBracket/(Step+0.01)) - 1.)
+        return max(NumSteps,0), False, None, None
+
+    # Otherwise each pass's sale increases taxes by TaxIncrease (compared to the taxes recomputed at the last undo, or
+    # for the first pass, Taxes[YearCt]), even if the Step straddles brackets: total income is the same at the start of
+    # every pass. Give or take the rounding of each sale to the cent, which can move total income by up to a cent a
+    # pass, and so TaxIncrease by up to twice the top LT cap gains rate times that - keep it clear of the 0.01
+    # threshold.
+    TaxIncrease = ComputeTaxes(TaxRateInfo,FilingStatus,IncomeTotStd,IncTotLTcapGains+Step)['Total'] - TaxesNow
+    if min(TaxIncrease, TaxIncrease + TaxesNow - TaxesThisYear) < 0.02:
+        return 0, False, None, None
+    NumSteps = min(NumSteps, np.floor((TaxIncrease - 0.02)/(2.*max(CapGainsRatesLT)*0.01)))
+
+    # Withdrawals are undone from PreTax first, then PreTax457b, person by person
+    UndoAcct = None
+    for ct in range(len(PreTaxWithdrawn)):
+        if PreTaxWithdrawn[ct] > 0.009:
+            UndoAcct = 'PreTax'
+            UndoPerson = ct
+            NumSteps = min(NumSteps, np.floor(PreTaxWithdrawn[ct]/Step) - 1.)
+            break
+    if UndoAcct is None:
+        for ct in range(len(PreTax457bWithdrawn)):
+            if PreTax457bWithdrawn[ct] > 0.009:
+                UndoAcct = '457b'
+                UndoPerson = ct
+                NumSteps = min(NumSteps, np.floor(PreTax457bWithdrawn[ct]/Step) - 1.)
+                break
+    if UndoAcct is None:
+        return 0, False, None, None
+
+    return max(NumSteps,0), True, UndoAcct, UndoPerson
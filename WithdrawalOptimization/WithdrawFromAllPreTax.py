@@ -8,9 +8,11 @@
 import numpy as np
 from WithdrawFrom457b import WithdrawFrom457b
 from WithdrawFromPreTax import WithdrawFromPreTax
+from Instrumentation import Instrumented
 
 # Withdraw from PreTax accounts (PreTax and PreTax457b)
 
+@Instrumented
 def WithdrawFromAllPreTax(PreTax,PreTax457b,Income,TotalCash,Roth, Age,YearCt):
 
     if PreTax457b['TPMwithdraw457bFirst']:
@@ -18,21 +20,21 @@ def WithdrawFromAllPreTax(PreTax,PreTax457b,Income,TotalCash,Roth, Age,YearCt):
         # loop over all 457b accounts (one or two)
         for ct in range(np.shape(PreTax457b['Bal'])[1]):
             WithdrawFrom457b(Income,PreTax457b,TotalCash, YearCt,ct)
-        PreTax457b['Total'][YearCt] = np.sum(PreTax457b['Bal'][YearCt,:])
-        PreTax457b['TotalWithdrawn'][YearCt] = np.sum(PreTax457b['Withdrawn'][YearCt,:])
+        PreTax457b['Total'][YearCt] = PreTax457b['Bal'][YearCt,:].sum()
+        PreTax457b['TotalWithdrawn'][YearCt] = PreTax457b['Withdrawn'][YearCt,:].sum()
 
     # withdraw PreTax if room, conversion to Roth if not 60 yet
     # loop over all PreTax accounts (one or two in general)
     for ct in range(np.shape(PreTax['Bal'])[1]):
         WithdrawFromPreTax(Income,PreTax,TotalCash,Roth, Age,YearCt,ct)
-    PreTax['Total'][YearCt] = np.sum(PreTax['Bal'][YearCt,:])
-    PreTax['TotalWithdrawn'][YearCt] = np.sum(PreTax['Withdrawn'][YearCt,:])
-    Roth['Total'][YearCt] = np.sum(Roth['Bal'][YearCt,:])
+    PreTax['Total'][YearCt] = PreTax['Bal'][YearCt,:].sum()
+    PreTax['TotalWithdrawn'][YearCt] = PreTax['Withdrawn'][YearCt,:].sum()
+    Roth['Total'][YearCt] = Roth['Bal'][YearCt,:].sum()
 
     if PreTax457b['TPMwithdraw457bFirst'] == False:
         # withdraw 457b if room
         # loop over all 457b accounts (one or two in general)
         for ct in range(np.shape(PreTax457b['Bal'])[1]):
             WithdrawFrom457b(Income,PreTax457b,TotalCash, YearCt,ct)
-        PreTax457b['Total'][YearCt] = np.sum(PreTax457b['Bal'][YearCt,:])
-        PreTax457b['TotalWithdrawn'][YearCt] = np.sum(PreTax457b['Withdrawn'][YearCt,:])
+        PreTax457b['Total'][YearCt] = PreTax457b['Bal'][YearCt,:].sum()
+        PreTax457b['TotalWithdrawn'][YearCt] = PreTax457b['Withdrawn'][YearCt,:].sum()
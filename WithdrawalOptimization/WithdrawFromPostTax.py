@@ -6,49 +6,32 @@
 # WithdrawFromPostTax.py
 
 import numpy as np
+from LotBook import GetLotBook, LotSaleOrder, UpdateLotBook
+from Instrumentation import Instrumented
 
 # Withdraw from post-tax lots
 
+@Instrumented
 def WithdrawFromPostTax(PostTax,TotalCash,Income, TotalCashNeeded,IVdict,YearCt):
 
     # Unpack needed dictionary items - for easier access
-    PostTaxBal = PostTax['Bal'][YearCt,:]
-    PostTaxCG = PostTax['CG'][YearCt,:]
-    LotPurchasedFirstYear = IVdict['LotPurchasedFirstYear']
+    PostTaxBal = PostTax['Bal'][YearCt,:PostTax['NumLots']]
+    PostTaxCG = PostTax['CG'][YearCt,:PostTax['NumLots']]
     IncTot = Income['Total'][YearCt]
     IncMaxTot = Income['MaxTotal'][YearCt]
     IncTotLTcapGains = Income['TotalLTcapGains'][YearCt]
 
-    # First determine what percentage of lot is cap gains
-    # CapGainPercentage = PostTaxCG / PostTax - doesn't account for PostTax[ct] = 0
-    CapGainPercentage = np.zeros(len(PostTaxBal))
-    for ct in range(len(CapGainPercentage)):
-        if PostTaxBal[ct] > 0.:
-            CapGainPercentage[ct] = PostTaxCG[ct] / PostTaxBal[ct]
-        else:
-            CapGainPercentage[ct] = np.nan
+    LotBook = GetLotBook(PostTax,IVdict,YearCt)
 
+    # Lots in order of % cap gains (leaving out any purchased the first year, to avoid short term cap gains)
     if TotalCash[YearCt] < TotalCashNeeded: # approximation, b/c taxes haven't been computed yet, but likely good enough
         # set lots in order from lowest % cap gains to highest, to maximize the chance there will be sufficient
         # cash for expenses+taxes+penalties
-        CGpercentOrder = np.argsort(CapGainPercentage)
+        CGpercentOrder = LotSaleOrder(LotBook)
     else:
         # set lots in order from highest % cap gains to highest, to minimize the excess cash generated, since
         # already have enough
-        CGpercentOrder = np.argsort(CapGainPercentage)[::-1]
-
-    # if first year, remove any indices in CGpercentOrder that correspond to LotPurchasedFirstYear = True
-    if YearCt == 0:
-        LotIndicesToRemove = np.where(LotPurchasedFirstYear)[0]
-        # remove those indices
-        for ct in range(len(LotIndicesToRemove)):
-            CGpercentOrder = CGpercentOrder[CGpercentOrder != LotIndicesToRemove[ct]]
-
-    # Then remove any indices in CGpercentOrder that correspond to CapGainPercentage = np.nan
-    LotIndicesToRemove = np.where(np.isnan(CapGainPercentage))[0]
-    # remove those indices
-    for ct in range(len(LotIndicesToRemove)):
-        CGpercentOrder = CGpercentOrder[CGpercentOrder != LotIndicesToRemove[ct]]
+        CGpercentOrder = LotSaleOrder(LotBook,Descending=True)
 
     # Loop over non-zero lots
     for ct in range(len(CGpercentOrder)):
@@ -78,9 +61,11 @@ def WithdrawFromPostTax(PostTax,TotalCash,Income, TotalCashNeeded,IVdict,YearCt)
             IncTot += CapGainGenerated
             PostTaxCG[CGpercentOrder[ct]] -= CapGainGenerated
 
+            UpdateLotBook(LotBook,PostTaxBal,PostTaxCG,CGpercentOrder[ct])
+
     # Compute totals
-    PostTax['Total'][YearCt] = np.sum(PostTax['Bal'][YearCt,:])
-    PostTax['CGtotal'][YearCt] = np.sum(PostTax['CG'][YearCt,:])
+    PostTax['Total'][YearCt] = PostTax['Bal'][YearCt,:PostTax['NumLots']].sum()
+    PostTax['CGtotal'][YearCt] = PostTax['CG'][YearCt,:PostTax['NumLots']].sum()
 
     # Repack any modified immutable dictionary items (mutable items such as arrays will already be modified)
     Income['Total'][YearCt] = IncTot
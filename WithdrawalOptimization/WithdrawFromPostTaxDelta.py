@@ -6,15 +6,15 @@
 # WithdrawFromPostTaxDelta.py
 
 import numpy as np
+from LotBook import GetLotBook, LotSaleOrder, UpdateLotBook
 
 # Withdraw increment from post-tax lots, return LT cap gain to assess in GetRemainingNeededCashWithTaxesAndOrPenalties
 # If Execute flag on, actually withdraw from PostTax account
 def WithdrawFromPostTaxDelta(PostTax,Step,TotalCash,Income,IVdict,YearCt,Execute):
 
     # Unpack needed dictionary items - for easier access
-    PostTaxBal = PostTax['Bal'][YearCt,:]
-    PostTaxCG = PostTax['CG'][YearCt,:]
-    LotPurchasedFirstYear = IVdict['LotPurchasedFirstYear']
+    PostTaxBal = PostTax['Bal'][YearCt,:PostTax['NumLots']]
+    PostTaxCG = PostTax['CG'][YearCt,:PostTax['NumLots']]
     if Execute:
         IncTot = Income['Total'][YearCt]
         IncTotLTcapGains = Income['TotalLTcapGains'][YearCt]
@@ -23,30 +23,10 @@ def WithdrawFromPostTaxDelta(PostTax,Step,TotalCash,Income,IVdict,YearCt,Execute
     TotalWithdrawal = 0.
     TotalLTCG = 0.
 
-    # First determine what percentage of lot is cap gains
-    # CapGainPercentage = PostTaxCG / PostTax - doesn't account for PostTax[ct] = 0
-    CapGainPercentage = np.zeros(len(PostTaxBal))
-    for ct in range(len(CapGainPercentage)):
-        if PostTaxBal[ct] > 0.:
-            CapGainPercentage[ct] = PostTaxCG[ct] / PostTaxBal[ct]
-        else:
-            CapGainPercentage[ct] = np.nan
-
-    # Sort the lots from lowest to highest percentage LT cap gain and sell them in that order to minimize LT cap gain
-    CGpercentOrder = np.argsort(CapGainPercentage)
-
-    # if first year, remove any indices in CGpercentOrder that correspond to LotPurchasedFirstYear = True
-    if YearCt == 0:
-        LotIndicesToRemove = np.where(LotPurchasedFirstYear)[0]
-        # remove those indices
-        for ct in range(len(LotIndicesToRemove)):
-            CGpercentOrder = CGpercentOrder[CGpercentOrder != LotIndicesToRemove[ct]]
-
-    # Then remove any indices in CGpercentOrder that correspond to CapGainPercentage = np.nan
-    LotIndicesToRemove = np.where(np.isnan(CapGainPercentage))[0]
-    # remove those indices
-    for ct in range(len(LotIndicesToRemove)):
-        CGpercentOrder = CGpercentOrder[CGpercentOrder != LotIndicesToRemove[ct]]
+    # Sell the lots from lowest to highest percentage LT cap gain to minimize LT cap gain (leaving out any purchased the
+    # first year, to avoid short term cap gains)
+    LotBook = GetLotBook(PostTax,IVdict,YearCt)
+    CGpercentOrder = LotSaleOrder(LotBook)
 
     # Loop over non-zero lots
     for ct in range(len(CGpercentOrder)):
@@ -80,6 +60,8 @@ def WithdrawFromPostTaxDelta(PostTax,Step,TotalCash,Income,IVdict,YearCt,Execute
                 IncTot += CapGainGenerated
                 PostTaxCG[CGpercentOrder[ct]] -= CapGainGenerated
 
+                UpdateLotBook(LotBook,PostTaxBal,PostTaxCG,CGpercentOrder[ct])
+
     # Repack any modified immutable dictionary items (mutable items such as arrays will already be modified)
     if Execute:
         Income['Total'][YearCt] = IncTot
@@ -6,6 +6,7 @@
 # WithdrawFromPreTax.py
 
 import numpy as np
+from EventLog import LogEvent
 
 def WithdrawFromPreTax(Income,PreTax,TotalCash,Roth, Age,YearCt,PersonCt):
 
@@ -32,6 +33,8 @@ def WithdrawFromPreTax(Income,PreTax,TotalCash,Roth, Age,YearCt,PersonCt):
                 RothConversionAmount = np.append(RothConversionAmount,RemainingStandardIncomeRoom)
                 RothConversionAge = np.append(RothConversionAge,Age[YearCt,PersonCt])
                 RothConversionPerson = np.append(RothConversionPerson,PersonCt)
+                LogEvent('Debug','RothConversion',YearCt=YearCt,Amount=RemainingStandardIncomeRoom,PersonCt=PersonCt,
+                         Age=Age[YearCt,PersonCt])
             else: # use the cash - no penalties
                 TotalCash[YearCt] += RemainingStandardIncomeRoom
 
@@ -45,6 +48,8 @@ def WithdrawFromPreTax(Income,PreTax,TotalCash,Roth, Age,YearCt,PersonCt):
                 RothConversionAmount = np.append(RothConversionAmount,PreTaxBal)
                 RothConversionAge = np.append(RothConversionAge,Age[YearCt,PersonCt])
                 RothConversionPerson = np.append(RothConversionPerson,PersonCt)
+                LogEvent('Debug','RothConversion',YearCt=YearCt,Amount=PreTaxBal,PersonCt=PersonCt,
+                         Age=Age[YearCt,PersonCt])
             else: # use the cash - no penalties
                 TotalCash[YearCt] += PreTaxBal
 
@@ -81,7 +81,7 @@ def WithdrawFromRothDelta(Roth,Step,TotalCash,YearCt,PersonCt,Execute):
         # Repack any modified immutable dictionary items (mutable items such as arrays/lists will already be modified)
         Roth['Bal'][YearCt,PersonCt] = RothBal
         # Update Roth['Total']
-        Roth['Total'][YearCt] = np.sum(Roth['Bal'][YearCt,:])
+        Roth['Total'][YearCt] = Roth['Bal'][YearCt,:].sum()
         # Roth['ConversionAmount'] is already updated because it's a mutable list and tied to RothConversionAmount
 
     return Withdrawal, Penalty, StdIncDeltaFromEarnings
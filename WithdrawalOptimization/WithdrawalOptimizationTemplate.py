@@ -8,13 +8,21 @@
 import numpy as np
 import copy
 import os
-import time
 
 from TaxRateInfoInput import TaxRateInfoInput
 from SupportMethods import MultiPlot
 from ProjFinalBalance import ProjFinalBalance
 from ProjFinalBalanceTraditional import ProjFinalBalanceTraditional
+from ProjectBothStrategies import ProjectBothStrategies
+from MonteCarloProjection import MonteCarloProjection, GenerateReturnPaths
+from MaxSustainableExpense import MaxSustainableExpense
+from OptimizeIncomeTargets import OptimizeIncomeTargets
+from ProjectionSensitivity import ProjectionSensitivity, SensitivityReport
+from HistoricalBacktest import HistoricalBacktest, LoadHistoricalReturns, BacktestReport
+from ProjectionCache import CachedProjection, ClearProjectionCache as ClearProjectionCacheDir
 from ComputeTaxes import ComputeTaxes
+from Instrumentation import InstrumentationContext, InstrumentationReport, SaveInstrumentation
+from EventLog import EventLogListener
 
 # Compute optimal withdrawal method/sequence of assets to minimize taxes, maximize ACA subsidies, ensure sufficient
 # funds always available, and maximize long term growth of assets
@@ -192,6 +200,10 @@ OutputFile = 'Output.txt'
 
 # Tax and Penalty Minimization (TPM) Withdrawal Method or Traditional Withdrawal Method
 TPMorTraditionalWithdrawal = 'TPM' #'Traditional' #'Both' #
+# With 'Both', number of parallel processes to run the two methods in (1 runs them one after the other). Only worth it
+# when the Traditional projection is as slow as the TPM one, since starting the processes takes longer than a
+# Traditional projection usually does.
+ProjectBothNumWorkers = 1
 
 # Flag dictating whether to run TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc method or not
 # This method has not yet produced better results for any scenario attempted - but it's available if desired
@@ -201,12 +213,88 @@ TryIncreasingPostTaxWithdrawalAndMaybeReducingStdIncFlag = False
 # TPM Method - Withdraw from 457b or Pretax first
 TPMwithdraw457bFirst = True
 
+# TPM Method - how the remaining cash needed (with taxes and/or penalties) is withdrawn (and how
+# TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc swaps standard income for LT cap gains), both giving identical
+# results (see WithdrawalSolverCheck.py):
+# 'Breakpoint': up to the next tax/penalty breakpoint, withdraw $100 at a time from the same account without
+# recomputing every account's tax+penalty percentage for each $100 (several times faster)
+# 'Stepping': withdraw $100 at a time from the lowest tax+penalty account (the original method)
+# 'Check': run both, and print any year where they differ by more than WithdrawalSolverTolerance dollars
+WithdrawalSolver = 'Breakpoint' #'Stepping' #'Check' #
+WithdrawalSolverTolerance = 0.01
+
+# Monte Carlo sequence-of-returns analysis: in addition to the single run above at constant R, project many random
+# annual return paths and report the probability of success, TotalAssets percentile bands and when money runs out
+MonteCarloFlag = False
+MonteCarloNumPaths = 1000
+MonteCarloDistribution = 'Lognormal' #'Normal' #'Bootstrap' #
+MonteCarloStdDev = 0.15 # standard deviation of annual returns (mean is R)
+MonteCarloHistoricalReturns = None # annual returns to draw from, for 'Bootstrap'
+MonteCarloSeed = 0 # seed of random number generator, so results are repeatable
+MonteCarloNumWorkers = os.cpu_count() # number of parallel processes
+
+# Maximum sustainable expenses: highest Exp (with ExpRate and FutureExpenseAdjustments as above) that doesn't run out of
+# money within NumYearsToProject, for each withdrawal method run, found to within MaxSustainableExpenseTolerance dollars
+MaxSustainableExpenseFlag = False
+MaxSustainableExpenseTolerance = 1.
+
+# Income target optimization (TPM): search for the MaxStandardIncome and/or SpecifiedIncome of each age band (the first
+# starting at CurrentAge, the others at each of OptimizeIncomeTargetsBandStartAges) that maximize final TotalAssets
+# ('FinalAssets') or minimize lifetime taxes plus penalties ('TaxesAndPenalties') without running out of money, starting
+# from the MaxStandardIncome and SpecifiedIncome schedules above
+OptimizeIncomeTargetsFlag = False
+OptimizeIncomeTargetsBandStartAges = np.array([65.,67.,75.]) # e.g. ACA ends, SS starts, RMDs start
+OptimizeIncomeTargetsTargets = 'Both' #'MaxStandardIncome' #'SpecifiedIncome' #
+OptimizeIncomeTargetsObjective = 'FinalAssets' #'TaxesAndPenalties' #
+OptimizeIncomeTargetsNumWorkers = os.cpu_count() # number of parallel processes
+
+# Sensitivity analysis (TPM): change of final TotalAssets, lifetime taxes plus penalties and OutOfMoneyAge per step of
+# each of R, Exp, SpecifiedIncome, dividend yield, social security amount and start age, and the initial balances
+# (see DefaultPerturbations in ProjectionSensitivity.py), printed and written to the output file
+SensitivityFlag = False
+SensitivityCentral = False # also project each input at -step (twice the projections, more accurate)
+SensitivityNumWorkers = os.cpu_count() # number of parallel processes
+
+# Historical backtest: project with the real (inflation-adjusted) returns of every rolling start year cohort in a
+# historical returns file - a local .csv or .npz with Year, StockReturn, BondReturn and Inflation columns for
+# consecutive years (see HistoricalBacktest.py) - and report the success rate and the worst start years.
+# HistoricalReturns.csv (included) has US stock (S&P 500) and 10-year Treasury bond total returns and CPI inflation,
+# 1928-2023 - sources in its comment lines.
+HistoricalBacktestFlag = False
+HistoricalReturnsFile = 'HistoricalReturns.csv'
+HistoricalStockAllocation = 1. # fraction in stocks (the rest in bonds), rebalanced every year
+HistoricalNumWorstCohorts = 5 # number of worst start years to report
+HistoricalBacktestNumWorkers = os.cpu_count() # number of parallel processes
+
+# Projection result cache: reuse the results of a previous run with identical inputs (e.g. when only changing plots),
+# stored in ProjectionCacheDir. Results are recomputed whenever any input or the engine code changes. Least recently
+# used results are deleted once the cache exceeds MaxProjectionCacheSize. Off by default, since it writes files under
+# ProjectionCacheDir: set UseProjectionCache = True to use it.
+UseProjectionCache = False
+ClearProjectionCache = False # delete all cached results before running
+ProjectionCacheDir = OutDir+'ProjectionCache/'
+MaxProjectionCacheSize = 500.e6 # bytes
+
+# Instrumentation: count the calls and time of the main engine functions (ComputeTaxes, ComputeSubsidy, the withdrawal
+# phases, etc.) and the delta loop iterations, in total and per year, print a report table and save it to
+# ProjectionInstrumentation.json (and MonteCarloInstrumentation.json) in OutDir. Adds a little run time when on. Counts
+# nothing for cached projections (see UseProjectionCache) or parallel workers (see ProjectBothNumWorkers and
+# MonteCarloNumWorkers).
+InstrumentProjection = False
+
+# Events printed during the single projection (see EventLog.py): 'Info' prints each year count, plus any warnings (e.g.
+# running out of money); 'Debug' also prints each year's withdrawals, Roth conversions, and what
+# TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc does; 'Warning' prints only warnings. The Monte Carlo analysis
+# is always silent.
+EventLogLevel = 'Info' #'Debug' #'Warning' #
+
 # Plot flags
 AssetBalancesVsAge = True
 YearlyValuesVsAge = True
 YearlyValuesNoTotalCashVsAge = True
 AssetBalancesVsAgeTPMvsTraditionalDiff = False
 YearlyValuesVsAgeTPMvsTraditionalDiff = False
+MonteCarloTotalAssetsPercentilesVsAge = True
 
 #############################################################################################################
 
@@ -242,6 +330,8 @@ IncDict = {'QualifiedDividendYield': QualifiedDividendYield,
            'AgeSpecifiedIncomeChangeWillStart': AgeSpecifiedIncomeChangeWillStart,
            'TryIncreasingPostTaxWithdrawalAndMaybeReducingStdIncFlag':
                TryIncreasingPostTaxWithdrawalAndMaybeReducingStdIncFlag,
+           'WithdrawalSolver': WithdrawalSolver,
+           'WithdrawalSolverTolerance': WithdrawalSolverTolerance,
            'AdjustTaxBillIfIncomeForACAsubsidiesNotMet': AdjustTaxBillIfIncomeForACAsubsidiesNotMet,
            'ExpectedIncomeForACAsubsidies': ExpectedIncomeForACAsubsidies,
            'NumPeopleOnACA': NumPeopleOnACA,
@@ -278,23 +368,32 @@ if not os.path.exists(OutDir):
 
 # Single run of ProjFinalBalance
 
-t0 = time.time()
-
-if TPMorTraditionalWithdrawal == 'TPM':
-    ProjArrays = ProjFinalBalance(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject, R,
-                                  FilingStatus,TPMwithdraw457bFirst)
-elif TPMorTraditionalWithdrawal == 'Traditional':
-    ProjArrays = ProjFinalBalanceTraditional(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,
-                                             NumYearsToProject, R,FilingStatus)
-elif TPMorTraditionalWithdrawal == 'Both':
-    ProjArrays = ProjFinalBalance(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject, R,
-                                  FilingStatus,TPMwithdraw457bFirst)
-    ProjArraysTraditional = ProjFinalBalanceTraditional(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,
-                                                        NumYearsToProject, R,FilingStatus)
-
-t1 = time.time()
-SimTime = t1-t0
+with InstrumentationContext(InstrumentProjection) as ProjectionStats, EventLogListener(EventLogLevel):
+
+    if ClearProjectionCache:
+        ClearProjectionCacheDir(ProjectionCacheDir)
+
+    if TPMorTraditionalWithdrawal == 'TPM':
+        ProjArrays = CachedProjection(ProjFinalBalance,(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,
+                                                        NumYearsToProject, R,FilingStatus,TPMwithdraw457bFirst),
+                                      ProjectionCacheDir,MaxProjectionCacheSize,UseProjectionCache)
+    elif TPMorTraditionalWithdrawal == 'Traditional':
+        ProjArrays = CachedProjection(ProjFinalBalanceTraditional,(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,
+                                                                   RMDstartAge,NumYearsToProject, R,FilingStatus),
+                                      ProjectionCacheDir,MaxProjectionCacheSize,UseProjectionCache)
+    elif TPMorTraditionalWithdrawal == 'Both':
+        BothDict = ProjectBothStrategies(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject,R,
+                                         FilingStatus,TPMwithdraw457bFirst,ProjectBothNumWorkers,ProjectionCacheDir,
+                                         MaxProjectionCacheSize,UseProjectionCache)
+        ProjArrays = BothDict['TPM']
+        ProjArraysTraditional = BothDict['Traditional']
+        ProjArraysDiff = BothDict['Diff']
+
+SimTime = ProjectionStats['TotalTime']
 print('Projection Time: '+'{:.2f}'.format(SimTime)+' seconds')
+if InstrumentProjection:
+    print(InstrumentationReport(ProjectionStats))
+    SaveInstrumentation(ProjectionStats,OutDir+'ProjectionInstrumentation.json')
 
 #############################################################################################################
 
@@ -316,6 +415,9 @@ file.write('RMDs Total: $'+'{:.2f}'.format(np.sum(ProjArrays['RMDtotal']))+'\n\n
 file.write('Sim Time: '+'{:.2f}'.format(SimTime)+' seconds\n')
 if np.isnan(ProjArrays['OutOfMoneyAge']) == False:
     file.write('Age money ran out: '+'{:.0f}'.format(ProjArrays['OutOfMoneyAge'])+'\n')
+if TPMorTraditionalWithdrawal == 'Both':
+    file.write('Total Final Diff (TPM - Traditional): $'+'{:.2f}'.format(ProjArraysDiff['TotalAssets'][-1])+'\n')
+    file.write('Taxes Total Diff (TPM - Traditional): $'+'{:.2f}'.format(np.sum(ProjArraysDiff['Taxes']))+'\n')
 file.close()
 
 #############################################################################################################
@@ -454,16 +556,15 @@ if TPMorTraditionalWithdrawal == 'Both' and AssetBalancesVsAgeTPMvsTraditionalDi
 
     NumPlots = 6 #7 # TotalAssets, PostTaxTotal, PreTax, PreTax457b, Roth, CashCushion #, CapGainsTotal
     AssetsArray = np.zeros((NumPlots,len(ProjArrays['TotalAssets'])))
-    AssetsArray[0,:] = (ProjArrays['TotalAssets']-ProjArraysTraditional['TotalAssets'])/1.e6
-    AssetsArray[1,:] = (ProjArrays['PostTaxTotal']-ProjArraysTraditional['PostTaxTotal'])/1.e6
-    AssetsArray[2,:] = (ProjArrays['PreTaxTotal']-ProjArraysTraditional['PreTaxTotal'])/1.e6
-    AssetsArray[3,:] = (ProjArrays['PreTax457bTotal']-ProjArraysTraditional['PreTax457bTotal'])/1.e6
-    AssetsArray[4,:] = (ProjArrays['RothTotal']-ProjArraysTraditional['RothTotal'])/1.e6
-    AssetsArray[5,:] = (ProjArrays['CashCushion']-ProjArraysTraditional['CashCushion'])/1.e6
-    # AssetsArray[6,:] = (ProjArrays['CapGainsTotal']-ProjArraysTraditional['CapGainsTotal'])/1.e6
-
-    PlotLabelArray = ['Total, Final $'+'{:.3f}M'.format((ProjArrays['TotalAssets'][-1]-
-                                                         ProjArraysTraditional['TotalAssets'][-1])/1.e6),'PostTaxTotal',
+    AssetsArray[0,:] = ProjArraysDiff['TotalAssets']/1.e6
+    AssetsArray[1,:] = ProjArraysDiff['PostTaxTotal']/1.e6
+    AssetsArray[2,:] = ProjArraysDiff['PreTaxTotal']/1.e6
+    AssetsArray[3,:] = ProjArraysDiff['PreTax457bTotal']/1.e6
+    AssetsArray[4,:] = ProjArraysDiff['RothTotal']/1.e6
+    AssetsArray[5,:] = ProjArraysDiff['CashCushion']/1.e6
+    # AssetsArray[6,:] = ProjArraysDiff['CapGainsTotal']/1.e6
+
+    PlotLabelArray = ['Total, Final $'+'{:.3f}M'.format(ProjArraysDiff['TotalAssets'][-1]/1.e6),'PostTaxTotal',
                       'PreTax','PreTax457b','Roth','CashCushion']#,'CapGains']
     PlotColorArray = ['k','r','b','g','c','m'] #,'limegreen']
 
@@ -499,16 +600,16 @@ if TPMorTraditionalWithdrawal == 'Both' and YearlyValuesVsAgeTPMvsTraditionalDif
     # TotalIncome, Expenses, Taxes, Penalties # TotalCash, SpecifiedIncome, TotalStandardIncome, TotalLTcapGainsIncome, TotalSSincome,
     NumPlots = 4 #8 #9
     ValuesArray = np.zeros((NumPlots,len(ProjArrays['SpecifiedIncome'])))
-    # ValuesArray[0,:] = (ProjArrays['SpecifiedIncome']-ProjArraysTraditional['SpecifiedIncome'])/1000.
-    # ValuesArray[1,:] = (ProjArrays['TotalStandardIncome']-ProjArraysTraditional['TotalStandardIncome'])/1000.
-    # ValuesArray[2,:] = (ProjArrays['TotalLTcapGainsIncome']-ProjArraysTraditional['TotalLTcapGainsIncome'])/1000.
-    # ValuesArray[3,:] = (ProjArrays['TotalSSincome']-ProjArraysTraditional['TotalSSincome'])/1000.
-    ValuesArray[0,:] = (ProjArrays['TotalIncome']-ProjArraysTraditional['TotalIncome'])/1000.
-    # ValuesArray[1,:] = (ProjArrays['Expenses']-ProjArraysTraditional['Expenses'])/1000.
-    ValuesArray[1,:] = (ProjArrays['Taxes']-ProjArraysTraditional['Taxes'])/1000.
-    ValuesArray[2,:] = (ProjArrays['Penalties']-ProjArraysTraditional['Penalties'])/1000.
-    # ValuesArray[5,:] = (ProjArrays['TotalCash']-ProjArraysTraditional['TotalCash'])/1000.
-    ValuesArray[3,:] = (ProjArrays['RMDtotal']-ProjArraysTraditional['RMDtotal'])/1000.
+    # ValuesArray[0,:] = ProjArraysDiff['SpecifiedIncome']/1000.
+    # ValuesArray[1,:] = ProjArraysDiff['TotalStandardIncome']/1000.
+    # ValuesArray[2,:] = ProjArraysDiff['TotalLTcapGainsIncome']/1000.
+    # ValuesArray[3,:] = ProjArraysDiff['TotalSSincome']/1000.
+    ValuesArray[0,:] = ProjArraysDiff['TotalIncome']/1000.
+    # ValuesArray[1,:] = ProjArraysDiff['Expenses']/1000.
+    ValuesArray[1,:] = ProjArraysDiff['Taxes']/1000.
+    ValuesArray[2,:] = ProjArraysDiff['Penalties']/1000.
+    # ValuesArray[5,:] = ProjArraysDiff['TotalCash']/1000.
+    ValuesArray[3,:] = ProjArraysDiff['RMDtotal']/1000.
 
 
     PlotLabelArray = ['TotalIncome','Taxes','Penalties','RMDs'] #'TotalCash', 'SpecifiedIncome','TotalStandardIncome','TotalLTcapGainsIncome','TotalSSincome','Expenses',
@@ -536,3 +637,154 @@ if TPMorTraditionalWithdrawal == 'Both' and YearlyValuesVsAgeTPMvsTraditionalDif
     PlotDict.update(UpdateDict)
     # Create plot
     MultiPlot(PlotDict)
+
+#############################################################################################################
+
+# Maximum sustainable expenses
+
+if MaxSustainableExpenseFlag:
+
+    if TPMorTraditionalWithdrawal == 'Both':
+        Methods = ['TPM','Traditional']
+    else:
+        Methods = [TPMorTraditionalWithdrawal]
+
+    file=open(OutputFile,'a')
+    file.write('\n')
+    for Method in Methods:
+        MaxExpDict = MaxSustainableExpense(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject,R,
+                                           FilingStatus,TPMwithdraw457bFirst,Method,
+                                           Tolerance=MaxSustainableExpenseTolerance)
+        print(Method+' Max Sustainable Expenses: $'+'{:.2f}'.format(MaxExpDict['MaxSustainableExpense'])+' ('+
+              str(MaxExpDict['NumProjections'])+' projections)')
+        file.write(Method+' Max Sustainable Expenses: $'+'{:.2f}'.format(MaxExpDict['MaxSustainableExpense'])+'\n')
+    file.close()
+
+#############################################################################################################
+
+# Income target optimization
+
+if OptimizeIncomeTargetsFlag:
+
+    OptDict = OptimizeIncomeTargets(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject,R,
+                                    FilingStatus,TPMwithdraw457bFirst,OptimizeIncomeTargetsBandStartAges,
+                                    OptimizeIncomeTargetsTargets,OptimizeIncomeTargetsObjective,
+                                    NumWorkers=OptimizeIncomeTargetsNumWorkers)
+    BandAges = np.concatenate(([CurrentAge[0]],OptimizeIncomeTargetsBandStartAges))
+    print('Optimized Income Targets ('+str(OptDict['NumProjections'])+' projections): Final Total Assets $'+
+          '{:.2f}'.format(OptDict['InitialFinalAssets'])+' -> $'+'{:.2f}'.format(OptDict['FinalAssets'])+
+          ', Taxes and Penalties $'+'{:.2f}'.format(OptDict['InitialTaxesAndPenalties'])+' -> $'+
+          '{:.2f}'.format(OptDict['TaxesAndPenalties']))
+
+    file=open(OutputFile,'a')
+    file.write('\nOptimized Income Targets (objective: '+OptimizeIncomeTargetsObjective+')\n')
+    for ct in range(len(BandAges)):
+        file.write('From Age '+'{:.0f}'.format(BandAges[ct])+': MaxStandardIncome $'+
+                   '{:.2f}'.format(OptDict['MaxStandardIncome'][ct])+', SpecifiedIncome $'+
+                   '{:.2f}'.format(OptDict['SpecifiedIncome'][ct])+'\n')
+    file.write('Final Total Assets: $'+'{:.2f}'.format(OptDict['FinalAssets'])+' (starting targets: $'+
+               '{:.2f}'.format(OptDict['InitialFinalAssets'])+')\n')
+    file.write('Total Taxes and Penalties: $'+'{:.2f}'.format(OptDict['TaxesAndPenalties'])+' (starting targets: $'+
+               '{:.2f}'.format(OptDict['InitialTaxesAndPenalties'])+')\n')
+    file.close()
+
+#############################################################################################################
+
+# Sensitivity analysis
+
+if SensitivityFlag:
+
+    SensDict = ProjectionSensitivity(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject,R,
+                                     FilingStatus,TPMwithdraw457bFirst,Central=SensitivityCentral,
+                                     NumWorkers=SensitivityNumWorkers)
+    print('Sensitivity ('+str(SensDict['NumProjections'])+' projections), change of each output per step:')
+    print(SensitivityReport(SensDict))
+
+    file=open(OutputFile,'a')
+    file.write('\nSensitivity, change of each output per step:\n'+SensitivityReport(SensDict)+'\n')
+    file.close()
+
+#############################################################################################################
+
+# Historical backtest
+
+if HistoricalBacktestFlag:
+
+    HistoricalReturns = LoadHistoricalReturns(HistoricalReturnsFile)
+    BacktestDict = HistoricalBacktest(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject,
+                                      FilingStatus,TPMwithdraw457bFirst,HistoricalReturns,HistoricalStockAllocation,
+                                      TPMorTraditionalWithdrawal,HistoricalBacktestNumWorkers,
+                                      HistoricalNumWorstCohorts)
+    print(BacktestReport(BacktestDict))
+
+    file=open(OutputFile,'a')
+    file.write('\n'+BacktestReport(BacktestDict)+'\n')
+    file.close()
+
+#############################################################################################################
+
+# Monte Carlo sequence-of-returns analysis
+
+if MonteCarloFlag:
+
+    ReturnPaths = GenerateReturnPaths(MonteCarloNumPaths,NumYearsToProject,MonteCarloDistribution,R,MonteCarloStdDev,
+                                      MonteCarloHistoricalReturns,MonteCarloSeed)
+
+    with InstrumentationContext(InstrumentProjection) as MonteCarloStats:
+        MCdict = MonteCarloProjection(TaxRateInfo,IVdict,IncDict,ExpDict,CurrentAge,RMDstartAge,NumYearsToProject,
+                                      ReturnPaths,FilingStatus,TPMwithdraw457bFirst,TPMorTraditionalWithdrawal,
+                                      MonteCarloNumWorkers)
+    MonteCarloTime = MonteCarloStats['TotalTime']
+    print('Monte Carlo Time: '+'{:.2f}'.format(MonteCarloTime)+' seconds')
+    if InstrumentProjection:
+        print(InstrumentationReport(MonteCarloStats))
+        SaveInstrumentation(MonteCarloStats,OutDir+'MonteCarloInstrumentation.json')
+
+    file=open(OutputFile,'a')
+    file.write('\nMonte Carlo: '+str(MonteCarloNumPaths)+' '+MonteCarloDistribution+' return paths\n')
+    for Method in MCdict:
+        file.write('\n'+Method+' Success Probability: '+'{:.1f}'.format(MCdict[Method]['SuccessProbability']*100.)+
+                   '%\n')
+        for ct in range(len(MCdict[Method]['Percentiles'])):
+            file.write(Method+' Total Final, '+'{:.0f}'.format(MCdict[Method]['Percentiles'][ct])+'th Percentile: $'+
+                       '{:.2f}'.format(MCdict[Method]['TotalAssetsPercentiles'][ct,-1])+'\n')
+        for ct in range(len(MCdict[Method]['OutOfMoneyAgeValues'])):
+            file.write(Method+' Age money ran out: '+'{:.0f}'.format(MCdict[Method]['OutOfMoneyAgeValues'][ct])+', '+
+                       str(MCdict[Method]['OutOfMoneyAgeCounts'][ct])+' paths\n')
+    file.write('Monte Carlo Time: '+'{:.2f}'.format(MonteCarloTime)+' seconds\n')
+    file.close()
+
+    # Plot TotalAssets percentile bands
+    if MonteCarloTotalAssetsPercentilesVsAge:
+
+        for Method in MCdict:
+
+            NumPlots = len(MCdict[Method]['Percentiles'])
+            AssetsArray = MCdict[Method]['TotalAssetsPercentiles']/1.e6
+
+            PlotLabelArray = ['{:.0f}'.format(Percentile)+'th Percentile' for Percentile in
+                              MCdict[Method]['Percentiles']]
+            PlotColorArray = ['r','m','k','c','b']
+
+            # Initialize plot dict using default dict
+            PlotDict = copy.deepcopy(DefaultPlotDict)
+            # Specify unique plot values
+            UpdateDict = \
+                {'IndepData': ProjArrays['Age'][:,0],
+                 'DepData': AssetsArray,
+                 'NumPlots': NumPlots,
+                 'PlotColorArray': PlotColorArray,
+                 'PlotLabelArray': PlotLabelArray,
+                 'SemilogyFlag': False,
+                 'ymin': 0, 'ymax': np.max(AssetsArray)+1.,
+                 'xmin': ProjArrays['Age'][0,0], 'xmax': ProjArrays['Age'][-1,0],
+                 'ylabel': 'Total Assets [2022 $M]',
+                 'xlabel': 'Age',
+                 'TitleText': Method+' Total Assets vs Age, Success '+
+                              '{:.1f}'.format(MCdict[Method]['SuccessProbability']*100.)+'%',
+                 'LegendLoc': 'upper left',
+                 'SaveFile': OutDir+'MonteCarloTotalAssetsPercentilesVsAge'+Method+'.png'}
+            # Update dict to have plot specific values
+            PlotDict.update(UpdateDict)
+            # Create plot
+            MultiPlot(PlotDict)
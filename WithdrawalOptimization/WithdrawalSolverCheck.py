@@ -0,0 +1,145 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# WithdrawalSolverCheck.py
+
+import numpy as np
+import sys
+import copy
+import time
+from TaxRateInfoInput import TaxRateInfoInput
+from ProjFinalBalance import ProjFinalBalance
+
+# Check that the 'Breakpoint' WithdrawalSolver gives exactly the same whole projections as 'Stepping' (the original
+# $100-at-a-time loop), over a sweep of single and married filing jointly scenarios: expenses, ROI, the
+# TryIncreasingPostTaxWithdrawalAndMaybeReducingStdInc flag and a cash cushion. Every ProjArrays entry of every year
+# must match exactly, so a difference in any single withdrawal (e.g. drawing $100 from a different account) is caught
+# even though it only shows up in later years. The 'Check' WithdrawalSolver can't catch those, since it compares both
+# solvers from the same starting state each year. Fails (nonzero exit status) on any difference. Run as a script:
+# python WithdrawalSolverCheck.py
+
+# Inputs
+FilingStatusList = ['Single','MarriedFilingJointly']
+ExpList = [30000.,45000.,60000.,90000.,120000.]
+RList = [0.03,0.07]
+TryIncreasingFlagList = [False,True]
+CashCushionList = [0.,20000.]
+NumYearsToProject = 52
+TPMwithdraw457bFirst = True
+
+TaxRateInfo = TaxRateInfoInput()
+
+# Inputs of a single filer (40 years old) or a married couple filing jointly (40 and 38), each with PreTax, 457b, Roth
+# and PostTax lots, and social security from 67
+def SolverCheckInputs(FilingStatus,Exp,TryIncreasingFlag,CashCushion):
+
+    if FilingStatus == 'Single':
+        CurrentAge = np.array([40])
+        IVdict = {'PreTaxIV': np.array([400000.]), 'PreTax457bIV': np.array([100000.]), 'RothIV': np.array([100000.]),
+                  'RothContributions': np.array([60000.])}
+        SocialSecurityPayments = np.array([17000.])
+        StandardDeduction = TaxRateInfo['SingleStandardDeduction']
+        SpecifiedIncome = 40000.
+        SpecifiedIncomeChange = np.array([StandardDeduction + TaxRateInfo['SingleIncomeBracketLTcapGainsMins'][1] -
+                                          SpecifiedIncome])
+        NumPeopleOnACA = 1
+        BenchmarkPrice = 454.*12.
+    else:
+        CurrentAge = np.array([40,38])
+        IVdict = {'PreTaxIV': np.array([200000.,200000.]), 'PreTax457bIV': np.array([50000.,50000.]),
+                  'RothIV': np.array([50000.,50000.]), 'RothContributions': np.array([30000.,30000.])}
+        SocialSecurityPayments = np.array([17000.,17000.])
+        StandardDeduction = TaxRateInfo['MarriedFilingJointlyStandardDeduction']
+        SpecifiedIncome = 50000.
+        SpecifiedIncomeChange = np.array([StandardDeduction +
+                                          TaxRateInfo['MarriedFilingJointlyIncomeBracketLTcapGainsMins'][1] -
+                                          SpecifiedIncome])
+        NumPeopleOnACA = 4
+        BenchmarkPrice = 1458.76*12.
+    NumPeople = len(CurrentAge)
+
+    IVdict.update({'PostTaxIV': np.full(8,50000.), 'CurrentUnrealizedCapGains': np.full(8,40000.),
+                   'LotPurchasedFirstYear': np.array([False]*7+[True]), 'RothConversionAmount': np.array([]),
+                   'RothConversionAge': np.array([]), 'RothConversionPerson': np.array([],dtype=int),
+                   'CashCushion': CashCushion, 'TaxesGenPrevYear': 0., 'TaxesPaidPrevYear': 0.,
+                   'PenaltiesGenPrevYear': 0., 'PenaltiesPaidPrevYear': 0.})
+
+    IncDict = {'QualifiedDividendYield': 0.016, 'NonQualifiedDividendYield': 0.,
+               'SocialSecurityPayments': SocialSecurityPayments, 'AgeSSwillStart': np.full(NumPeople,67.),
+               'OtherIncomeSources': np.array([]), 'AgeOtherIncomeSourcesWillStart': np.array([]),
+               'MaxStandardIncome': StandardDeduction, 'MaxStandardIncomeChange': np.array([]),
+               'AgeMaxStandardIncomeChangeWillStart': np.array([]), 'SpecifiedIncome': SpecifiedIncome,
+               'SpecifiedIncomeChange': SpecifiedIncomeChange, 'AgeSpecifiedIncomeChangeWillStart': np.array([65.]),
+               'TryIncreasingPostTaxWithdrawalAndMaybeReducingStdIncFlag': TryIncreasingFlag,
+               'AdjustTaxBillIfIncomeForACAsubsidiesNotMet': True, 'ExpectedIncomeForACAsubsidies': SpecifiedIncome,
+               'NumPeopleOnACA': NumPeopleOnACA, 'BenchmarkPrice': BenchmarkPrice, 'Residence': 'Contiguous'}
+
+    ExpDict = {'Exp': Exp, 'ExpRate': 0., 'FutureExpenseAdjustments': np.array([-9600.]),
+               'FutureExpenseAdjustmentsAge': np.array([66.])}
+
+    RMDstartAge = np.full(NumPeople,75.)
+
+    return IVdict, IncDict, ExpDict, CurrentAge, RMDstartAge
+
+# ProjArrays keys whose values differ (in shape or any element) between two projections, and the first year of each
+# difference (None if they differ in shape, e.g. a different number of Roth conversions left)
+def ProjArraysDifferences(ProjArrays1,ProjArrays2):
+
+    Differences = []
+    for Key in ProjArrays1:
+        Value1 = np.asarray(ProjArrays1[Key])
+        Value2 = np.asarray(ProjArrays2[Key])
+        if np.shape(Value1) != np.shape(Value2):
+            Differences.append((Key,None))
+        elif not np.array_equal(Value1,Value2,equal_nan=True):
+            Differs = (Value1 != Value2) & ~(np.isnan(Value1) & np.isnan(Value2))
+            Differences.append((Key,np.argwhere(Differs)[0][0] if np.ndim(Differs) > 0 else 0))
+
+    return Differences
+
+def WithdrawalSolverCheck(FilingStatusList,ExpList,RList,TryIncreasingFlagList,CashCushionList,NumYearsToProject,
+                          TPMwithdraw457bFirst):
+
+    NumScenarios = 0
+    NumDiffering = 0
+    SolverTime = {'Stepping': 0., 'Breakpoint': 0.}
+    for FilingStatus in FilingStatusList:
+        for Exp in ExpList:
+            for R in RList:
+                for TryIncreasingFlag in TryIncreasingFlagList:
+                    for CashCushion in CashCushionList:
+                        IVdict, IncDict, ExpDict, CurrentAge, RMDstartAge = \
+                            SolverCheckInputs(FilingStatus,Exp,TryIncreasingFlag,CashCushion)
+                        ProjArrays = {}
+                        for WithdrawalSolver in SolverTime:
+                            t0 = time.perf_counter()
+                            ProjArrays[WithdrawalSolver] = \
+                                ProjFinalBalance(TaxRateInfo,copy.deepcopy(IVdict),
+                                                 dict(IncDict,WithdrawalSolver=WithdrawalSolver),
+                                                 copy.deepcopy(ExpDict),CurrentAge,RMDstartAge,NumYearsToProject,R,
+                                                 FilingStatus,TPMwithdraw457bFirst)
+                            SolverTime[WithdrawalSolver] += time.perf_counter() - t0
+                        NumScenarios += 1
+
+                        Differences = ProjArraysDifferences(ProjArrays['Stepping'],ProjArrays['Breakpoint'])
+                        if len(Differences) > 0:
+                            NumDiffering += 1
+                            print(FilingStatus+', Exp '+'{:.0f}'.format(Exp)+', R '+str(R)+', TryIncreasing flag '+
+                                  str(TryIncreasingFlag)+', CashCushion '+'{:.0f}'.format(CashCushion)+': '+
+                                  ', '.join(Key+('' if Year is None else ' (year '+str(Year)+')')
+                                            for Key, Year in Differences))
+
+    print(str(NumScenarios)+' scenarios, '+str(NumDiffering)+' with any difference between Stepping and Breakpoint ('+
+          'Stepping '+'{:.1f}'.format(SolverTime['Stepping'])+' s, Breakpoint '+
+          '{:.1f}'.format(SolverTime['Breakpoint'])+' s)')
+
+    return NumDiffering == 0
+
+if __name__ == '__main__':
+    if not WithdrawalSolverCheck(FilingStatusList,ExpList,RList,TryIncreasingFlagList,CashCushionList,
+                                 NumYearsToProject,TPMwithdraw457bFirst):
+        print('FAIL')
+        sys.exit(1)
+    print('PASS')
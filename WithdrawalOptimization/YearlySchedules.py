@@ -0,0 +1,64 @@
+# Copyright (c) 2023 Engineering Your FI #
+# This work is licensed under a Creative Commons Attribution 4.0 International License. #
+# Thus, feel free to modify/add content as desired, and repost as desired, but please provide attribution to
+# engineeringyourfi.com (in particular https://engineeringyourfi.com/fire-withdrawal-strategy-algorithms/)
+
+# YearlySchedules.py
+
+import numpy as np
+
+# Values of each year of a projection that only depend on age (not on the state of the projection), computed for all
+# years at once before the loop over years, which then just indexes them. A dict of arrays (one value per year):
+# 'Expenses': ExpDict['Exp'] + ExpRate*year count, plus the FutureExpenseAdjustments whose age has been reached
+# 'MaxTotal': IncDict['SpecifiedIncome'] plus the SpecifiedIncomeChange whose age has been reached (total income target)
+# 'MaxStandard': IncDict['MaxStandardIncome'] plus the MaxStandardIncomeChange whose age has been reached
+# 'OtherIncome': total of the OtherIncomeSources that have started
+# 'TotalSS': total social security, of each person who has reached their AgeSSwillStart
+# 'ACAeligible': whether anyone is still under 65 (not yet on Medicare, so still on ACA health insurance)
+# The first person's age (Age[:,0]) determines everything but social security, which goes by each person's own age.
+# Exp, SpecifiedIncome and MaxStandardIncome can have a leading scenario axis (see ProjFinalBalanceTraditionalBatch), in
+# which case so do 'Expenses', 'MaxTotal' and 'MaxStandard' (NumScenarios x NumYearsToProject).
+# Amounts are added one input at a time, in input order, so each year's value is exactly what adding them up year by
+# year gives.
+def YearlySchedules(IncDict,ExpDict,Age):
+
+    NumYearsToProject = np.shape(Age)[0]
+
+    Expenses = np.asarray(ExpDict['Exp'],dtype=float)[...,None] + \
+               ExpDict['ExpRate']*np.arange(NumYearsToProject,dtype=float)
+    Expenses = AddScheduledAmounts(Expenses,ExpDict['FutureExpenseAdjustments'],
+                                   ExpDict['FutureExpenseAdjustmentsAge'],Age[:,0])
+
+    MaxTotal = np.asarray(IncDict['SpecifiedIncome'],dtype=float)[...,None] + np.zeros(NumYearsToProject)
+    MaxTotal = AddScheduledAmounts(MaxTotal,IncDict['SpecifiedIncomeChange'],
+                                   IncDict['AgeSpecifiedIncomeChangeWillStart'],Age[:,0])
+
+    MaxStandard = np.asarray(IncDict['MaxStandardIncome'],dtype=float)[...,None] + np.zeros(NumYearsToProject)
+    MaxStandard = AddScheduledAmounts(MaxStandard,IncDict['MaxStandardIncomeChange'],
+                                      IncDict['AgeMaxStandardIncomeChangeWillStart'],Age[:,0])
+
+    OtherIncome = AddScheduledAmounts(np.zeros(NumYearsToProject),IncDict['OtherIncomeSources'],
+                                      IncDict['AgeOtherIncomeSourcesWillStart'],Age[:,0])
+
+    # one payment per person, by that person's age
+    TotalSS = np.zeros(NumYearsToProject)
+    for ct in range(len(IncDict['SocialSecurityPayments'])):
+        TotalSS = AddScheduledAmounts(TotalSS,IncDict['SocialSecurityPayments'][ct:ct+1],
+                                      IncDict['AgeSSwillStart'][ct:ct+1],Age[:,ct])
+
+    Schedules = {'Expenses': Expenses,
+                 'MaxTotal': MaxTotal,
+                 'MaxStandard': MaxStandard,
+                 'OtherIncome': OtherIncome,
+                 'TotalSS': TotalSS,
+                 'ACAeligible': Age[:,-1] < 65.}
+
+    return Schedules
+
+# Add each of Amounts to Values in the years Age has reached its start age
+def AddScheduledAmounts(Values,Amounts,StartAges,Age):
+
+    for ct in range(len(Amounts)):
+        Values = Values + np.where(Age >= StartAges[ct],Amounts[ct],0.)
+
+    return Values